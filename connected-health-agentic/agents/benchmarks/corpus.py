@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+from .fake_backend import DISTRICTS
+
+# (kind, language) -> templates. Kinds roughly follow what the triage rules distinguish.
+TEMPLATES: Dict[str, Dict[str, List[str]]] = {
+    'red-flag': {
+        'en': ['My son is unconscious and not responding', 'She had a convulsion a few minutes ago', 'He is having difficulty breathing'],
+        'roman-ur': ['Mera bacha behosh ho gaya hai', 'Ammi ko jhatke lag rahe hain', 'Saans nahi aa rahi, jaldi batayen'],
+        'ur': ['میرا بچہ بے ہوش ہے', 'بچے کو جھٹکے لگ رہے ہیں', 'سانس نہیں آ رہی'],
+    },
+    'emergency': {
+        'en': ['Pregnant woman with bleeding and severe headache', 'Breathing difficulty since this morning'],
+        'roman-ur': ['Hamal ke dauran khoon aa raha hai', 'Saans mein takleef ho rahi hai kal se'],
+        'ur': ['حمل میں خون آ رہا ہے', 'سانس لینے میں دشواری ہے'],
+    },
+    'clinic': {
+        'en': ['My child has had a fever for three days', 'Fever and body aches since Monday'],
+        'roman-ur': ['Bachay ko bukhar hai, Sehat Card hai, kahan jaun?', 'Teen din se bukhaar nahi utar raha'],
+        'ur': ['بچے کو تین دن سے بخار ہے', 'بخار اور جسم میں درد ہے'],
+    },
+    'self-care': {
+        'en': ['Mild cough since yesterday', 'Slight headache after work', 'Where can I get vaccination information?'],
+        'roman-ur': ['Halka sa zukaam hai', 'Thora sar dard hai', 'Sehat card ke baare mein maloomat chahiye'],
+        'ur': ['ہلکا سا زکام ہے', 'تھوڑا سر درد ہے'],
+    },
+}
+DEFAULT_MIX = {'red-flag': 0.1, 'emergency': 0.1, 'clinic': 0.4, 'self-care': 0.4}
+LANGUAGES = ('en', 'roman-ur', 'ur')
+ROLES = ('citizen', 'citizen', 'citizen', 'lhw', 'doctor')
+
+
+def generate_corpus(
+    size: int,
+    seed: int = 7,
+    mix: Dict[str, float] | None = None,
+    languages: tuple = LANGUAGES,
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    districts = list(DISTRICTS)
+    corpus = []
+    for index in range(size):
+        kind = rng.choices(kinds, weights)[0]
+        language = rng.choice(languages)
+        templates = TEMPLATES[kind].get(language) or TEMPLATES[kind]['en']
+        district = rng.choice(districts)
+        lat, lng = DISTRICTS[district]
+        context: Dict[str, Any] = {
+            'age': rng.choice([2, 6, 14, 24, 31, 45, 67]),
+            'gender': rng.choice(['female', 'male']),
+            'district': district,
+            'incomeBracket': rng.choice(['low', 'low', 'middle']),
+            'hasMockSehatCard': rng.random() < 0.6,
+        }
+        # Half the requests carry a location instead of a district, which exercises the nearest-facility path.
+        if rng.random() < 0.5:
+            context.pop('district')
+            context.update({'lat': round(lat + rng.uniform(-0.3, 0.3), 4), 'lng': round(lng + rng.uniform(-0.3, 0.3), 4)})
+        corpus.append({
+            'session_id': f'bench-{index}',
+            'user_role': rng.choice(ROLES),
+            'language': language,
+            'message': rng.choice(templates),
+            'patient_context': context,
+            'kind': kind,
+        })
+    return corpus
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from orchestration.embeddings import CachedEmbeddingFunction, build_provider
+from orchestration.seeding import load_records, record_document
+
+from .retrieval import DATA_PATH, QUERIES
+
+
+def top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    scores = queries @ matrix.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def normalized(vectors: Any) -> np.ndarray:
+    array = np.asarray(vectors, dtype=np.float32)
+    return array / np.maximum(np.linalg.norm(array, axis=1, keepdims=True), 1e-12)
+
+
+def measure(name: str, documents: List[str], queries: List[str], rounds: int) -> Dict[str, Any]:
+    provider = build_provider(name)
+    provider(documents[:1])
+    started = time.perf_counter()
+    for _ in range(rounds):
+        doc_vectors = provider(documents)
+    batch_seconds = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for query in queries:
+        provider([query])
+    single_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    cached = CachedEmbeddingFunction(provider)
+    cached(queries)
+    started = time.perf_counter()
+    for query in queries:
+        cached([query])
+    cached_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    return {
+        'provider': name,
+        'model_id': provider.model_id,
+        'embeddings_per_sec': round(len(documents) / batch_seconds, 1),
+        'single_query_ms': round(single_ms, 3),
+        'cached_query_ms': round(cached_ms, 4),
+        'doc_vectors': normalized(doc_vectors),
+        'query_vectors': normalized(provider(queries)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare embedding providers on throughput and recall@k against the reference model.')
+    parser.add_argument('--providers', default='sentence-transformers,onnx,onnx-int8')
+    parser.add_argument('--reference', default='sentence-transformers')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--output', default='')
+    args = parser.parse_args()
+
+    records = load_records(os.environ.get('KNOWLEDGE_DATA_PATH', DATA_PATH))
+    documents = [record_document(record) for record in records]
+    queries = QUERIES + [record['title'] for record in records]
+    names = args.providers.split(',')
+    if args.reference not in names:
+        names.insert(0, args.reference)
+    results = {name: measure(name, documents, queries, args.rounds) for name in names}
+
+    reference = results[args.reference]
+    expected = top_k(reference['doc_vectors'], reference['query_vectors'], args.k)
+    report = []
+    for name, result in results.items():
+        found = top_k(result.pop('doc_vectors'), result.pop('query_vectors'), args.k)
+        overlap = [len(got & want) / len(want) for got, want in zip(found, expected)]
+        result[f'recall@{args.k}'] = round(sum(overlap) / len(overlap), 3)
+        report.append(result)
+
+    output = json.dumps({'documents': len(documents), 'queries': len(queries), 'results': report}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            fp.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
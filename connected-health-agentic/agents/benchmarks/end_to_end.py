@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from orchestration import clients, graph
+from orchestration.admission import AdmissionController
+from orchestration.cache import ResponseCache
+from orchestration.eligibility import EligibilityCache
+from orchestration.facilities import FacilityDirectory
+from orchestration.health import BackendHealth, CircuitBreaker
+from orchestration.logs import LogShipper
+
+from .corpus import LANGUAGES, generate_corpus
+from .fake_backend import FakeBackend
+from .stubs import StubGeminiClient, StubKnowledgeBase, percentile
+
+NODE_FUNCTIONS: Dict[str, tuple] = {
+    'ingest': ('ingest_message',),
+    'screen': ('screen_message',),
+    'triage_agent': ('triage_agent', 'triage_agent_async'),
+    'facility_finder': ('facility_finder_agent', 'facility_finder_agent_async'),
+    'program_matcher': ('program_eligibility_agent', 'program_eligibility_agent_async'),
+    'follow_up': ('follow_up_agent', 'follow_up_agent_async'),
+    'analytics': ('analytics_agent',),
+    'finalize': ('finalize_agent',),
+}
+_USER_MESSAGE = re.compile(r'\nUser message:\n(.*)\Z', re.S)
+_visited: contextvars.ContextVar[List[str]] = contextvars.ContextVar('visited')
+
+
+def timed(node: str, function: Callable[..., Any], samples: Dict[str, List[float]]) -> Callable[..., Any]:
+    def record(started: float) -> None:
+        samples[node].append((time.perf_counter() - started) * 1000)
+        visited = _visited.get(None)
+        if visited is not None:
+            visited.append(node)
+
+    if asyncio.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def run_async(state: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await function(state)
+            finally:
+                record(started)
+        return run_async
+
+    @functools.wraps(function)
+    def run(state: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return function(state)
+        finally:
+            record(started)
+    return run
+
+
+def stub_triage(prompt: str) -> Dict[str, Any]:
+    # Answer like a well-behaved model would, so routing after triage matches real traffic.
+    match = _USER_MESSAGE.search(prompt)
+    result = graph.rule_based_triage(match.group(1) if match else prompt)
+    return {**result, 'confidence': 0.9}
+
+
+def install(args: argparse.Namespace, backend: FakeBackend, samples: Dict[str, List[float]]) -> Dict[str, Any]:
+    health = BackendHealth(lambda: sync_client.health(), CircuitBreaker(failure_threshold=5, reset_timeout=5.0), ttl=5.0)
+    sync_client = clients.BackendClient(health=health, transport=backend)
+    shipper = LogShipper(
+        lambda kind, payloads: sync_client.ingest_logs(kind, payloads),
+        tempfile.mkdtemp(prefix='bench-logs-'),
+        flush_interval=0.2,
+    )
+    shipper.start()
+    admission = None
+    if args.gemini_concurrency > 0:
+        admission = AdmissionController(
+            max_concurrent=args.gemini_concurrency,
+            max_queue=args.gemini_queue,
+            max_wait=args.gemini_queue_wait_ms / 1000,
+        )
+    gemini = StubGeminiClient(
+        delays={'fast': args.gemini_fast_delay, 'smart': args.gemini_smart_delay},
+        responses={'fast': stub_triage, 'smart': stub_triage},
+        jitter=args.gemini_jitter,
+        failure_rate=args.gemini_failure_rate,
+        seed=args.seed,
+        admission=admission,
+    )
+    knowledge = StubKnowledgeBase(['Stub guidance document.'], delay=args.rag_delay)
+
+    directory = None
+    if args.facility_index:
+        directory = FacilityDirectory(sync_client.facility_sync)
+        directory.sync()
+    eligibility = EligibilityCache(sync_client.program_catalog, ResponseCache())
+    if args.eligibility_cache:
+        eligibility.refresh_catalog()
+
+    handles: Dict[str, Any] = {'gemini': gemini, 'health': health, 'sync_client': sync_client, 'shipper': shipper}
+    clients.log_shipper = lambda: shipper
+    graph.backend_health = lambda: health
+    graph.backend_client = lambda: sync_client
+    graph.async_backend_client = lambda: handles['async_client']
+    graph.gemini_client = lambda: gemini
+    graph.knowledge_base = lambda: knowledge
+    graph.facility_directory = lambda: directory
+    graph.eligibility_cache = lambda: eligibility
+    graph.TRIAGE_DEADLINE_MS = args.deadline_ms
+    graph.TRIAGE_FAST_FIRST = args.fast_first
+    for node, names in NODE_FUNCTIONS.items():
+        for name in names:
+            setattr(graph, name, timed(node, getattr(graph, name), samples))
+    return handles
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(samples),
+        'mean_ms': round(sum(samples) / len(samples), 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(max(samples), 3) if samples else 0.0,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import MAX_STEPS, RunRequest, build_initial_state
+
+    backend = FakeBackend(
+        facilities=args.facilities,
+        latency=args.backend_latency,
+        jitter=args.backend_jitter,
+        error_rate=args.backend_error_rate,
+        seed=args.seed,
+    )
+    node_samples: Dict[str, List[float]] = defaultdict(list)
+    handles = install(args, backend, node_samples)
+    workflow = graph.build_graph(async_mode=args.mode == 'async').compile()
+    corpus = generate_corpus(args.warmup + args.requests, seed=args.seed, languages=tuple(args.languages.split(',')))
+    config = {'recursion_limit': MAX_STEPS}
+
+    latencies: List[float] = []
+    latencies_by_kind: Dict[str, List[float]] = defaultdict(list)
+    paths: Counter[str] = Counter()
+    outcome: Counter[str] = Counter()
+
+    def record(item: Dict[str, Any], started: float, visited: List[str], result: Any, error: Exception | None) -> None:
+        if item['index'] < args.warmup:
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+        latencies_by_kind[item['kind']].append(latencies[-1])
+        paths[' > '.join(visited)] += 1
+        if error is not None:
+            outcome['errors'] += 1
+            return
+        outcome['degraded'] += bool(result.get('degraded_mode'))
+        outcome[f"level:{(result.get('triage_result') or {}).get('level', 'unknown')}"] += 1
+
+    items = [{**item, 'index': index} for index, item in enumerate(corpus)]
+
+    def state_for(item: Dict[str, Any]) -> Dict[str, Any]:
+        request = RunRequest(**{key: item[key] for key in ('session_id', 'user_role', 'language', 'message', 'patient_context')})
+        return build_initial_state(request)
+
+    if args.mode == 'async':
+        async def drive() -> float:
+            handles['async_client'] = clients.AsyncBackendClient(health=handles['health'], transport=backend)
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one(item: Dict[str, Any]) -> None:
+                async with semaphore:
+                    visited: List[str] = []
+                    _visited.set(visited)
+                    started = time.perf_counter()
+                    result, error = None, None
+                    try:
+                        result = await workflow.ainvoke(state_for(item), config=config)
+                    except Exception as exc:
+                        error = exc
+                    record(item, started, visited, result, error)
+
+            await asyncio.gather(*(one(item) for item in items[:args.warmup]))
+            node_samples.clear()
+            started = time.perf_counter()
+            await asyncio.gather(*(one(item) for item in items[args.warmup:]))
+            elapsed = time.perf_counter() - started
+            await handles['async_client'].aclose()
+            return elapsed
+
+        elapsed = asyncio.run(drive())
+    else:
+        def one(item: Dict[str, Any]) -> None:
+            visited: List[str] = []
+            _visited.set(visited)
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = workflow.invoke(state_for(item), config=config)
+            except Exception as exc:
+                error = exc
+            record(item, started, visited, result, error)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(one, items[:args.warmup]))
+            node_samples.clear()
+            started = time.perf_counter()
+            list(pool.map(one, items[args.warmup:]))
+            elapsed = time.perf_counter() - started
+
+    handles['shipper'].stop()
+    return {
+        'started_at': datetime.utcnow().isoformat() + 'Z',
+        'config': vars(args),
+        'requests': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency': summarize(latencies),
+        'latency_by_kind': {kind: summarize(samples) for kind, samples in sorted(latencies_by_kind.items())},
+        'nodes': {node: summarize(node_samples[node]) for node in NODE_FUNCTIONS if node_samples.get(node)},
+        'outcomes': dict(outcome),
+        'paths': dict(paths.most_common()),
+        'backend': backend.stats(),
+        'model_calls': dict(handles['gemini'].calls),
+        'admission': handles['gemini'].admission.stats() if handles['gemini'].admission else None,
+        'log_shipper': handles['shipper'].stats(),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float = 1.0) -> List[str]:
+    regressions = []
+    pairs = [('throughput_rps', report['throughput_rps'], baseline.get('throughput_rps', 0.0), False)]
+    for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+        pairs.append((f'latency.{key}', report['latency'][key], baseline.get('latency', {}).get(key, 0.0), True))
+    for node, stats in report['nodes'].items():
+        previous = baseline.get('nodes', {}).get(node)
+        if previous:
+            pairs.append((f'nodes.{node}.p95_ms', stats['p95_ms'], previous['p95_ms'], True))
+    for name, current, previous, lower_is_better in pairs:
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        # Sub-millisecond nodes swing by 100% on noise alone; require a real absolute slowdown too.
+        worse = change > tolerance and current - previous >= min_delta_ms if lower_is_better else change < -tolerance
+        print(f"{name}: {previous} -> {current} ({change:+.1%}){'  REGRESSION' if worse else ''}", file=sys.stderr)
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load-test the full LangGraph workflow against an in-process fake backend and stub Gemini.')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mode', choices=['async', 'sync'], default='async')
+    parser.add_argument('--languages', default=','.join(LANGUAGES))
+    parser.add_argument('--facilities', type=int, default=200)
+    parser.add_argument('--backend-latency', type=float, default=0.02, help='seconds per backend call')
+    parser.add_argument('--backend-jitter', type=float, default=0.3)
+    parser.add_argument('--backend-error-rate', type=float, default=0.0)
+    parser.add_argument('--gemini-fast-delay', type=float, default=0.3)
+    parser.add_argument('--gemini-smart-delay', type=float, default=1.2)
+    parser.add_argument('--gemini-jitter', type=float, default=0.3)
+    parser.add_argument('--gemini-failure-rate', type=float, default=0.0)
+    parser.add_argument('--gemini-concurrency', type=int, default=0, help='admission-controlled model slots; 0 calls the model unbounded')
+    parser.add_argument('--gemini-queue', type=int, default=64)
+    parser.add_argument('--gemini-queue-wait-ms', type=int, default=1500)
+    parser.add_argument('--rag-delay', type=float, default=0.005)
+    parser.add_argument('--deadline-ms', type=int, default=graph.TRIAGE_DEADLINE_MS)
+    parser.add_argument('--fast-first', action='store_true')
+    parser.add_argument('--no-facility-index', dest='facility_index', action='store_false')
+    parser.add_argument('--no-eligibility-cache', dest='eligibility_cache', action='store_false')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='', help='write the JSON report here')
+    parser.add_argument('--baseline', default='', help='earlier JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.1, help='relative slowdown tolerated before exiting non-zero')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='ignore latency changes smaller than this')
+    args = parser.parse_args()
+
+    report = run(args)
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            fp.write(output)
+    print(output)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fp:
+            regressions = compare(report, json.load(fp), args.max_regression, args.min_delta_ms)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
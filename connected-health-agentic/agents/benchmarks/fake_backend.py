@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from orchestration.facilities import FacilityIndex
+
+# District centres taken from backend/prisma/seed.ts; synthetic facilities are scattered around them.
+DISTRICTS: Dict[str, Tuple[float, float]] = {
+    'Islamabad': (33.6938, 73.0652),
+    'Rawalpindi': (33.5973, 73.0481),
+    'Peshawar': (34.0151, 71.5805),
+    'Quetta': (30.1798, 66.9750),
+    'Karachi': (24.8615, 67.0099),
+    'Hyderabad': (25.3960, 68.3578),
+    'Multan': (30.1978, 71.4697),
+    'Faisalabad': (31.3342, 73.4197),
+    'Gilgit': (35.9179, 74.3080),
+    'Mardan': (34.3419, 71.8828),
+}
+SERVICES = ['emergency', 'pediatrics', 'maternal', 'medicine', 'surgery', 'trauma', 'vaccination', 'family-planning', 'basic-care']
+OPENING_HOURS = [{'daily': '24/7'}, {'daily': '08:00-20:00'}, {'daily': '08:00-16:00'}, {'daily': '09:00-15:00'}]
+PROGRAMS = [
+    {'id': 1, 'name': 'Sehat Card Plus', 'eligibilityRules': {'minAge': 0, 'gender': 'any', 'requiresSehatCard': True}},
+    {'id': 2, 'name': 'Maternal Nutrition Support', 'eligibilityRules': {'minAge': 15, 'gender': 'female', 'requiresSehatCard': False}},
+    {'id': 3, 'name': 'Childhood Immunization Incentive', 'eligibilityRules': {'minAge': 0, 'gender': 'any', 'requiresSehatCard': False}},
+    {'id': 4, 'name': 'Chronic Disease Follow-up', 'eligibilityRules': {'minAge': 30, 'gender': 'any', 'requiresSehatCard': False}},
+    {'id': 5, 'name': 'Adolescent Health Awareness', 'eligibilityRules': {'minAge': 10, 'gender': 'any', 'requiresSehatCard': False}},
+]
+
+
+def synthetic_facilities(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    names = list(DISTRICTS)
+    facilities = []
+    for facility_id in range(1, count + 1):
+        district = names[(facility_id - 1) % len(names)]
+        lat, lng = DISTRICTS[district]
+        kind = rng.choice(['Hospital', 'RHC', 'BHU'])
+        facilities.append({
+            'id': facility_id,
+            'name': f'{kind} {district} {facility_id}',
+            'type': kind,
+            'district': district,
+            'tehsil': district,
+            'lat': round(lat + rng.uniform(-0.4, 0.4), 4),
+            'lng': round(lng + rng.uniform(-0.4, 0.4), 4),
+            'services': rng.sample(SERVICES, rng.randint(2, 4)),
+            'openingHours': rng.choice(OPENING_HOURS),
+            'stockAlerts': ['ORS sachets'] if rng.random() < 0.2 else [],
+        })
+    return facilities
+
+
+def evaluate_programs(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Same rules as backend/src/routes/programs.ts.
+    age = payload['age']
+    gender = str(payload.get('gender', ''))
+    card = bool(payload.get('hasMockSehatCard'))
+    evaluations = []
+    for program in PROGRAMS:
+        rules = program['eligibilityRules']
+        min_age = rules.get('minAge', 0)
+        target = rules.get('gender')
+        requires_card = bool(rules.get('requiresSehatCard'))
+        likely = age >= min_age and (not target or target == 'any' or target.lower() == gender.lower()) and (not requires_card or card)
+        reasons = [f"Age {age} {'meets' if age >= min_age else 'does not meet'} minimum {min_age}"]
+        if target and target != 'any':
+            reasons.append(f'Target gender: {target}')
+        if requires_card:
+            reasons.append(f"Sehat Card required: {'provided' if card else 'missing (placeholder CNIC allowed)'}")
+        if payload.get('district'):
+            reasons.append(f"District provided: {payload['district']}")
+        evaluations.append({
+            'programId': program['id'],
+            'name': program['name'],
+            'likelyEligible': likely,
+            'reason': '; '.join(reasons),
+            'mockApplication': {
+                'instructions': 'Provide placeholder CNIC 12345-xxxxxxx-x and basic household information to enroll.',
+                'contact': 'Visit nearest Sehat Sahulat facilitation center or apply via LHW tablet.',
+            },
+        })
+    return evaluations
+
+
+# In-process stand-in for the Express backend, usable as both a sync and an async httpx transport.
+class FakeBackend(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        facilities: int = 200,
+        latency: float = 0.02,
+        route_latency: Dict[str, float] | None = None,
+        jitter: float = 0.3,
+        error_rate: float = 0.0,
+        seed: int = 7,
+    ) -> None:
+        self.latency = latency
+        self.route_latency = route_latency or {}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.facilities = synthetic_facilities(facilities, seed=seed)
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self._index = FacilityIndex(self.facilities)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._reminder_id = 0
+        catalog = json.dumps(PROGRAMS, sort_keys=True).encode('utf-8')
+        self.catalog_version = hashlib.sha256(catalog).hexdigest()[:16]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        delay, fail = self._plan(request)
+        if delay > 0:
+            time.sleep(delay)
+        return self._respond(request, fail)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay, fail = self._plan(request)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._respond(request, fail)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'calls': dict(self.calls), 'errors': dict(self.errors)}
+
+    def _route(self, request: httpx.Request) -> str:
+        return f'{request.method} {request.url.path}'
+
+    def _plan(self, request: httpx.Request) -> Tuple[float, bool]:
+        route = self._route(request)
+        with self._lock:
+            self.calls[route] += 1
+            delay = self.route_latency.get(route, self.latency)
+            if self.jitter:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors[route] += 1
+        return delay, fail
+
+    def _respond(self, request: httpx.Request, fail: bool) -> httpx.Response:
+        if fail:
+            return httpx.Response(503, json={'error': 'injected failure'})
+        route = self._route(request)
+        body = json.loads(request.content) if request.content else {}
+        if route == 'GET /api/system/health':
+            return httpx.Response(200, json={'status': 'ok', 'degraded_mode': False})
+        if route == 'POST /api/facilities/search':
+            return httpx.Response(200, json=self._index.search(body))
+        if route == 'GET /api/facilities/sync':
+            return httpx.Response(200, json={
+                'syncedAt': datetime.utcnow().isoformat() + 'Z',
+                'full': 'since' not in request.url.params,
+                'ids': [facility['id'] for facility in self.facilities],
+                'facilities': [] if 'since' in request.url.params else self.facilities,
+            })
+        if route == 'POST /api/programs/eligibility':
+            return httpx.Response(200, json=evaluate_programs(body))
+        if route == 'GET /api/programs/catalog':
+            return httpx.Response(200, json={'version': self.catalog_version, 'programs': PROGRAMS, 'districts': list(DISTRICTS)})
+        if route == 'POST /api/reminders':
+            with self._lock:
+                self._reminder_id += 1
+                reminder_id = self._reminder_id
+            return httpx.Response(201, json={**body, 'id': reminder_id, 'status': 'scheduled'})
+        if request.method == 'POST' and route.split(' ')[1] in {'/api/interactions', '/api/interactions/bulk', '/api/mcp/logs/bulk'}:
+            return httpx.Response(201, json={'count': len(body.get('items', [body]))})
+        return httpx.Response(404, json={'error': f'no fake route for {route}'})
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from .stubs import percentile
+
+QUERIES = [
+    'Bachay ko bukhar hai',
+    'fever in children with rash',
+    'pregnant woman bleeding',
+    'vaccine schedule for newborn',
+    'saans mein takleef',
+    'flour subsidy BISP card',
+]
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'knowledge_base.json')
+
+
+def rss_mb(field: str = 'VmRSS') -> float:
+    # RssAnon is private to the worker; RssFile includes mapped pages shared through the page cache.
+    with open('/proc/self/status', 'r', encoding='utf-8') as fp:
+        for line in fp:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def synthesize_corpus(size: int, target_dir: str) -> str:
+    with open(DATA_PATH, 'r', encoding='utf-8') as fp:
+        records = json.load(fp)
+    corpus = []
+    for index in range(size):
+        record = dict(records[index % len(records)])
+        record['id'] = f"{record['id']}-{index}"
+        record['content'] = f"{record['content']} (variant {index})"
+        corpus.append(record)
+    path = os.path.join(target_dir, 'knowledge_base.json')
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(corpus, fp)
+    return path
+
+
+def worker(backend: str, queries: int) -> Dict[str, Any]:
+    from orchestration.clients import knowledge_base
+
+    baseline = rss_mb()
+    baseline_anon = rss_mb('RssAnon')
+    started = time.perf_counter()
+    kb = knowledge_base()
+    init_ms = (time.perf_counter() - started) * 1000
+    kb.query(QUERIES[0])
+    after_init = rss_mb()
+    after_init_anon = rss_mb('RssAnon')
+    latencies: List[float] = []
+    for index in range(queries):
+        started = time.perf_counter()
+        kb.query(QUERIES[index % len(QUERIES)], top_k=4)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        'backend': backend,
+        'init_ms': round(init_ms, 1),
+        'rss_mb_before': round(baseline, 1),
+        'rss_mb_after': round(rss_mb(), 1),
+        'rss_mb_knowledge_base': round(after_init - baseline, 1),
+        'private_mb_knowledge_base': round(after_init_anon - baseline_anon, 1),
+        'query_p50_ms': round(percentile(latencies, 50), 3),
+        'query_p95_ms': round(percentile(latencies, 95), 3),
+        'query_p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def run_backend(backend: str, args: argparse.Namespace, data_dir: str, store_dir: str) -> Dict[str, Any]:
+    env = dict(
+        os.environ,
+        RAG_BACKEND='numpy' if backend.startswith('numpy') else 'chroma',
+        VECTOR_QUANTIZE='int8' if backend == 'numpy-int8' else 'float32',
+        KNOWLEDGE_DATA_DIR=data_dir,
+        CHROMA_PATH=os.path.join(store_dir, 'chroma'),
+        VECTOR_INDEX_PATH=os.path.join(store_dir, backend),
+    )
+    command = [sys.executable, '-m', 'benchmarks.retrieval', '--worker', backend, '--queries', str(args.queries)]
+    cwd = os.path.join(os.path.dirname(__file__), '..')
+    # The first run builds the store; the second measures a warm worker attaching to it.
+    subprocess.run(command, env=env, cwd=cwd, check=True, capture_output=True)
+    output = subprocess.run(command, env=env, cwd=cwd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare Chroma and memory-mapped NumPy retrieval per worker.')
+    parser.add_argument('--backends', default='chroma,numpy,numpy-int8')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--corpus-size', type=int, default=0, help='synthesize a corpus of this many records')
+    parser.add_argument('--output', default='')
+    parser.add_argument('--worker', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.queries)))
+        return
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        data_dir = os.path.dirname(os.path.abspath(DATA_PATH))
+        if args.corpus_size:
+            data_dir = os.path.join(store_dir, 'data')
+            os.makedirs(data_dir)
+            synthesize_corpus(args.corpus_size, data_dir)
+        results = [run_backend(backend, args, data_dir, store_dir) for backend in args.backends.split(',')]
+
+    report = json.dumps({'corpus_size': args.corpus_size or 'default', 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            fp.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
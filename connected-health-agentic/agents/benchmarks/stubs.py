@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from orchestration.clients import GeminiClient
+
+DEFAULT_RESPONSES: Dict[str, Dict[str, Any]] = {
+    'fast': {
+        'level': 'clinic',
+        'reason': 'Stub fast-model assessment.',
+        'recommendedUrgency': 'Visit a clinic within 24 hours.',
+        'confidence': 0.9,
+    },
+    'smart': {
+        'level': 'clinic',
+        'reason': 'Stub smart-model assessment.',
+        'recommendedUrgency': 'Visit a clinic within 24 hours.',
+        'confidence': 0.95,
+    },
+}
+
+
+class StubGeminiClient(GeminiClient):
+    def __init__(
+        self,
+        delays: Dict[str, float] | None = None,
+        responses: Dict[str, Any] | None = None,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+        cache: Any = None,
+        admission: Any = None,
+    ) -> None:
+        super().__init__(cache=cache, admission=admission)
+        self.client = object()
+        self.delays = {'fast': 0.0, 'smart': 0.0, **(delays or {})}
+        self.responses: Dict[str, Any] = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls: Counter[str] = Counter()
+        self._random = random.Random(seed)
+
+    def available(self) -> bool:
+        return True
+
+    def complete(self, prompt: str, model_variant: str = 'fast') -> str | None:
+        self.calls[model_variant] += 1
+        delay = self.delays.get(model_variant, 0.0)
+        if self.jitter:
+            delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self._random.random() < self.failure_rate:
+            raise RuntimeError(f'stub {model_variant} model failure')
+        response = self.responses.get(model_variant)
+        if callable(response):
+            response = response(prompt)
+        if isinstance(response, (dict, list)):
+            return json.dumps(response)
+        return response
+
+
+class StubKnowledgeBase:
+    def __init__(self, documents: List[str] | None = None, delay: float = 0.0) -> None:
+        self.documents = documents or []
+        self.delay = delay
+
+    def query(self, text: str, top_k: int = 4) -> List[Dict[str, Any]]:
+        if self.delay:
+            time.sleep(self.delay)
+        return [
+            {'id': f'stub-{index}', 'document': document, 'metadata': {}}
+            for index, document in enumerate(self.documents[:top_k])
+        ]
+
+
+class NullBackendClient:
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return None
+        return call
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
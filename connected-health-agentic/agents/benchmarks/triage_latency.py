@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from orchestration import graph
+from orchestration.cache import ResponseCache
+
+from .stubs import NullBackendClient, StubGeminiClient, StubKnowledgeBase, percentile
+
+MESSAGES = [
+    'Bachay ko bukhar hai, Sehat Card hai, kahan jaun?',
+    'My child has had a fever for three days',
+    'saans mein takleef ho rahi hai',
+    'Pregnant woman with bleeding and severe headache',
+    'Mild cough since yesterday',
+]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub = StubGeminiClient(
+        delays={'fast': args.fast_delay, 'smart': args.smart_delay},
+        responses={'fast': fast_response(args.fast_confidence)},
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        cache=ResponseCache() if args.cache else None,
+    )
+    graph.gemini_client = lambda: stub
+    graph.knowledge_base = lambda: StubKnowledgeBase(['Stub guidance document.'])
+    graph.backend_client = lambda: NullBackendClient()
+    graph.TRIAGE_DEADLINE_MS = args.deadline_ms
+    graph.TRIAGE_FAST_FIRST = args.fast_first
+
+    latencies: List[float] = []
+    degraded = 0
+    for index in range(args.requests):
+        state: Dict[str, Any] = {
+            'messages': [{'sender': 'user', 'content': MESSAGES[index % len(MESSAGES)]}],
+            'degraded_mode': False,
+        }
+        started = time.perf_counter()
+        result = graph.triage_agent(state)
+        latencies.append((time.perf_counter() - started) * 1000)
+        degraded += bool(result.get('degraded_mode'))
+
+    return {
+        'requests': args.requests,
+        'deadline_ms': args.deadline_ms,
+        'fast_first': args.fast_first,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'degraded_share': round(degraded / args.requests, 3),
+        'model_calls': dict(stub.calls),
+    }
+
+
+def fast_response(confidence: float) -> Dict[str, Any]:
+    return {
+        'level': 'clinic',
+        'reason': 'Stub fast-model assessment.',
+        'recommendedUrgency': 'Visit a clinic within 24 hours.',
+        'confidence': confidence,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure triage_agent tail latency against a stub Gemini client.')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--fast-delay', type=float, default=0.2, help='seconds per fast-model call')
+    parser.add_argument('--smart-delay', type=float, default=1.0, help='seconds per smart-model call')
+    parser.add_argument('--jitter', type=float, default=0.5, help='relative +/- jitter applied to each delay')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--fast-confidence', type=float, default=0.9)
+    parser.add_argument('--deadline-ms', type=int, default=graph.TRIAGE_DEADLINE_MS)
+    parser.add_argument('--fast-first', action='store_true')
+    parser.add_argument('--cache', action='store_true', help='enable the in-memory response cache')
+    parser.add_argument('--seed', type=int, default=7)
+    print(json.dumps(run(parser.parse_args()), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,106 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Literal
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Literal, Tuple
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+try:  # pragma: no cover - optional dependency import guard
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
 
-from orchestration.graph import build_graph
+from orchestration.batch import (
+    BATCH_CONCURRENCY,
+    BATCH_RETRIEVAL_CHUNK,
+    BatchError,
+    parse_cases,
+    prefetch_retrieval,
+    rule_pool,
+    rule_triage_many,
+)
+from orchestration.clients import (
+    async_backend_client,
+    backend_client,
+    backend_health,
+    eligibility_cache,
+    facility_directory,
+    gemini_admission,
+    gemini_client,
+    gemini_response_cache,
+    hotspot_detector,
+    knowledge_base,
+    log_shipper,
+    metrics_registry,
+    session_store,
+)
+from orchestration.graph import build_graph, finalize_agent
+from orchestration.rules import triage_rule_engine
 from orchestration.state import ConversationState
+from orchestration.warmup import WarmUp
+
+ASYNC_GRAPH = os.getenv('AGENTS_ASYNC_GRAPH', 'false').lower() == 'true'
+AGENTS_WARMUP = os.getenv('AGENTS_WARMUP', 'true').lower() == 'true'
+WARMUP_WAIT_TIMEOUT = float(os.getenv('WARMUP_WAIT_TIMEOUT', '120'))
+WARMUP_RETRY_DELAY = float(os.getenv('WARMUP_RETRY_DELAY', '1'))
+WARMUP_RETRY_MAX_DELAY = float(os.getenv('WARMUP_RETRY_MAX_DELAY', '60'))
 
 app = FastAPI(title='Connected Health LangGraph Orchestrator')
-workflow = build_graph().compile()
-MAX_STEPS = 8
+MAX_STEPS = 10
+STREAM_EVENTS: Dict[str, Tuple[str, List[str]]] = {
+    'screen': ('triage', ['triage_result']),
+    'triage_agent': ('triage', ['triage_result', 'degraded_mode']),
+    'facility_finder': ('facilities', ['facility_recommendations']),
+    'program_matcher': ('programs', ['program_eligibility']),
+    'follow_up': ('reminders', ['reminders']),
+    'analytics': ('analytics', ['analytics_flags']),
+    'finalize': ('reply', ['reply', 'degraded_mode']),
+}
+# Routing flags, the raw incoming message and retrieval or batch plumbing are internal channels and never leave the service.
+PUBLIC_STATE_FIELDS = (
+    'session_id',
+    'user_role',
+    'language',
+    'messages',
+    'conversation_summary',
+    'turns',
+    'patient_context',
+    'triage_result',
+    'facility_recommendations',
+    'program_eligibility',
+    'reminders',
+    'analytics_flags',
+    'degraded_mode',
+    'done',
+)
+# What the Express backend reads; the message history, patient context and routing flags stay server-side unless asked for.
+DEFAULT_STATE_FIELDS = (
+    'triage_result',
+    'facility_recommendations',
+    'program_eligibility',
+    'reminders',
+    'analytics_flags',
+    'degraded_mode',
+)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
 
 
 class RunRequest(BaseModel):
@@ -22,14 +111,61 @@ class RunRequest(BaseModel):
     patient_context: Dict[str, object] = Field(default_factory=dict, alias='patient_context')
 
 
-@app.post('/run')
-def run_workflow(payload: RunRequest):
+@lru_cache(maxsize=1)
+def compiled_workflow():
+    return build_graph(async_mode=ASYNC_GRAPH).compile()
+
+
+def warm_knowledge_base() -> None:
+    # A hybrid store answers short queries lexically; query its vector side so the embedding model is loaded and run once.
+    kb = knowledge_base()
+    getattr(kb, 'vector', kb).query('fever and cough for three days', top_k=1)
+
+
+warm_up = WarmUp([
+    ('graph', compiled_workflow),
+    ('rules', triage_rule_engine),
+    ('sessions', session_store),
+    ('gemini', gemini_client),
+    ('hotspots', hotspot_detector),
+    ('knowledge_base', warm_knowledge_base),
+] if AGENTS_WARMUP else [], retry_delay=WARMUP_RETRY_DELAY, max_retry_delay=WARMUP_RETRY_MAX_DELAY)
+
+
+async def wait_until_warm() -> None:
+    if not warm_up.finished:
+        await run_in_threadpool(warm_up.wait, WARMUP_WAIT_TIMEOUT)
+
+
+# Lock and number of turns holding or waiting for it, per session; an entry is dropped once nobody needs it.
+_session_locks: Dict[str, List[Any]] = {}
+
+
+@asynccontextmanager
+async def session_turn(session_id: str) -> AsyncIterator[None]:
+    # Turns of one session run one after another so each loads the history the previous one saved.
+    entry = _session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _session_locks[session_id]
+
+
+def build_initial_state(payload: RunRequest, session: Dict[str, Any] | None = None) -> ConversationState:
+    session = session or {}
     initial_state: ConversationState = {
         'session_id': payload.session_id,
         'user_role': payload.user_role,
         'language': payload.language,
-        'messages': [],
-        'patient_context': payload.patient_context,
+        'messages': list(session.get('messages', [])),
+        'conversation_summary': session.get('conversation_summary', ''),
+        'turns': session.get('turns', 0),
+        # Clients only need to send the fields that changed since the last turn.
+        'patient_context': {**session.get('patient_context', {}), **payload.patient_context},
         'triage_result': None,
         'program_eligibility': [],
         'facility_recommendations': [],
@@ -43,21 +179,280 @@ def run_workflow(payload: RunRequest):
             'timestamp': datetime.utcnow().isoformat() + 'Z',
         },
     }
+    return initial_state
 
-    try:
-        result = workflow.invoke(initial_state, config={'recursion_limit': MAX_STEPS})
-    except Exception as error:
-        raise HTTPException(status_code=500, detail=str(error)) from error
-
-    reply = result.get('reply')
-    if not reply and result.get('messages'):
-        reply = result['messages'][-1]['content']
-    return {
+
+def state_fields(fields: str | None) -> Tuple[str, ...]:
+    # 'reply' is always returned at the top level.
+    if fields is None:
+        return DEFAULT_STATE_FIELDS
+    if fields.strip() in {'all', '*'}:
+        return PUBLIC_STATE_FIELDS
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip() and field.strip() != 'reply'))
+    unknown = [field for field in selected if field not in PUBLIC_STATE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown state fields: {', '.join(unknown)}")
+    return selected
+
+
+@app.post('/run', response_class=FastJSONResponse)
+async def run_workflow(payload: RunRequest, fields: str | None = None):
+    selected = state_fields(fields)
+    await wait_until_warm()
+    with metrics_registry().request(payload.language, payload.user_role) as outcome:
+        async with session_turn(payload.session_id):
+            session = await run_in_threadpool(session_store().load, payload.session_id)
+            initial_state = build_initial_state(payload, session)
+            try:
+                if ASYNC_GRAPH:
+                    result = await compiled_workflow().ainvoke(initial_state, config={'recursion_limit': MAX_STEPS})
+                else:
+                    result = await run_in_threadpool(compiled_workflow().invoke, initial_state, config={'recursion_limit': MAX_STEPS})
+            except Exception as error:
+                raise HTTPException(status_code=500, detail=str(error)) from error
+            outcome['degraded'] = bool(result.get('degraded_mode'))
+
+            reply = result.get('reply')
+            if not reply and result.get('messages'):
+                reply = result['messages'][-1]['content']
+            session = await run_in_threadpool(session_store().save, payload.session_id, result)
+    result.update(session)
+    result = {field: result[field] for field in selected if field in result}
+    return FastJSONResponse({
         'reply': reply,
         'state': result,
-    }
+    })
+
+
+@app.post('/run/stream')
+async def run_workflow_stream(payload: RunRequest):
+    await wait_until_warm()
+    return StreamingResponse(
+        stream_events(payload),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def stream_events(payload: RunRequest) -> AsyncIterator[str]:
+    # Loading inside the generator ties the turn lock to the stream, which releases it on completion or disconnect.
+    with metrics_registry().request(payload.language, payload.user_role) as outcome:
+        try:
+            async with session_turn(payload.session_id):
+                session = await run_in_threadpool(session_store().load, payload.session_id)
+                initial_state = build_initial_state(payload, session)
+                async for update in compiled_workflow().astream(initial_state, config={'recursion_limit': MAX_STEPS}, stream_mode='updates'):
+                    for node, output in update.items():
+                        if node not in STREAM_EVENTS or not isinstance(output, dict):
+                            continue
+                        outcome['degraded'] = outcome['degraded'] or bool(output.get('degraded_mode'))
+                        if node == 'finalize':
+                            await run_in_threadpool(session_store().save, initial_state['session_id'], output)
+                        event, fields = STREAM_EVENTS[node]
+                        data = {field: output[field] for field in fields if field in output}
+                        # Branches with nothing to do return no update; there is nothing to tell the client.
+                        if data:
+                            yield format_sse(event, data)
+        except Exception as error:
+            outcome['error'] = True
+            yield format_sse('error', {'detail': str(error)})
+            return
+    yield format_sse('done', {})
+
+
+@app.post('/run/batch')
+async def run_workflow_batch(request: Request, fields: str | None = None):
+    selected = state_fields(fields)
+    body = (await request.body()).decode('utf-8-sig')
+    try:
+        cases = parse_cases(body, request.headers.get('content-type', ''))
+    except BatchError as error:
+        raise HTTPException(status_code=413, detail=str(error)) from error
+    await wait_until_warm()
+    return StreamingResponse(batch_results(cases, selected), media_type='application/x-ndjson')
+
+
+async def batch_results(cases: List[Dict[str, Any]], selected: Tuple[str, ...]) -> AsyncIterator[bytes]:
+    # Cases are independent: no session memory is read or written, and each gets its own id unless one is given.
+    prefix = uuid.uuid4().hex[:8]
+    parsed: List[Tuple[int, RunRequest | None, str | None]] = []
+    for index, case in enumerate(cases):
+        if 'error' in case:
+            parsed.append((index, None, case['error']))
+            continue
+        try:
+            parsed.append((index, RunRequest(**{'session_id': f'batch-{prefix}-{index}', 'user_role': 'lhw', **case}), None))
+        except ValidationError as error:
+            parsed.append((index, None, str(error)))
+
+    degraded = await run_in_threadpool(lambda: backend_health().degraded() or not gemini_client().available())
+    if degraded:
+        async for line in rule_batch_results(parsed, selected):
+            yield line
+        return
+
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max(BATCH_CONCURRENCY, 1))
+    started: List[asyncio.Future] = []
+
+    async def produce() -> None:
+        try:
+            for start in range(0, len(parsed), BATCH_RETRIEVAL_CHUNK):
+                chunk = parsed[start:start + BATCH_RETRIEVAL_CHUNK]
+                # Red-flag messages never reach retrieval, so only the rest are embedded, in a single query.
+                needs_rag = [
+                    (index, payload) for index, payload, _ in chunk
+                    if payload is not None and not triage_rule_engine().scan(payload.message)[0]
+                ]
+                try:
+                    matches = await run_in_threadpool(prefetch_retrieval, knowledge_base(), [payload.message for _, payload in needs_rag])
+                except Exception as error:
+                    # Each case then retrieves on its own inside the graph and reports its own error.
+                    print('batch_retrieval_error', error)
+                    matches = []
+                prefetched = {index: found for (index, _), found in zip(needs_rag, matches)}
+                for index, payload, error in chunk:
+                    future = asyncio.ensure_future(run_batch_case(index, payload, error, prefetched.get(index), selected))
+                    started.append(future)
+                    await pending.put(future)
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        # The queue bound is the number of cases in flight; results go out in upload order as soon as the head is done.
+        while (future := await pending.get()) is not None:
+            yield dumps(await future) + b'\n'
+        await producer
+    finally:
+        # A client that disconnects cancels this generator; nobody will read the remaining cases, so stop them.
+        producer.cancel()
+        while not pending.empty():
+            pending.get_nowait()
+        for future in started:
+            future.cancel()
+
+
+async def run_batch_case(
+    index: int,
+    payload: RunRequest | None,
+    error: str | None,
+    rag_matches: List[Dict[str, Any]] | None,
+    selected: Tuple[str, ...],
+) -> Dict[str, Any]:
+    if payload is None:
+        return {'index': index, 'error': error}
+    initial_state = build_initial_state(payload)
+    initial_state['batch'] = True
+    if rag_matches is not None:
+        initial_state['rag_matches'] = rag_matches
+    try:
+        if ASYNC_GRAPH:
+            result = await compiled_workflow().ainvoke(initial_state, config={'recursion_limit': MAX_STEPS})
+        else:
+            result = await run_in_threadpool(compiled_workflow().invoke, initial_state, config={'recursion_limit': MAX_STEPS})
+    except Exception as failure:
+        return {'index': index, 'session_id': payload.session_id, 'error': str(failure)}
+    return batch_line(index, payload, result, selected)
+
+
+async def rule_batch_results(
+    parsed: List[Tuple[int, RunRequest | None, str | None]],
+    selected: Tuple[str, ...],
+) -> AsyncIterator[bytes]:
+    # Backend or model unavailable: every case would end on the rule path anyway, so skip the graph and
+    # spread the rule engine across worker processes.
+    valid = [(index, payload) for index, payload, _ in parsed if payload is not None]
+    results = await run_in_threadpool(rule_triage_many, [payload.message for _, payload in valid], rule_pool())
+    by_index = dict(zip((index for index, _ in valid), results))
+    for index, payload, error in parsed:
+        if payload is None:
+            yield dumps({'index': index, 'error': error}) + b'\n'
+            continue
+        state = build_initial_state(payload)
+        state['messages'].append(state.pop('incoming_message'))
+        state['triage_result'] = by_index[index]
+        state['degraded_mode'] = True
+        backend_client().log_interaction({
+            'agentName': 'triage',
+            'inputSummary': payload.message[:200],
+            'outputSummary': by_index[index].get('reason', '')[:200],
+            'triageLevel': by_index[index].get('level', 'self-care'),
+        })
+        yield dumps(batch_line(index, payload, finalize_agent(state), selected)) + b'\n'
+
+
+def batch_line(index: int, payload: RunRequest, result: Dict[str, Any], selected: Tuple[str, ...]) -> Dict[str, Any]:
+    state = {field: result[field] for field in selected if field in result}
+    return {'index': index, 'session_id': payload.session_id, 'reply': result.get('reply'), 'state': state}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
 
 
 @app.get('/healthz')
 def healthcheck():
     return {'status': 'ok'}
+
+
+@app.get('/readyz')
+def readiness():
+    # Liveness stays on /healthz; this only turns 200 once the graph, models and stores are loaded.
+    status = warm_up.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(metrics_registry().render(), media_type='text/plain; version=0.0.4')
+
+
+@app.get('/metrics/traces')
+def metrics_traces(limit: int = 20):
+    return {'sample_rate': metrics_registry().trace_sample_rate, 'traces': metrics_registry().traces(limit)}
+
+
+@app.get('/analytics/hotspots')
+def analytics_hotspots(limit: int = 50):
+    detector = hotspot_detector()
+    if detector is None:
+        return FastJSONResponse({'enabled': False, 'hotspots': []})
+    return FastJSONResponse({'enabled': True, 'windowHours': detector.window_hours, 'hotspots': detector.hotspots(limit)})
+
+
+def runtime_gauges():
+    # Only report components that are already running; building one here would start its background thread.
+    if backend_health.cache_info().currsize:
+        yield 'agents_backend_circuit_open', {}, float(backend_health().breaker.state != 'closed')
+    sources = [('sessions', session_store), ('gemini_cache', gemini_response_cache), ('eligibility', eligibility_cache)]
+    sources += [('gemini_admission', gemini_admission)]
+    sources += [('log_shipper', log_shipper), ('facility_index', facility_directory), ('hotspots', hotspot_detector)]
+    for component, factory in sources:
+        if not factory.cache_info().currsize or factory() is None:
+            continue
+        for key, value in factory().stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield 'agents_component_stat', {'component': component, 'stat': key}, float(value)
+
+
+metrics_registry().register_collector(runtime_gauges)
+
+
+@app.on_event('startup')
+async def start_background_sync():
+    # Loads the program catalog and pre-warms eligibility entries before the first conversation needs them.
+    eligibility_cache()
+    warm_up.start()
+
+
+@app.on_event('shutdown')
+async def close_clients():
+    warm_up.stop()
+    if ASYNC_GRAPH:
+        await async_backend_client().aclose()
+    if hotspot_detector.cache_info().currsize and hotspot_detector() is not None:
+        hotspot_detector().stop()
+    if rule_pool.cache_info().currsize and rule_pool() is not None:
+        rule_pool().shutdown(wait=False)
+    if log_shipper.cache_info().currsize:
+        await run_in_threadpool(log_shipper().stop)
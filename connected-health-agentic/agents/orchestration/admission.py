@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+# Lower is served first.
+EMERGENCY = 0
+PRIORITY_ROLE = 1
+ROUTINE = 2
+BATCH = 3
+PRIORITY_NAMES = {EMERGENCY: 'emergency', PRIORITY_ROLE: 'priority-role', ROUTINE: 'routine', BATCH: 'batch'}
+
+WAITING = 'waiting'
+GRANTED = 'granted'
+SHED = 'shed'
+
+
+class AdmissionShed(RuntimeError):
+    def __init__(self, reason: str, priority: int) -> None:
+        super().__init__(f'model call shed ({reason}) for {PRIORITY_NAMES.get(priority, priority)} request')
+        self.reason = reason
+        self.priority = priority
+
+
+class _Waiter:
+    __slots__ = ('priority', 'sequence', 'state', 'event')
+
+    def __init__(self, priority: int, sequence: int) -> None:
+        self.priority = priority
+        self.sequence = sequence
+        self.state = WAITING
+        self.event = threading.Event()
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue: int = 64,
+        max_wait: float = 1.5,
+        min_concurrent: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.min_concurrent = max(1, min(min_concurrent, self.max_concurrent))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limit = self.max_concurrent
+        self._in_flight = 0
+        self._waiting = 0
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._counters: Dict[str, int] = {
+            'admitted': 0,
+            'queued': 0,
+            'shed_queue_full': 0,
+            'shed_wait': 0,
+            'preempted': 0,
+            'rate_limited': 0,
+        }
+
+    @contextmanager
+    def slot(self, priority: int = ROUTINE, deadline: float | None = None) -> Iterator[float]:
+        # Yields the seconds spent queued; raises AdmissionShed instead of starting a call that cannot finish in time.
+        waited = self._acquire(priority, deadline)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    def record_rate_limited(self) -> None:
+        # Upstream quota hit: halve the pool so queued work waits here instead of failing upstream.
+        with self._lock:
+            self._limit = max(self.min_concurrent, self._limit // 2)
+            self._counters['rate_limited'] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._limit < self.max_concurrent:
+                self._limit += 1
+                self._grant_waiting()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = [waiter for waiter in self._queue if waiter.state == WAITING]
+            return {
+                **self._counters,
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'limit': self._limit,
+                **{f'queue_depth_{name}': sum(waiter.priority == level for waiter in waiting) for level, name in PRIORITY_NAMES.items()},
+            }
+
+    def _acquire(self, priority: int, deadline: float | None) -> float:
+        started = self._clock()
+        budget = self.max_wait if deadline is None else min(self.max_wait, deadline - started)
+        with self._lock:
+            if deadline is not None and deadline <= started:
+                self._counters['shed_wait'] += 1
+                raise AdmissionShed('deadline passed', priority)
+            if self._in_flight < self._limit and not self._waiting:
+                self._in_flight += 1
+                self._counters['admitted'] += 1
+                return 0.0
+            if budget <= 0:
+                self._counters['shed_wait'] += 1
+                raise AdmissionShed('wait budget exhausted', priority)
+            if self._waiting >= self.max_queue:
+                self._make_room(priority)
+            waiter = _Waiter(priority, next(self._sequence))
+            heapq.heappush(self._queue, waiter)
+            self._waiting += 1
+            self._counters['queued'] += 1
+        waiter.event.wait(budget)
+        with self._lock:
+            if waiter.state == WAITING:
+                # Timed out before a slot freed up; the entry is skipped when it reaches the top of the heap.
+                waiter.state = SHED
+                self._waiting -= 1
+                self._counters['shed_wait'] += 1
+                self._compact()
+                raise AdmissionShed('queue wait exceeded budget', priority)
+            if waiter.state == SHED:
+                raise AdmissionShed('preempted by a higher-priority request', priority)
+        return self._clock() - started
+
+    def _make_room(self, priority: int) -> None:
+        # Caller holds the lock. A full queue drops its least urgent, newest entry, unless the newcomer ranks no higher.
+        victim = max((waiter for waiter in self._queue if waiter.state == WAITING), default=None)
+        if victim is None or victim.priority <= priority:
+            self._counters['shed_queue_full'] += 1
+            raise AdmissionShed('queue full', priority)
+        victim.state = SHED
+        victim.event.set()
+        self._waiting -= 1
+        self._counters['preempted'] += 1
+        self._compact()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._grant_waiting()
+
+    def _grant_waiting(self) -> None:
+        # Caller holds the lock.
+        while self._queue and self._in_flight < self._limit:
+            waiter = heapq.heappop(self._queue)
+            if waiter.state != WAITING:
+                continue
+            waiter.state = GRANTED
+            self._waiting -= 1
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+            waiter.event.set()
+
+    def _compact(self) -> None:
+        # Caller holds the lock. Shed entries are normally popped lazily; rebuild if they pile up while no slot frees.
+        if len(self._queue) > 2 * max(self.max_queue, 1):
+            self._queue = [waiter for waiter in self._queue if waiter.state == WAITING]
+            heapq.heapify(self._queue)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from .rules import triage_many
+
+BATCH_MAX_CASES = int(os.getenv('BATCH_MAX_CASES', '5000'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '16'))
+BATCH_RETRIEVAL_CHUNK = int(os.getenv('BATCH_RETRIEVAL_CHUNK', '64'))
+BATCH_RULE_WORKERS = int(os.getenv('BATCH_RULE_WORKERS', str(os.cpu_count() or 1)))
+BATCH_RULE_CHUNK = int(os.getenv('BATCH_RULE_CHUNK', '256'))
+
+REQUEST_FIELDS = ('session_id', 'user_role', 'language', 'message')
+# CSV has no types; these patient_context columns are converted so eligibility and facility search see numbers and flags.
+NUMERIC_COLUMNS = {'age': int, 'id': int, 'lat': float, 'lng': float}
+BOOLEAN_COLUMNS = {'hasMockSehatCard'}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_cases(body: str, content_type: str = '') -> List[Dict[str, Any]]:
+    # Rows that cannot be parsed keep their position as {'error': ...} so results still line up with the upload.
+    if 'csv' in content_type or (not content_type.startswith('application/') and _looks_like_csv(body)):
+        cases = _parse_csv(body)
+    else:
+        cases = _parse_jsonl(body)
+    if len(cases) > BATCH_MAX_CASES:
+        raise BatchError(f'batch has {len(cases)} cases; the limit is {BATCH_MAX_CASES}')
+    return cases
+
+
+def _looks_like_csv(body: str) -> bool:
+    first = body.lstrip().split('\n', 1)[0]
+    return not first.startswith('{') and 'message' in first
+
+
+def _parse_jsonl(body: str) -> List[Dict[str, Any]]:
+    cases: List[Dict[str, Any]] = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            case = json.loads(line)
+        except ValueError as error:
+            cases.append({'error': f'invalid JSON: {error}'})
+            continue
+        cases.append(case if isinstance(case, dict) else {'error': 'each line must be a JSON object'})
+    return cases
+
+
+def _parse_csv(body: str) -> List[Dict[str, Any]]:
+    cases: List[Dict[str, Any]] = []
+    for row in csv.DictReader(io.StringIO(body)):
+        case: Dict[str, Any] = {key: row[key] for key in REQUEST_FIELDS if row.get(key)}
+        context: Dict[str, Any] = {}
+        try:
+            if row.get('patient_context'):
+                context.update(json.loads(row['patient_context']))
+            for key, value in row.items():
+                if key in REQUEST_FIELDS or key == 'patient_context' or key is None or value in (None, ''):
+                    continue
+                if key in NUMERIC_COLUMNS:
+                    context[key] = NUMERIC_COLUMNS[key](value)
+                elif key in BOOLEAN_COLUMNS:
+                    context[key] = value.strip().lower() in {'1', 'true', 'yes', 'y'}
+                else:
+                    context[key] = value
+        except ValueError as error:
+            cases.append({'error': f'invalid patient context: {error}'})
+            continue
+        case['patient_context'] = context
+        cases.append(case)
+    return cases
+
+
+def prefetch_retrieval(knowledge_base: Any, messages: Sequence[str], top_k: int = 4) -> List[List[Dict[str, Any]]]:
+    query_many = getattr(knowledge_base, 'query_many', None)
+    if query_many is None:
+        return [knowledge_base.query(message, top_k=top_k) for message in messages]
+    return query_many(list(messages), top_k=top_k)
+
+
+def rule_triage_many(messages: Sequence[str], pool: Executor | None = None, chunk_size: int = BATCH_RULE_CHUNK) -> List[Dict[str, Any]]:
+    messages = list(messages)
+    if pool is None or len(messages) <= chunk_size:
+        return triage_many(messages)
+    chunks = [messages[start:start + chunk_size] for start in range(0, len(messages), chunk_size)]
+    return [result for chunk in pool.map(triage_many, chunks) for result in chunk]
+
+
+@lru_cache(maxsize=1)
+def rule_pool() -> ProcessPoolExecutor | None:
+    if BATCH_RULE_WORKERS <= 1:
+        return None
+    # Spawned workers import only the stdlib-only rules module, not the server's threads and clients.
+    return ProcessPoolExecutor(max_workers=BATCH_RULE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+_PUNCTUATION = re.compile(r'[^\w\s]+', re.UNICODE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(text: str) -> str:
+    text = _PUNCTUATION.sub(' ', text.casefold())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def response_cache_key(message: str, context: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, hashlib.sha256(context.encode('utf-8')).hexdigest(), normalize_message(message)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 86400.0,
+        path: str | None = None,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._counters: Dict[str, int] = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._db: sqlite3.Connection | None = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)')
+
+    def get(self, key: str) -> str | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self._counters['disk_hits'] += 1
+                    return row[0]
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, value, expires_at),
+                )
+            # Expired rows are only skipped on read, so the disk tier is swept every so many writes to stay bounded.
+            self._writes += 1
+            if self.purge_every > 0 and self._writes % self.purge_every == 0:
+                self._purge(expires_at - self.ttl)
+
+    def purge_expired(self) -> None:
+        now = self._clock()
+        with self._lock:
+            self._purge(now)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, 'size': len(self._entries)}
+
+    def _purge(self, now: float) -> None:
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        if self._db is not None:
+            self._db.execute('DELETE FROM responses WHERE expires_at <= ?', (now,))
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
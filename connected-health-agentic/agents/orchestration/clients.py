@@ -2,142 +2,528 @@ from __future__ import annotations
 
 import json
 import os
+import re
 from functools import lru_cache
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
 
 import httpx
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions
-try:  # pragma: no cover - optional dependency import guard
-    from google import genai  # type: ignore
-except ImportError:  # pragma: no cover
-    genai = None  # type: ignore
+
+from .admission import PRIORITY_NAMES, ROUTINE, AdmissionController, AdmissionShed
+from .cache import ResponseCache
+from .eligibility import EligibilityCache
+from .facilities import FacilityDirectory, FacilityIndex
+from .health import BackendHealth, BackendUnavailable, CircuitBreaker
+from .hotspots import HotspotDetector
+from .lexical import HybridKnowledgeBase
+from .logs import LogShipper
+from .metrics import MetricsRegistry
+from .seeding import MANIFEST_NAME, batched, load_records, plan_seed, record_document, record_metadata, write_manifest
+from .sessions import SessionStore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .retrieval import VectorKnowledgeBase
+
+# chromadb, sentence-transformers (through .embeddings), numpy (through .retrieval) and google-genai
+# are imported where they are first used, so the server starts listening without loading them.
 
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:3001')
+BACKEND_HEALTH_TTL = float(os.getenv('BACKEND_HEALTH_TTL', '15'))
+BACKEND_HEALTH_TIMEOUT = float(os.getenv('BACKEND_HEALTH_TIMEOUT', '2'))
+BACKEND_BREAKER_FAILURES = int(os.getenv('BACKEND_BREAKER_FAILURES', '3'))
+BACKEND_BREAKER_RESET = float(os.getenv('BACKEND_BREAKER_RESET', '30'))
+LOG_SPILL_DIR = os.getenv('LOG_SPILL_DIR', os.path.join(os.path.dirname(__file__), '..', 'log_spool'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '50'))
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', '1.0'))
+LOG_REPLAY_INTERVAL = float(os.getenv('LOG_REPLAY_INTERVAL', '30'))
+LOG_INGEST_PATHS = {'interactions': '/api/interactions/bulk', 'mcp': '/api/mcp/logs/bulk'}
+FACILITY_INDEX_ENABLED = os.getenv('FACILITY_INDEX_ENABLED', 'true').lower() == 'true'
+FACILITY_SYNC_INTERVAL = float(os.getenv('FACILITY_SYNC_INTERVAL', '60'))
+FACILITY_FULL_SYNC_INTERVAL = float(os.getenv('FACILITY_FULL_SYNC_INTERVAL', '3600'))
+FACILITY_MAX_STALENESS = float(os.getenv('FACILITY_MAX_STALENESS', '900'))
+FACILITY_GRID_DEGREES = float(os.getenv('FACILITY_GRID_DEGREES', '0.1'))
+FACILITY_UTC_OFFSET_HOURS = float(os.getenv('FACILITY_UTC_OFFSET_HOURS', '5'))
+ELIGIBILITY_CACHE_SIZE = int(os.getenv('ELIGIBILITY_CACHE_SIZE', '4096'))
+ELIGIBILITY_CACHE_TTL = float(os.getenv('ELIGIBILITY_CACHE_TTL', '21600'))
+ELIGIBILITY_CACHE_PATH = os.getenv('ELIGIBILITY_CACHE_PATH', os.path.join(os.path.dirname(__file__), '..', 'cache', 'eligibility.sqlite'))
+ELIGIBILITY_CATALOG_TTL = float(os.getenv('ELIGIBILITY_CATALOG_TTL', '300'))
+ELIGIBILITY_PREWARM = os.getenv('ELIGIBILITY_PREWARM', 'true').lower() == 'true'
+ELIGIBILITY_PREWARM_BRACKETS = [bracket for bracket in os.getenv('ELIGIBILITY_PREWARM_BRACKETS', 'low').split(',') if bracket]
+ELIGIBILITY_PREWARM_LIMIT = int(os.getenv('ELIGIBILITY_PREWARM_LIMIT', '200'))
+SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', os.path.join(os.path.dirname(__file__), '..', 'cache', 'sessions.sqlite'))
+SESSION_MAX_IN_MEMORY = int(os.getenv('SESSION_MAX_IN_MEMORY', '1024'))
+SESSION_WINDOW = int(os.getenv('SESSION_WINDOW', '8'))
+SESSION_SUMMARY_CHARS = int(os.getenv('SESSION_SUMMARY_CHARS', '800'))
+SESSION_TTL = float(os.getenv('SESSION_TTL', str(7 * 86400)))
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 GEMINI_MODEL_FAST = os.getenv('GEMINI_MODEL_FAST', 'gemini-2.5-flash')
 GEMINI_MODEL_SMART = os.getenv('GEMINI_MODEL_SMART', 'gemini-2.5-pro')
 DATA_DIR = os.getenv('KNOWLEDGE_DATA_DIR', os.path.join(os.path.dirname(__file__), '..', 'data'))
+GEMINI_CACHE_SIZE = int(os.getenv('GEMINI_CACHE_SIZE', '2048'))
+GEMINI_CACHE_TTL = float(os.getenv('GEMINI_CACHE_TTL', '86400'))
+GEMINI_CACHE_PATH = os.getenv('GEMINI_CACHE_PATH', '')
+GEMINI_ADMISSION_ENABLED = os.getenv('GEMINI_ADMISSION_ENABLED', 'true').lower() == 'true'
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+GEMINI_MAX_QUEUE = int(os.getenv('GEMINI_MAX_QUEUE', '64'))
+GEMINI_MAX_QUEUE_WAIT_MS = int(os.getenv('GEMINI_MAX_QUEUE_WAIT_MS', '1500'))
 CHROMA_PATH = os.getenv('CHROMA_PATH', os.path.join(os.path.dirname(__file__), '..', 'chroma_store'))
+DEFAULT_COLLECTION = 'health_guidance'
+RAG_BACKEND = os.getenv('RAG_BACKEND', 'chroma')
+VECTOR_INDEX_PATH = os.getenv('VECTOR_INDEX_PATH', os.path.join(os.path.dirname(__file__), '..', 'vector_store'))
+VECTOR_QUANTIZE = os.getenv('VECTOR_QUANTIZE', 'float32')
+RAG_HYBRID = os.getenv('RAG_HYBRID', 'true').lower() == 'true'
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_TRACE_SAMPLE_RATE = float(os.getenv('METRICS_TRACE_SAMPLE_RATE', '0.01'))
+METRICS_TRACE_BUFFER = int(os.getenv('METRICS_TRACE_BUFFER', '100'))
+HOTSPOT_ENABLED = os.getenv('HOTSPOT_ENABLED', 'true').lower() == 'true'
+HOTSPOT_BUCKET_SECONDS = float(os.getenv('HOTSPOT_BUCKET_SECONDS', '300'))
+HOTSPOT_WINDOW_BUCKETS = int(os.getenv('HOTSPOT_WINDOW_BUCKETS', '12'))
+HOTSPOT_HISTORY_BUCKETS = int(os.getenv('HOTSPOT_HISTORY_BUCKETS', '288'))
+HOTSPOT_RATIO = float(os.getenv('HOTSPOT_RATIO', '3'))
+HOTSPOT_MIN_COUNT = int(os.getenv('HOTSPOT_MIN_COUNT', '5'))
+HOTSPOT_MIN_Z = float(os.getenv('HOTSPOT_MIN_Z', '3.5'))
+HOTSPOT_MAX_KEYS = int(os.getenv('HOTSPOT_MAX_KEYS', '4096'))
+HOTSPOT_SKETCH_WIDTH = int(os.getenv('HOTSPOT_SKETCH_WIDTH', '1024'))
+HOTSPOT_SNAPSHOT_DIR = os.getenv('HOTSPOT_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), '..', 'cache', 'hotspots'))
+HOTSPOT_SYNC_INTERVAL = float(os.getenv('HOTSPOT_SYNC_INTERVAL', '30'))
 
 
 class BackendClient:
-    def __init__(self) -> None:
-        self._client = httpx.Client(base_url=BACKEND_URL, timeout=10.0)
+    def __init__(self, health: BackendHealth | None = None, transport: httpx.BaseTransport | None = None) -> None:
+        self._client = httpx.Client(base_url=BACKEND_URL, timeout=10.0, transport=transport)
+        self._health = health or backend_health()
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        breaker = self._health.breaker
+        if not breaker.allow_request():
+            raise BackendUnavailable(f'backend circuit {breaker.state}; skipped {method} {path}')
+        with metrics_registry().track('backend', f'{method} {path}'):
+            try:
+                response = self._client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                breaker.record_failure()
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            response.raise_for_status()
+        return response
 
     def health(self) -> Dict[str, Any]:
-        response = self._client.get('/api/system/health')
-        response.raise_for_status()
-        return response.json()
+        return self._request('GET', '/api/system/health').json()
 
     def search_facilities(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-        response = self._client.post('/api/facilities/search', json=payload)
-        response.raise_for_status()
+        response = self._request('POST', '/api/facilities/search', json=payload)
         facilities = response.json()
         return facilities
 
+    def facility_sync(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._request('GET', '/api/facilities/sync', params=params).json()
+
     def program_eligibility(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-        response = self._client.post('/api/programs/eligibility', json=payload)
-        response.raise_for_status()
-        return response.json()
+        return self._request('POST', '/api/programs/eligibility', json=payload).json()
+
+    def program_catalog(self) -> Dict[str, Any]:
+        return self._request('GET', '/api/programs/catalog').json()
 
     def create_reminder(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        response = self._client.post('/api/reminders', json=payload)
-        response.raise_for_status()
-        return response.json()
+        return self._request('POST', '/api/reminders', json=payload).json()
 
     def log_interaction(self, payload: Dict[str, Any]) -> None:
-        try:
-            self._client.post('/api/interactions', json=payload)
-        except Exception as error:  # pragma: no cover
-            print('interaction_log_error', error)
+        log_shipper().submit('interactions', payload)
 
     def log_mcp_tool(self, payload: Dict[str, Any]) -> None:
-        try:
-            self._client.post('/api/mcp/logs', json=payload)
-        except Exception as error:  # pragma: no cover
-            print('mcp_log_error', error)
+        log_shipper().submit('mcp', payload)
+
+    def ingest_logs(self, kind: str, payloads: List[Dict[str, Any]]) -> None:
+        self._request('POST', LOG_INGEST_PATHS[kind], json={'items': payloads})
 
     def knowledge_triage_rules(self) -> Dict[str, Any]:
-        response = self._client.get('/api/knowledge/triage')
-        response.raise_for_status()
-        return response.json()
+        return self._request('GET', '/api/knowledge/triage').json()
 
     def knowledge_query(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        response = self._client.post('/api/knowledge/query', json={'query': query, 'limit': limit})
-        response.raise_for_status()
-        return response.json()
+        return self._request('POST', '/api/knowledge/query', json={'query': query, 'limit': limit}).json()
+
+
+class AsyncBackendClient:
+    def __init__(self, health: BackendHealth | None = None, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._client = httpx.AsyncClient(base_url=BACKEND_URL, timeout=10.0, transport=transport)
+        self._health = health or backend_health()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        breaker = self._health.breaker
+        if not breaker.allow_request():
+            raise BackendUnavailable(f'backend circuit {breaker.state}; skipped {method} {path}')
+        with metrics_registry().track('backend', f'{method} {path}'):
+            try:
+                response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                breaker.record_failure()
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            response.raise_for_status()
+        return response
+
+    async def health(self) -> Dict[str, Any]:
+        return (await self._request('GET', '/api/system/health')).json()
+
+    async def search_facilities(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return (await self._request('POST', '/api/facilities/search', json=payload)).json()
+
+    async def program_eligibility(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return (await self._request('POST', '/api/programs/eligibility', json=payload)).json()
+
+    async def create_reminder(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self._request('POST', '/api/reminders', json=payload)).json()
+
+    async def log_interaction(self, payload: Dict[str, Any]) -> None:
+        log_shipper().submit('interactions', payload)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
 
 class GeminiClient:
-    def __init__(self) -> None:
+    def __init__(self, cache: ResponseCache | None = None, admission: AdmissionController | None = None) -> None:
         self.api_key = GEMINI_API_KEY
         self.client = None
-        if self.api_key and genai:
+        self.cache = cache
+        self.admission = admission
+        genai = load_genai() if self.api_key else None
+        if genai is not None:
             self.client = genai.Client(api_key=self.api_key)
 
     def available(self) -> bool:
         return self.client is not None
 
-    def generate(self, prompt: str, model_variant: str = 'fast') -> str | None:
+    def model_name(self, model_variant: str = 'fast') -> str:
+        return GEMINI_MODEL_FAST if model_variant == 'fast' else GEMINI_MODEL_SMART
+
+    def generate(
+        self,
+        prompt: str,
+        model_variant: str = 'fast',
+        priority: int = ROUTINE,
+        deadline: float | None = None,
+    ) -> str | None:
         if not self.client:
             return None
-        model_name = GEMINI_MODEL_FAST if model_variant == 'fast' else GEMINI_MODEL_SMART
-        response = self.client.models.generate_content(model=model_name, contents=prompt)
+        metrics = metrics_registry()
+        if self.admission is None:
+            with metrics.track('gemini', model_variant):
+                return self.complete(prompt, model_variant)
+        priority_labels = (('priority', PRIORITY_NAMES.get(priority, str(priority))),)
+        try:
+            with self.admission.slot(priority, deadline) as waited:
+                metrics.observe('agents_admission_wait_seconds', waited, priority_labels)
+                try:
+                    with metrics.track('gemini', model_variant):
+                        response_text = self.complete(prompt, model_variant)
+                except Exception as error:
+                    if is_rate_limited(error):
+                        self.admission.record_rate_limited()
+                    raise
+                self.admission.record_success()
+                return response_text
+        except AdmissionShed as error:
+            metrics.increment('agents_admission_shed_total', priority_labels + (('reason', error.reason),))
+            raise
+
+    def complete(self, prompt: str, model_variant: str = 'fast') -> str | None:
+        response = self.client.models.generate_content(model=self.model_name(model_variant), contents=prompt)
         if hasattr(response, 'text'):
             return response.text
         if isinstance(response, dict):
             return response.get('text')
         return None
 
+    def generate_json(
+        self,
+        prompt: str,
+        model_variant: str = 'fast',
+        cache_key: str | None = None,
+        priority: int = ROUTINE,
+        deadline: float | None = None,
+        accept: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        # accept decides which answers are worth replaying; anything else is returned once and never cached.
+        if cache_key and self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                result = json.loads(cached)
+                if accept is None or accept(result):
+                    return result
+        response_text = self.generate(prompt, model_variant=model_variant, priority=priority, deadline=deadline)
+        if not response_text:
+            return None
+        result = json.loads(response_text)
+        if cache_key and self.cache is not None and (accept is None or accept(result)):
+            self.cache.set(cache_key, response_text)
+        return result
+
 
 class KnowledgeBase:
     def __init__(self) -> None:
+        from chromadb import PersistentClient
+
+        from .embeddings import embedding_function
+
         os.makedirs(CHROMA_PATH, exist_ok=True)
+        embedder = embedding_function()
+        # Each embedding model gets its own collection so vectors are never mixed.
+        self._collection_name = collection_name(embedder.model_id)
         self._client = PersistentClient(path=CHROMA_PATH)
         self._collection = self._client.get_or_create_collection(
-            name='health_guidance',
-            embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction(model_name='all-MiniLM-L6-v2'),
+            name=self._collection_name,
+            embedding_function=embedder,
         )
         self._seed_data()
 
     def _seed_data(self) -> None:
-        existing_ids = set(self._collection.get()['ids']) if self._collection.count() else set()
         data_path = os.path.join(DATA_DIR, 'knowledge_base.json')
-        with open(data_path, 'r', encoding='utf-8') as fp:
-            records = json.load(fp)
-        new_texts = []
-        new_ids = []
-        metadatas = []
-        for record in records:
-            if record['id'] in existing_ids:
-                continue
-            new_ids.append(record['id'])
-            new_texts.append(record['title'] + '\n' + record['content'])
-            metadatas.append({'language': record.get('language', 'en'), 'tags': record.get('tags', [])})
-        if new_ids:
-            self._collection.add(ids=new_ids, documents=new_texts, metadatas=metadatas)
-
-    def query(self, text: str, top_k: int = 4) -> List[Dict[str, Any]]:
-        if not text.strip():
-            return []
-        results = self._collection.query(query_texts=[text], n_results=top_k)
-        matches = []
-        for doc_id, doc, metadata in zip(results['ids'][0], results['documents'][0], results['metadatas'][0]):
-            matches.append({'id': doc_id, 'document': doc, 'metadata': metadata})
+        manifest_name = MANIFEST_NAME if self._collection_name == DEFAULT_COLLECTION else f'{self._collection_name}.{MANIFEST_NAME}'
+        manifest_path = os.path.join(CHROMA_PATH, manifest_name)
+        plan = plan_seed(data_path, manifest_path, stored_count=self._collection.count())
+        if plan.unchanged:
+            return
+        deletes = list(plan.deletes)
+        if not plan.has_manifest and self._collection.count():
+            # Stores seeded before the manifest existed: diff ids once without pulling documents.
+            deletes = [doc_id for doc_id in self._collection.get(include=[])['ids'] if doc_id not in plan.hashes]
+        for batch in batched(plan.upserts):
+            self._collection.upsert(
+                ids=[record['id'] for record in batch],
+                documents=[record_document(record) for record in batch],
+                metadatas=[record_metadata(record) for record in batch],
+            )
+        for batch in batched(deletes):
+            self._collection.delete(ids=batch)
+        write_manifest(manifest_path, plan.fingerprint, plan.hashes)
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 4,
+        language: str | None = None,
+        tags: List[str] | None = None,
+    ) -> List[Dict[str, Any]]:
+        return self.query_many([text], top_k=top_k, language=language, tags=tags)[0]
+
+    def query_many(
+        self,
+        texts: List[str],
+        top_k: int = 4,
+        language: str | None = None,
+        tags: List[str] | None = None,
+    ) -> List[List[Dict[str, Any]]]:
+        matches: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        positions = [index for index, text in enumerate(texts) if text.strip()]
+        if not positions:
+            return matches
+        where = {'language': language} if language else None
+        n_results = top_k * 4 if tags else top_k
+        # Chroma embeds all query_texts in one call to the embedding function.
+        results = self._collection.query(query_texts=[texts[index] for index in positions], n_results=n_results, where=where)
+        for row, index in enumerate(positions):
+            for doc_id, doc, metadata in zip(results['ids'][row], results['documents'][row], results['metadatas'][row]):
+                if tags and not set(tags) <= set(str(metadata.get('tags', '')).split(',')):
+                    continue
+                matches[index].append({'id': doc_id, 'document': doc, 'metadata': metadata})
+            matches[index] = matches[index][:top_k]
         return matches
 
 
+def load_genai() -> Any:
+    try:  # pragma: no cover - optional dependency import guard
+        from google import genai  # type: ignore
+    except ImportError:  # pragma: no cover
+        return None
+    return genai
+
+
+def is_rate_limited(error: Exception) -> bool:
+    # google-genai raises APIError subclasses carrying the HTTP status as .code.
+    return getattr(error, 'code', None) == 429 or 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def collection_name(model_id: str) -> str:
+    from .embeddings import EMBEDDING_MODEL
+
+    if model_id == f'st:{EMBEDDING_MODEL}':
+        return DEFAULT_COLLECTION
+    return f"{DEFAULT_COLLECTION}_{re.sub(r'[^A-Za-z0-9_-]+', '-', model_id)}"[:63]
+
+
+def probe_backend_health() -> Dict[str, Any]:
+    response = httpx.get(f'{BACKEND_URL}/api/system/health', timeout=BACKEND_HEALTH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+@lru_cache(maxsize=1)
+def backend_health() -> BackendHealth:
+    health = BackendHealth(
+        probe_backend_health,
+        CircuitBreaker(failure_threshold=BACKEND_BREAKER_FAILURES, reset_timeout=BACKEND_BREAKER_RESET),
+        ttl=BACKEND_HEALTH_TTL,
+    )
+    health.start()
+    return health
+
+
+@lru_cache(maxsize=1)
+def metrics_registry() -> MetricsRegistry:
+    registry = MetricsRegistry(
+        enabled=METRICS_ENABLED,
+        trace_sample_rate=METRICS_TRACE_SAMPLE_RATE,
+        max_traces=METRICS_TRACE_BUFFER,
+    )
+    registry.describe('agents_request_duration_seconds', 'End-to-end /run latency by language and user role.')
+    registry.describe('agents_requests_total', 'Completed /run requests by outcome (ok, degraded, error).')
+    registry.describe('agents_node_duration_seconds', 'Time spent in each LangGraph node.')
+    registry.describe('agents_node_errors_total', 'Nodes that raised.')
+    registry.describe('agents_node_fallbacks_total', 'Nodes that switched the conversation to degraded mode.')
+    registry.describe('agents_client_duration_seconds', 'Outbound backend, Gemini and knowledge-base calls.')
+    registry.describe('agents_client_errors_total', 'Outbound calls that raised.')
+    registry.describe('agents_admission_wait_seconds', 'Time Gemini calls spent queued for a concurrency slot, by priority.')
+    registry.describe('agents_admission_shed_total', 'Gemini calls shed to the rule path before starting, by priority and reason.')
+    return registry
+
+
 @lru_cache(maxsize=1)
 def backend_client() -> BackendClient:
     return BackendClient()
 
 
+@lru_cache(maxsize=1)
+def log_shipper() -> LogShipper:
+    shipper = LogShipper(
+        lambda kind, payloads: backend_client().ingest_logs(kind, payloads),
+        LOG_SPILL_DIR,
+        max_queue=LOG_QUEUE_SIZE,
+        batch_size=LOG_BATCH_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL,
+        replay_interval=LOG_REPLAY_INTERVAL,
+    )
+    shipper.start()
+    return shipper
+
+
+@lru_cache(maxsize=1)
+def facility_directory() -> FacilityDirectory | None:
+    if not FACILITY_INDEX_ENABLED:
+        return None
+    directory = FacilityDirectory(
+        lambda params: backend_client().facility_sync(params),
+        refresh_interval=FACILITY_SYNC_INTERVAL,
+        full_sync_interval=FACILITY_FULL_SYNC_INTERVAL,
+        max_staleness=FACILITY_MAX_STALENESS,
+        index_factory=lambda facilities: FacilityIndex(
+            facilities,
+            cell_degrees=FACILITY_GRID_DEGREES,
+            utc_offset_hours=FACILITY_UTC_OFFSET_HOURS,
+        ),
+    )
+    directory.start()
+    return directory
+
+
+@lru_cache(maxsize=1)
+def eligibility_cache() -> EligibilityCache:
+    cache = EligibilityCache(
+        lambda: backend_client().program_catalog(),
+        ResponseCache(max_entries=ELIGIBILITY_CACHE_SIZE, ttl=ELIGIBILITY_CACHE_TTL, path=ELIGIBILITY_CACHE_PATH or None),
+        catalog_ttl=ELIGIBILITY_CATALOG_TTL,
+    )
+
+    def warm() -> int:
+        return cache.prewarm(
+            backend_client().program_eligibility,
+            income_brackets=ELIGIBILITY_PREWARM_BRACKETS,
+            limit=ELIGIBILITY_PREWARM_LIMIT,
+        )
+
+    cache.start(warm if ELIGIBILITY_PREWARM else None)
+    return cache
+
+
+@lru_cache(maxsize=1)
+def session_store() -> SessionStore:
+    return SessionStore(
+        SESSION_STORE_PATH or None,
+        max_sessions=SESSION_MAX_IN_MEMORY,
+        window=max(SESSION_WINDOW, 2),
+        summary_chars=SESSION_SUMMARY_CHARS,
+        ttl=SESSION_TTL,
+    )
+
+
+@lru_cache(maxsize=1)
+def async_backend_client() -> AsyncBackendClient:
+    return AsyncBackendClient()
+
+
+@lru_cache(maxsize=1)
+def gemini_response_cache() -> ResponseCache:
+    return ResponseCache(max_entries=GEMINI_CACHE_SIZE, ttl=GEMINI_CACHE_TTL, path=GEMINI_CACHE_PATH or None)
+
+
+@lru_cache(maxsize=1)
+def hotspot_detector() -> HotspotDetector | None:
+    if not HOTSPOT_ENABLED:
+        return None
+    detector = HotspotDetector(
+        bucket_seconds=HOTSPOT_BUCKET_SECONDS,
+        window_buckets=HOTSPOT_WINDOW_BUCKETS,
+        history_buckets=HOTSPOT_HISTORY_BUCKETS,
+        max_keys=HOTSPOT_MAX_KEYS,
+        sketch_width=HOTSPOT_SKETCH_WIDTH,
+        ratio=HOTSPOT_RATIO,
+        min_count=HOTSPOT_MIN_COUNT,
+        min_z=HOTSPOT_MIN_Z,
+        snapshot_dir=HOTSPOT_SNAPSHOT_DIR or None,
+        sync_interval=HOTSPOT_SYNC_INTERVAL,
+    )
+    detector.start()
+    return detector
+
+
+@lru_cache(maxsize=1)
+def gemini_admission() -> AdmissionController | None:
+    if not GEMINI_ADMISSION_ENABLED:
+        return None
+    return AdmissionController(
+        max_concurrent=GEMINI_MAX_CONCURRENCY,
+        max_queue=GEMINI_MAX_QUEUE,
+        max_wait=GEMINI_MAX_QUEUE_WAIT_MS / 1000,
+    )
+
+
 @lru_cache(maxsize=1)
 def gemini_client() -> GeminiClient:
-    return GeminiClient()
+    return GeminiClient(cache=gemini_response_cache(), admission=gemini_admission())
 
 
 @lru_cache(maxsize=1)
-def knowledge_base() -> KnowledgeBase:
+def knowledge_base() -> KnowledgeBase | VectorKnowledgeBase | HybridKnowledgeBase:
+    if RAG_HYBRID:
+        return HybridKnowledgeBase(load_records(os.path.join(DATA_DIR, 'knowledge_base.json')), vector_knowledge_base)
+    return vector_knowledge_base()
+
+
+def vector_knowledge_base() -> KnowledgeBase | VectorKnowledgeBase:
+    if RAG_BACKEND == 'numpy':
+        from .embeddings import embedding_function
+        from .retrieval import VectorKnowledgeBase
+
+        return VectorKnowledgeBase(
+            VECTOR_INDEX_PATH,
+            os.path.join(DATA_DIR, 'knowledge_base.json'),
+            embedding_function(),
+            quantize=VECTOR_QUANTIZE,
+        )
     return KnowledgeBase()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import re
+import threading
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Sequence
+
+from .cache import ResponseCache
+
+_AGE_PREFIX = re.compile(r'^Age \d+')
+
+
+class EligibilityCache:
+    def __init__(
+        self,
+        fetch_catalog: Callable[[], Dict[str, Any]],
+        cache: ResponseCache,
+        catalog_ttl: float = 300.0,
+    ) -> None:
+        self.catalog_ttl = catalog_ttl
+        self._fetch_catalog = fetch_catalog
+        self._cache = cache
+        self._catalog: Dict[str, Any] | None = None
+        self._boundaries: List[int] = []
+        self._counters: Dict[str, int] = {'hits': 0, 'misses': 0, 'bypassed': 0, 'prewarmed': 0, 'catalog_errors': 0}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def version(self) -> str | None:
+        return self._catalog.get('version') if self._catalog else None
+
+    def key(self, payload: Dict[str, Any]) -> str | None:
+        # Known patients go to the backend, which persists their evaluation; a non-integer age would be rejected there.
+        catalog = self._catalog
+        age = payload.get('age')
+        if catalog is None or payload.get('patientId') or not isinstance(age, int) or isinstance(age, bool) or age < 0:
+            return None
+        # Every age between two consecutive minAge thresholds gets the same verdict for every program.
+        parts = (
+            catalog['version'],
+            str(bisect_right(self._boundaries, age)),
+            str(payload.get('gender', '')).casefold(),
+            str(payload.get('district') or ''),
+            str(payload.get('incomeBracket') or ''),
+            str(bool(payload.get('hasMockSehatCard'))),
+        )
+        return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, payload: Dict[str, Any]) -> List[Dict[str, Any]] | None:
+        key = self.key(payload)
+        if key is None:
+            self._counters['bypassed'] += 1
+            return None
+        cached = self._cache.get(key)
+        if cached is None:
+            self._counters['misses'] += 1
+            return None
+        self._counters['hits'] += 1
+        age = payload['age']
+        return [{**program, 'reason': _AGE_PREFIX.sub(f'Age {age}', program.get('reason', ''))} for program in json.loads(cached)]
+
+    def store(self, payload: Dict[str, Any], programs: List[Dict[str, Any]]) -> None:
+        key = self.key(payload)
+        if key is not None and isinstance(programs, list):
+            self._cache.set(key, json.dumps(programs, ensure_ascii=False))
+
+    def refresh_catalog(self) -> bool:
+        try:
+            catalog = self._fetch_catalog()
+        except Exception as error:
+            # Keep serving the last known catalog; entries under its version are still correct if it has not changed.
+            self._counters['catalog_errors'] += 1
+            print('eligibility_catalog_error', error)
+            return False
+        self._boundaries = sorted({
+            int(program.get('eligibilityRules', {}).get('minAge', 0) or 0) for program in catalog.get('programs', [])
+        })
+        self._catalog = catalog
+        return True
+
+    def prewarm(
+        self,
+        evaluate: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+        districts: Sequence[str] | None = None,
+        income_brackets: Sequence[str] = ('low',),
+        genders: Sequence[str] = ('female', 'male'),
+        limit: int = 200,
+    ) -> int:
+        if self._catalog is None:
+            return 0
+        districts = list(districts if districts is not None else self._catalog.get('districts', []))
+        # One representative age per bucket is enough to fill every cache entry for that profile.
+        ages = self._boundaries or [0]
+        warmed = 0
+        for district, bracket, gender, card, age in itertools.product(districts, income_brackets, genders, (True, False), ages):
+            if warmed >= limit or self._stop.is_set():
+                break
+            payload = {'age': age, 'gender': gender, 'district': district, 'incomeBracket': bracket, 'hasMockSehatCard': card}
+            key = self.key(payload)
+            if key is None or self._cache.get(key) is not None:
+                continue
+            try:
+                self.store(payload, evaluate(payload))
+            except Exception as error:
+                print('eligibility_prewarm_error', error)
+                break
+            warmed += 1
+        self._counters['prewarmed'] += warmed
+        return warmed
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, 'version': self.version}
+
+    def start(self, warm: Callable[[], Any] | None = None) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(warm,), name='eligibility-catalog', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, warm: Callable[[], Any] | None) -> None:
+        while not self._stop.is_set():
+            previous = self.version
+            if self.refresh_catalog() and warm is not None and self.version != previous:
+                warm()
+            self._stop.wait(self.catalog_ttl)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+from .cache import normalize_message
+
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'sentence-transformers')
+EMBEDDING_ONNX_DIR = os.getenv('EMBEDDING_ONNX_DIR', '')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', '0'))
+EMBEDDING_CACHE_MB = float(os.getenv('EMBEDDING_CACHE_MB', '16'))
+MAX_SEQUENCE_LENGTH = 256
+
+
+class SentenceTransformerProvider(EmbeddingFunction[Documents]):
+    def __init__(self, model_name: str = EMBEDDING_MODEL) -> None:
+        self.model_id = f'st:{model_name}'
+        self._function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._function(input)
+
+
+class OnnxMiniLMProvider(EmbeddingFunction[Documents]):
+    def __init__(
+        self,
+        model_dir: str = EMBEDDING_ONNX_DIR,
+        quantized: bool = True,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        threads: int = EMBEDDING_THREADS,
+    ) -> None:
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as error:  # pragma: no cover - optional dependency import guard
+            raise RuntimeError('EMBEDDING_PROVIDER=onnx requires the onnxruntime and tokenizers packages') from error
+        if not model_dir:
+            # Reuse the MiniLM export Chroma already knows how to fetch and verify.
+            downloader = embedding_functions.ONNXMiniLM_L6_V2()
+            downloader._download_model_if_not_exists()
+            model_dir = os.path.join(downloader.DOWNLOAD_PATH, downloader.EXTRACTED_FOLDER_NAME)
+        model_path = os.path.join(model_dir, 'model.onnx')
+        if quantized:
+            model_path = quantize_onnx_model(model_path)
+        self.model_id = f"onnx{'-int8' if quantized else ''}:{EMBEDDING_MODEL}"
+        self.batch_size = batch_size
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQUENCE_LENGTH)
+        # Pad to the longest text in each batch instead of a fixed 256 tokens.
+        self._tokenizer.enable_padding(pad_id=0, pad_token='[PAD]')
+        options = onnxruntime.SessionOptions()
+        options.log_severity_level = 3
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = onnxruntime.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self._input_names = {node.name for node in self._session.get_inputs()}
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = [self._forward(input[index:index + self.batch_size]) for index in range(0, len(input), self.batch_size)]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        encoded = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([item.ids for item in encoded], dtype=np.int64)
+        attention_mask = np.array([item.attention_mask for item in encoded], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        hidden = self._session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    def __init__(self, provider: Any, max_bytes: int = int(EMBEDDING_CACHE_MB * 1024 * 1024)) -> None:
+        self.provider = provider
+        self.model_id = provider.model_id
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._counters: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [normalize_message(text) for text in input]
+        vectors: List[np.ndarray | None] = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                vectors.append(vector)
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Misses are embedded together so a batch still makes one provider call.
+            computed = self.provider([input[index] for index in missing])
+            with self._lock:
+                for index, embedding in zip(missing, computed):
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    vectors[index] = vector
+                    self._remember(keys[index], vector)
+        with self._lock:
+            self._counters['hits'] += len(keys) - len(missing)
+            self._counters['misses'] += len(missing)
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, 'size': len(self._entries), 'bytes': self._bytes}
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._counters['evictions'] += 1
+
+
+def quantize_onnx_model(model_path: str) -> str:
+    quantized_path = model_path.replace('.onnx', '.int8.onnx')
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = f'{quantized_path}.{os.getpid()}.tmp'
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+def build_provider(name: str = EMBEDDING_PROVIDER) -> Any:
+    if name == 'onnx':
+        return OnnxMiniLMProvider(quantized=False)
+    if name == 'onnx-int8':
+        return OnnxMiniLMProvider(quantized=True)
+    return SentenceTransformerProvider()
+
+
+@lru_cache(maxsize=1)
+def embedding_function() -> CachedEmbeddingFunction:
+    return CachedEmbeddingFunction(build_provider())
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+Window = Tuple[int, int] | None
+
+
+def parse_hours(opening_hours: Any) -> Dict[str, Window]:
+    # Mirrors the seed format ({"daily": "24/7"} or {"daily": "08:00-20:00"}, optionally per weekday). Anything
+    # unparseable counts as always open (None), which is what the backend search assumes for every facility.
+    if not isinstance(opening_hours, dict):
+        return {}
+    return {key: _parse_window(value) if isinstance(value, str) else None for key, value in opening_hours.items()}
+
+
+@lru_cache(maxsize=256)
+def _parse_window(hours: str) -> Window:
+    if hours.strip() == '24/7':
+        return None
+    try:
+        start, end = (datetime.strptime(part.strip(), '%H:%M') for part in hours.split('-', 1))
+    except ValueError:
+        return None
+    return start.hour * 60 + start.minute, end.hour * 60 + end.minute
+
+
+def open_at(schedule: Dict[str, Window], now: datetime) -> bool:
+    window = schedule.get(WEEKDAYS[now.weekday()], schedule.get('daily'))
+    if window is None:
+        return True
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+def is_open(opening_hours: Any, now: datetime) -> bool:
+    return open_at(parse_hours(opening_hours), now)
+
+
+class FacilityIndex:
+    def __init__(
+        self,
+        facilities: Iterable[Dict[str, Any]],
+        cell_degrees: float = 0.1,
+        utc_offset_hours: float = 5.0,
+    ) -> None:
+        self.cell_degrees = cell_degrees
+        self.utc_offset = timedelta(hours=utc_offset_hours)
+        self._facilities: List[Dict[str, Any]] = sorted(facilities, key=lambda facility: facility['id'])
+        self._service_bits: Dict[str, int] = {}
+        self._masks: List[int] = []
+        self._schedules: List[Dict[str, Window]] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._by_area: Dict[Tuple[str | None, str | None], List[int]] = {}
+        self._required_masks: Dict[str, int] = {}
+        for row, facility in enumerate(self._facilities):
+            mask = 0
+            for service in facility.get('services') or []:
+                bit = self._service_bits.setdefault(str(service).lower(), len(self._service_bits))
+                mask |= 1 << bit
+            self._masks.append(mask)
+            self._schedules.append(parse_hours(facility.get('openingHours')))
+            if facility.get('lat') is not None and facility.get('lng') is not None:
+                self._grid.setdefault(self._cell(facility['lat'], facility['lng']), []).append(row)
+            for key in ((facility.get('district'), None), (facility.get('district'), facility.get('tehsil')), (None, facility.get('tehsil'))):
+                self._by_area.setdefault(key, []).append(row)
+        if self._grid:
+            rows = [cell[0] for cell in self._grid]
+            cols = [cell[1] for cell in self._grid]
+            self._extent = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self._facilities)
+
+    def search(self, payload: Dict[str, Any], limit: int = 3, now: datetime | None = None) -> List[Dict[str, Any]]:
+        local_now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None) + self.utc_offset
+        required = self._required_mask(payload.get('requiredServices') or [])
+        lat, lng = payload.get('lat'), payload.get('lng')
+        district, tehsil = payload.get('district'), payload.get('tehsil')
+
+        if district or tehsil:
+            rows: Iterable[int] = self._by_area.get((district or None, tehsil or None), [])
+        elif lat is not None and lng is not None and self._grid:
+            rows = self._nearest_rows(lat, lng, required, limit, local_now)
+        else:
+            rows = range(len(self._facilities))
+
+        ranked = []
+        for row in rows:
+            if required is not None and not self._masks[row] & required:
+                continue
+            facility = self._facilities[row]
+            distance = None
+            if lat is not None and lng is not None and facility.get('lat') is not None and facility.get('lng') is not None:
+                distance = haversine_km(lat, lng, facility['lat'], facility['lng'])
+            open_now = open_at(self._schedules[row], local_now)
+            ranked.append(((not open_now, distance if distance is not None else math.inf, facility['id']), row, distance, open_now))
+        ranked.sort(key=lambda item: item[0])
+        return [self._result(row, distance, open_now) for _, row, distance, open_now in ranked[:limit]]
+
+    def _nearest_rows(self, lat: float, lng: float, required: int | None, limit: int, now: datetime) -> List[int]:
+        # Expand square rings of grid cells until `limit` open matches are closer than anything an unvisited ring
+        # could contain. Longitude degrees are the shorter side, so they bound the ring distance.
+        origin = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._extent
+        max_radius = max(abs(origin[0] - min_row), abs(origin[0] - max_row), abs(origin[1] - min_col), abs(origin[1] - max_col))
+        rows: List[int] = []
+        open_distances: List[float] = []
+        for radius in range(max_radius + 1):
+            for cell in self._ring(origin, radius):
+                for row in self._grid.get(cell, []):
+                    rows.append(row)
+                    facility = self._facilities[row]
+                    if (required is None or self._masks[row] & required) and open_at(self._schedules[row], now):
+                        open_distances.append(haversine_km(lat, lng, facility['lat'], facility['lng']))
+            widest = min(abs(lat) + self.cell_degrees * (radius + 1), 89.0)
+            unvisited_km = radius * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(widest))
+            if len(open_distances) >= limit and sorted(open_distances)[limit - 1] <= unvisited_km:
+                break
+        return rows
+
+    @staticmethod
+    def _ring(origin: Tuple[int, int], radius: int) -> Iterable[Tuple[int, int]]:
+        row, col = origin
+        if radius == 0:
+            yield origin
+            return
+        for offset in range(-radius, radius + 1):
+            yield row - radius, col + offset
+            yield row + radius, col + offset
+        for offset in range(-radius + 1, radius):
+            yield row + offset, col - radius
+            yield row + offset, col + radius
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def _required_mask(self, required_services: Sequence[str]) -> int | None:
+        if not required_services:
+            return None
+        mask = 0
+        for required in required_services:
+            needle = str(required).lower()
+            if needle not in self._required_masks:
+                # Same substring semantics as the backend search ('emergency' matches 'emergency-obstetric').
+                self._required_masks[needle] = sum(1 << bit for service, bit in self._service_bits.items() if needle in service)
+            mask |= self._required_masks[needle]
+        return mask
+
+    def _result(self, row: int, distance: float | None, open_now: bool) -> Dict[str, Any]:
+        facility = self._facilities[row]
+        return {
+            'id': facility['id'],
+            'name': facility.get('name'),
+            'type': facility.get('type'),
+            'distanceKm': round(distance, 2) if distance is not None else None,
+            'isOpen': open_now,
+            'servicesSummary': list((facility.get('services') or [])[:4]),
+            'stockAlerts': list(facility.get('stockAlerts') or []),
+            'matchesRequired': True,
+        }
+
+
+class FacilityDirectory:
+    def __init__(
+        self,
+        fetch: Callable[[Dict[str, Any]], Dict[str, Any]],
+        refresh_interval: float = 60.0,
+        full_sync_interval: float = 3600.0,
+        max_staleness: float = 900.0,
+        index_factory: Callable[[Iterable[Dict[str, Any]]], FacilityIndex] = FacilityIndex,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.refresh_interval = refresh_interval
+        self.full_sync_interval = full_sync_interval
+        self.max_staleness = max_staleness
+        self._fetch = fetch
+        self._index_factory = index_factory
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._facilities: Dict[int, Dict[str, Any]] = {}
+        self._index: FacilityIndex | None = None
+        self._synced_at: str | None = None
+        self._synced_clock = 0.0
+        self._full_synced_clock = 0.0
+        self._counters: Dict[str, int] = {'full_syncs': 0, 'delta_syncs': 0, 'sync_errors': 0, 'local_hits': 0, 'fallbacks': 0}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def search(self, payload: Dict[str, Any], limit: int = 3) -> List[Dict[str, Any]] | None:
+        index = self._index
+        if index is None or self._clock() - self._synced_clock > self.max_staleness:
+            self._counters['fallbacks'] += 1
+            return None
+        self._counters['local_hits'] += 1
+        return index.search(payload, limit=limit)
+
+    def sync(self) -> bool:
+        full = self._index is None or self._clock() - self._full_synced_clock >= self.full_sync_interval
+        params: Dict[str, Any] = {}
+        if not full:
+            params = {'since': self._synced_at, 'afterId': max(self._facilities, default=0)}
+        try:
+            snapshot = self._fetch(params)
+        except Exception as error:
+            self._counters['sync_errors'] += 1
+            print('facility_sync_error', error)
+            return False
+        with self._lock:
+            facilities = {} if snapshot.get('full') else dict(self._facilities)
+            facilities.update({facility['id']: facility for facility in snapshot.get('facilities', [])})
+            current = set(snapshot.get('ids', facilities))
+            facilities = {facility_id: facility for facility_id, facility in facilities.items() if facility_id in current}
+            changed = snapshot.get('full') or snapshot.get('facilities') or len(facilities) != len(self._facilities)
+            self._facilities = facilities
+            if changed or self._index is None:
+                # Readers keep whichever index they already grabbed; the swap is a single reference assignment.
+                self._index = self._index_factory(facilities.values())
+            self._synced_at = snapshot.get('syncedAt')
+            self._synced_clock = self._clock()
+            if snapshot.get('full'):
+                self._full_synced_clock = self._synced_clock
+        self._counters['full_syncs' if snapshot.get('full') else 'delta_syncs'] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, 'facilities': len(self._facilities), 'synced_at': self._synced_at}
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='facility-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.refresh_interval)
@@ -1,24 +1,58 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import contextvars
+import functools
+import math
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
-
-from langgraph.graph import END, StateGraph
-
-from .clients import backend_client, gemini_client, knowledge_base
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from .admission import BATCH, EMERGENCY, PRIORITY_ROLE, ROUTINE
+from .cache import response_cache_key
+from .clients import (
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_QUEUE,
+    async_backend_client,
+    backend_client,
+    backend_health,
+    eligibility_cache,
+    facility_directory,
+    gemini_client,
+    hotspot_detector,
+    knowledge_base,
+    metrics_registry,
+)
+from .rules import SAFETY_DISCLAIMER, CompiledRules, triage_rule_engine
+from .sessions import summarize_turn
 from .state import ConversationState
 
-TRIAGE_RULES_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'triage_rules.json')
-SAFETY_DISCLAIMER = (
-    "This is a decision-support tool, not a doctor. In case of severe symptoms or doubt, go to the nearest emergency facility immediately."
+if TYPE_CHECKING:  # pragma: no cover
+    from langgraph.graph import StateGraph
+
+TRIAGE_PROMPT_VERSION = 'triage-v2'
+TRIAGE_LEVELS = {'self-care', 'clinic', 'emergency'}
+TRIAGE_DEADLINE_MS = int(os.getenv('TRIAGE_DEADLINE_MS', '8000'))
+TRIAGE_MAX_WAIT_MS = int(os.getenv('TRIAGE_MAX_WAIT_MS', '60000'))
+TRIAGE_FAST_FIRST = os.getenv('TRIAGE_FAST_FIRST', 'false').lower() == 'true'
+TRIAGE_MIN_CONFIDENCE = float(os.getenv('TRIAGE_MIN_CONFIDENCE', '0.7'))
+# Enough threads for every admitted and queued call, so waiting happens in the priority queue rather than the executor's FIFO.
+TRIAGE_LLM_WORKERS = int(os.getenv('TRIAGE_LLM_WORKERS', str(GEMINI_MAX_CONCURRENCY + GEMINI_MAX_QUEUE)))
+PRIORITY_ROLES = {'lhw', 'doctor'}
+
+AGENT_NODES = (
+    ('facility_finder', 'needs_facility'),
+    ('program_matcher', 'needs_programs'),
+    ('follow_up', 'needs_follow_up'),
 )
 
+# LangGraph rejects a node that writes nothing; degraded_mode is or-reduced, so writing False changes no state.
+NO_UPDATE: Dict[str, Any] = {'degraded_mode': False}
 
-def load_local_rules() -> Dict[str, Any]:
-    with open(TRIAGE_RULES_PATH, 'r', encoding='utf-8') as fp:
-        return json.load(fp)
+_llm_executor = ThreadPoolExecutor(max_workers=TRIAGE_LLM_WORKERS, thread_name_prefix='triage-llm')
 
 
 def ingest_message(state: ConversationState) -> ConversationState:
@@ -31,13 +65,7 @@ def ingest_message(state: ConversationState) -> ConversationState:
     state['facility_recommendations'] = state.get('facility_recommendations', []) or []
     state['reminders'] = state.get('reminders', []) or []
     state['analytics_flags'] = state.get('analytics_flags', []) or []
-    degraded = state.get('degraded_mode', False)
-    try:
-        health = backend_client().health()
-        degraded = bool(health.get('degraded_mode'))
-    except Exception:
-        degraded = True
-    state['degraded_mode'] = degraded
+    state['degraded_mode'] = backend_health().degraded()
     state['needs_facility'] = False
     state['needs_programs'] = False
     state['needs_follow_up'] = False
@@ -45,39 +73,144 @@ def ingest_message(state: ConversationState) -> ConversationState:
     return state
 
 
-def triage_agent(state: ConversationState) -> ConversationState:
+def screen_message(state: ConversationState) -> Dict[str, Any]:
     latest_message = state['messages'][-1]['content'] if state.get('messages') else ''
-    rag_matches = knowledge_base().query(latest_message, top_k=4)
-    rag_context = '\n'.join(match['document'] for match in rag_matches)
+    red_flags, _ = triage_rule_engine().scan(latest_message)
+    if not red_flags:
+        return {'red_flags': []}
+    # A red flag settles the level on its own; skip retrieval and the model call and go straight to facilities.
+    triage_result = triage_rule_engine().triage(latest_message)
+    backend_client().log_interaction({
+        'agentName': 'triage',
+        'inputSummary': latest_message[:200],
+        'outputSummary': triage_result.get('reason', '')[:200],
+        'triageLevel': 'emergency',
+    })
+    return {
+        'red_flags': red_flags,
+        'triage_result': triage_result,
+        'needs_facility': True,
+        'needs_programs': False,
+        'needs_follow_up': False,
+    }
 
-    rules = load_local_rules()
-    degraded = state.get('degraded_mode', False)
-    gemini = gemini_client()
+
+def route_after_screen(state: ConversationState) -> str:
+    return 'facility_finder' if state.get('red_flags') else 'triage_agent'
+
+
+def route_after_triage(state: ConversationState) -> List[str]:
+    selected = [node for node, flag in AGENT_NODES if state.get(flag)]
+    return selected or ['analytics']
+
+
+def route_next(after: str):
+    # Sequential graph: continue with the next agent that has work, in the fixed agent order.
+    nodes = [node for node, _ in AGENT_NODES]
+    remaining = AGENT_NODES[nodes.index(after) + 1:] if after in nodes else AGENT_NODES
+
+    def route(state: ConversationState) -> str:
+        return next((node for node, flag in remaining if state.get(flag)), 'analytics')
+
+    return route
+
+
+def triage_agent(state: ConversationState) -> ConversationState:
+    latest_message = latest_content(state)
+    # Batch runs retrieve for many messages in one call and hand the matches in with the state.
+    rag_matches = state.get('rag_matches')
+    if rag_matches is None:
+        with metrics_registry().track('knowledge', 'query'):
+            rag_matches = knowledge_base().query(latest_message, top_k=4)
+    # The rule result costs microseconds, so it is always ready as the fallback.
+    rule_result = rule_based_triage(latest_message)
     triage_result: Dict[str, Any] | None = None
+    future, timeout = submit_llm_triage(state, latest_message, rag_matches, rule_result)
+    if future is not None:
+        try:
+            triage_result = future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            # The call keeps running in the background and still fills the response cache.
+            triage_result = None
+        except Exception:
+            triage_result = None
+    state.update(triage_update(latest_message, triage_result, rule_result))
+    return state
 
-    if not degraded and gemini.available():
-        prompt = (
-            "You are a clinical triage assistant for Pakistan."
-            "Use the context below to classify the triage level as self-care, clinic, or emergency."
-            "Respond with a JSON object containing level, reason, recommendedUrgency, and disclaimer."
-            f"\nContext:\n{rag_context}\nUser message:\n{latest_message}"
-        )
+
+async def triage_agent_async(state: ConversationState) -> Dict[str, Any]:
+    # Same steps as triage_agent, but waiting on retrieval and the model call never holds an event-loop thread.
+    latest_message = latest_content(state)
+    rag_matches = state.get('rag_matches')
+    if rag_matches is None:
+        loop = asyncio.get_running_loop()
+        with metrics_registry().track('knowledge', 'query'):
+            rag_matches = await loop.run_in_executor(
+                None, contextvars.copy_context().run, functools.partial(knowledge_base().query, latest_message, top_k=4),
+            )
+    rule_result = rule_based_triage(latest_message)
+    triage_result: Dict[str, Any] | None = None
+    future, timeout = submit_llm_triage(state, latest_message, rag_matches, rule_result)
+    if future is not None:
         try:
-            response_text = gemini.generate(prompt, model_variant='smart')
-            if response_text:
-                triage_result = json.loads(response_text)
+            triage_result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # wait_for cancels only the wrapper; the model call keeps running and still fills the response cache.
+            triage_result = None
         except Exception:
             triage_result = None
+    return triage_update(latest_message, triage_result, rule_result)
+
+
+def latest_content(state: ConversationState) -> str:
+    return state['messages'][-1]['content'] if state.get('messages') else ''
+
+
+def submit_llm_triage(
+    state: ConversationState,
+    latest_message: str,
+    rag_matches: List[Dict[str, Any]],
+    rule_result: Dict[str, Any],
+) -> Tuple[Future | None, float]:
+    gemini = gemini_client()
+    if state.get('degraded_mode', False) or not gemini.available():
+        return None, 0.0
+    rag_context = '\n'.join(match['document'] for match in rag_matches)
+    history = conversation_history(state)
+    prompt = (
+        "You are a clinical triage assistant for Pakistan."
+        "Use the context below to classify the triage level as self-care, clinic, or emergency."
+        "Respond with a JSON object containing level, reason, recommendedUrgency, disclaimer,"
+        " and confidence (a number between 0 and 1)."
+        f"\nContext:\n{rag_context}"
+        + (f"\nConversation so far:\n{history}" if history else '')
+        + f"\nUser message:\n{latest_message}"
+    )
+    # Earlier turns change the answer, so they are part of the cache key alongside the retrieved context.
+    cache_context = f'{history}\n{rag_context}' if history else rag_context
+    # Without a latency budget the model call is not cut short, but the node still stops waiting eventually.
+    deadline = time.monotonic() + TRIAGE_DEADLINE_MS / 1000 if TRIAGE_DEADLINE_MS > 0 else None
+    timeout = (TRIAGE_DEADLINE_MS if TRIAGE_DEADLINE_MS > 0 else TRIAGE_MAX_WAIT_MS) / 1000
+    priority = triage_priority(rule_result, state.get('user_role'), bool(state.get('batch')))
+    # Run in a copy of this context so the model call is attributed to this request in metrics and traces.
+    future = _llm_executor.submit(
+        contextvars.copy_context().run, llm_triage, gemini, prompt, latest_message, cache_context, priority, deadline,
+    )
+    return future, timeout
+
+
+def triage_update(latest_message: str, triage_result: Dict[str, Any] | None, rule_result: Dict[str, Any]) -> Dict[str, Any]:
+    update: Dict[str, Any] = {}
     if triage_result is None:
-        triage_result = rule_based_triage(latest_message, rules)
-        state['degraded_mode'] = True
+        triage_result = rule_result
+        update['degraded_mode'] = True
 
     triage_result.setdefault('disclaimer', SAFETY_DISCLAIMER)
-    state['triage_result'] = triage_result
     level = str(triage_result.get('level', 'self-care')).lower()
-    state['needs_facility'] = level in {'clinic', 'emergency'}
-    state['needs_programs'] = True
-    state['needs_follow_up'] = level in {'clinic', 'emergency'}
+    update['triage_result'] = triage_result
+    update['needs_facility'] = level in {'clinic', 'emergency'}
+    update['needs_programs'] = True
+    update['needs_follow_up'] = level in {'clinic', 'emergency'}
 
     backend_client().log_interaction({
         'agentName': 'triage',
@@ -86,64 +219,157 @@ def triage_agent(state: ConversationState) -> ConversationState:
         'triageLevel': level,
     })
 
-    return state
+    return update
 
 
-def rule_based_triage(message: str, rules: Dict[str, Any]) -> Dict[str, Any]:
-    text = message.lower()
-    red_flags = ['difficulty breathing', 'unconscious', 'pregnancy bleeding', 'convulsion']
-    for flag in red_flags:
-        if flag in text:
-            return {
-                'level': 'emergency',
-                'reason': f'Red flag detected: {flag}',
-                'recommendedUrgency': 'Immediate emergency evaluation',
-                'disclaimer': SAFETY_DISCLAIMER,
-            }
-    for keyword, result in rules.items():
-        if keyword in text and isinstance(result, dict):
-            return {
-                'level': result.get('level', 'self-care'),
-                'reason': result.get('reason', 'Monitor at home'),
-                'recommendedUrgency': result.get('recommendedUrgency', 'Monitor'),
-                'disclaimer': result.get('disclaimer', SAFETY_DISCLAIMER),
-            }
-    default_rule = rules.get('default', {})
-    return {
-        'level': default_rule.get('level', 'self-care'),
-        'reason': default_rule.get('reason', 'Monitor at home'),
-        'recommendedUrgency': default_rule.get('recommendedUrgency', 'Monitor'),
-        'disclaimer': default_rule.get('disclaimer', SAFETY_DISCLAIMER),
-    }
+def conversation_history(state: ConversationState) -> str:
+    lines = [state['conversation_summary']] if state.get('conversation_summary') else []
+    lines.extend(summarize_turn(message) for message in (state.get('messages') or [])[:-1])
+    return '\n'.join(lines)
+
+
+def triage_priority(rule_result: Dict[str, Any], user_role: str | None, batch: bool = False) -> int:
+    # The rule verdict is a cheap proxy for urgency; health workers are serving patients in front of them.
+    # Uploaded backlogs queue behind live conversations unless the rules flag an emergency.
+    if str(rule_result.get('level', '')).lower() == 'emergency':
+        return EMERGENCY
+    if batch:
+        return BATCH
+    if user_role in PRIORITY_ROLES:
+        return PRIORITY_ROLE
+    return ROUTINE
+
+
+def llm_triage(
+    gemini: Any,
+    prompt: str,
+    message: str,
+    rag_context: str,
+    priority: int = ROUTINE,
+    deadline: float | None = None,
+) -> Dict[str, Any] | None:
+    if TRIAGE_FAST_FIRST:
+        try:
+            result = gemini.generate_json(
+                prompt,
+                model_variant='fast',
+                cache_key=response_cache_key(message, rag_context, gemini.model_name('fast'), TRIAGE_PROMPT_VERSION),
+                priority=priority,
+                deadline=deadline,
+                accept=is_confident,
+            )
+        except Exception:
+            result = None
+        if result is not None and is_confident(result):
+            return result
+    result = gemini.generate_json(
+        prompt,
+        model_variant='smart',
+        cache_key=response_cache_key(message, rag_context, gemini.model_name('smart'), TRIAGE_PROMPT_VERSION),
+        priority=priority,
+        deadline=deadline,
+        accept=is_triage_result,
+    )
+    # Anything that is not a usable verdict sends the caller to the rule fallback.
+    return result if is_triage_result(result) else None
+
+
+def is_triage_result(result: Any) -> bool:
+    return (
+        isinstance(result, dict)
+        and str(result.get('level', '')).lower() in TRIAGE_LEVELS
+        and isinstance(result.get('reason', ''), str)
+    )
+
+
+def is_confident(result: Any) -> bool:
+    if not is_triage_result(result):
+        return False
+    try:
+        confidence = float(result.get('confidence', 1.0))
+    except (TypeError, ValueError):
+        return False
+    return confidence >= TRIAGE_MIN_CONFIDENCE
+
+
+def rule_based_triage(message: str, rules: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    if rules is None:
+        return triage_rule_engine().triage(message)
+    return CompiledRules(rules).triage(message)
 
 
 def facility_finder_agent(state: ConversationState) -> ConversationState:
     if not state.get('needs_facility'):
         return state
+    payload = facility_search_payload(state)
+    try:
+        facilities = local_facilities(payload)
+        if facilities is None:
+            facilities = backend_client().search_facilities(payload)
+    except Exception as error:
+        facilities = offline_facilities(error)
+        state['degraded_mode'] = True
+    state['facility_recommendations'] = facilities[:3]
+    return state
+
+
+async def facility_finder_agent_async(state: ConversationState) -> Dict[str, Any]:
+    if not state.get('needs_facility'):
+        return dict(NO_UPDATE)
+    update: Dict[str, Any] = {}
+    payload = facility_search_payload(state)
+    try:
+        facilities = local_facilities(payload)
+        if facilities is None:
+            facilities = await async_backend_client().search_facilities(payload)
+    except Exception as error:
+        facilities = offline_facilities(error)
+        update['degraded_mode'] = True
+    update['facility_recommendations'] = facilities[:3]
+    return update
+
+
+def facility_search_payload(state: ConversationState) -> Dict[str, Any]:
     patient_context = state.get('patient_context', {})
     search_payload: Dict[str, Any] = {
         'district': patient_context.get('district'),
         'tehsil': patient_context.get('tehsil'),
-        'lat': patient_context.get('lat'),
-        'lng': patient_context.get('lng'),
+        'lat': coordinate(patient_context.get('lat'), 90.0),
+        'lng': coordinate(patient_context.get('lng'), 180.0),
         'requiredServices': derive_services_from_triage(state.get('triage_result')),
     }
-    facilities: List[Dict[str, Any]] = []
+    return {k: v for k, v in search_payload.items() if v is not None}
+
+
+def coordinate(value: Any, limit: float) -> float | None:
+    # patient_context is free-form: clients send numbers, numeric strings or junk. Anything unusable is left out.
+    if isinstance(value, bool):
+        return None
     try:
-        facilities = backend_client().search_facilities({k: v for k, v in search_payload.items() if v is not None})
-    except Exception as error:
-        facilities = [{
-            'name': 'Local clinic (offline suggestion)',
-            'type': 'clinic',
-            'distanceKm': None,
-            'isOpen': True,
-            'servicesSummary': ['basic care'],
-            'stockAlerts': [],
-            'error': str(error),
-        }]
-        state['degraded_mode'] = True
-    state['facility_recommendations'] = facilities[:3]
-    return state
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and abs(number) <= limit else None
+
+
+def local_facilities(payload: Dict[str, Any]) -> List[Dict[str, Any]] | None:
+    # None means there is no usable snapshot yet (first sync pending or too stale); ask the backend instead.
+    directory = facility_directory()
+    if directory is None:
+        return None
+    return directory.search(payload)
+
+
+def offline_facilities(error: Exception) -> List[Dict[str, Any]]:
+    return [{
+        'name': 'Local clinic (offline suggestion)',
+        'type': 'clinic',
+        'distanceKm': None,
+        'isOpen': True,
+        'servicesSummary': ['basic care'],
+        'stockAlerts': [],
+        'error': str(error),
+    }]
 
 
 def derive_services_from_triage(result: Dict[str, Any] | None) -> List[str] | None:
@@ -160,8 +386,39 @@ def derive_services_from_triage(result: Dict[str, Any] | None) -> List[str] | No
 def program_eligibility_agent(state: ConversationState) -> ConversationState:
     if not state.get('needs_programs'):
         return state
+    payload = program_eligibility_payload(state)
+    programs = eligibility_cache().get(payload)
+    if programs is None:
+        try:
+            programs = backend_client().program_eligibility(payload)
+            eligibility_cache().store(payload, programs)
+        except Exception as error:
+            programs = offline_programs(error)
+            state['degraded_mode'] = True
+    state['program_eligibility'] = programs
+    return state
+
+
+async def program_eligibility_agent_async(state: ConversationState) -> Dict[str, Any]:
+    if not state.get('needs_programs'):
+        return dict(NO_UPDATE)
+    update: Dict[str, Any] = {}
+    payload = program_eligibility_payload(state)
+    programs = eligibility_cache().get(payload)
+    if programs is None:
+        try:
+            programs = await async_backend_client().program_eligibility(payload)
+            eligibility_cache().store(payload, programs)
+        except Exception as error:
+            programs = offline_programs(error)
+            update['degraded_mode'] = True
+    update['program_eligibility'] = programs
+    return update
+
+
+def program_eligibility_payload(state: ConversationState) -> Dict[str, Any]:
     patient_context = state.get('patient_context', {})
-    payload = {
+    return {
         'patientId': patient_context.get('id'),
         'age': patient_context.get('age', 25),
         'gender': patient_context.get('gender', 'female'),
@@ -169,65 +426,91 @@ def program_eligibility_agent(state: ConversationState) -> ConversationState:
         'incomeBracket': patient_context.get('incomeBracket', 'low'),
         'hasMockSehatCard': patient_context.get('hasMockSehatCard', True),
     }
+
+
+def offline_programs(error: Exception) -> List[Dict[str, Any]]:
+    return [{
+        'programId': 0,
+        'name': 'Offline maternal voucher',
+        'likelyEligible': True,
+        'reason': f'Offline fallback due to {error}',
+        'mockApplication': {
+            'instructions': 'Visit nearest LHW office with placeholder CNIC 12345-xxxxxxx-x.',
+            'contact': 'LHW supervisor',
+        },
+    }]
+
+
+def follow_up_agent(state: ConversationState) -> ConversationState:
+    if not state.get('needs_follow_up'):
+        return state
+    payload = reminder_payload(state)
+    reminders = state.get('reminders', [])
     try:
-        programs = backend_client().program_eligibility(payload)
+        reminder = backend_client().create_reminder(payload)
+        reminders.append(reminder)
     except Exception as error:
-        programs = [{
-            'programId': 0,
-            'name': 'Offline maternal voucher',
-            'likelyEligible': True,
-            'reason': f'Offline fallback due to {error}',
-            'mockApplication': {
-                'instructions': 'Visit nearest LHW office with placeholder CNIC 12345-xxxxxxx-x.',
-                'contact': 'LHW supervisor',
-            },
-        }]
+        reminders.append(offline_reminder(payload, error))
         state['degraded_mode'] = True
-    state['program_eligibility'] = programs
+    state['reminders'] = reminders
     return state
 
 
-def follow_up_agent(state: ConversationState) -> ConversationState:
+async def follow_up_agent_async(state: ConversationState) -> Dict[str, Any]:
     if not state.get('needs_follow_up'):
-        return state
+        return dict(NO_UPDATE)
+    payload = reminder_payload(state)
+    update: Dict[str, Any] = {}
+    reminders = list(state.get('reminders', []))
+    try:
+        reminder = await async_backend_client().create_reminder(payload)
+        reminders.append(reminder)
+    except Exception as error:
+        reminders.append(offline_reminder(payload, error))
+        update['degraded_mode'] = True
+    update['reminders'] = reminders
+    return update
+
+
+def reminder_payload(state: ConversationState) -> Dict[str, Any]:
     patient_context = state.get('patient_context', {})
-    patient_id = patient_context.get('id', 1)
     triage = state.get('triage_result', {})
     reminder_type = 'followup' if triage.get('level') == 'clinic' else 'medication'
     schedule_in_days = 1 if triage.get('level') == 'emergency' else 3
-    payload = {
-        'patientId': patient_id,
+    return {
+        'patientId': patient_context.get('id', 1),
         'type': reminder_type,
         'message': f"Follow-up after triage result: {triage.get('level', 'self-care')}",
         'scheduledAt': (datetime.utcnow() + timedelta(days=schedule_in_days)).isoformat() + 'Z',
     }
-    reminders = state.get('reminders', [])
-    try:
-        reminder = backend_client().create_reminder(payload)
-        reminders.append(reminder)
-    except Exception as error:
-        reminders.append({
-            'patientId': patient_id,
-            'type': reminder_type,
-            'message': payload['message'],
-            'scheduledAt': payload['scheduledAt'],
-            'status': 'scheduled',
-            'note': f'Offline reminder due to {error}',
-        })
-        state['degraded_mode'] = True
-    state['reminders'] = reminders
-    return state
+
+
+def offline_reminder(payload: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    return {
+        'patientId': payload['patientId'],
+        'type': payload['type'],
+        'message': payload['message'],
+        'scheduledAt': payload['scheduledAt'],
+        'status': 'scheduled',
+        'note': f'Offline reminder due to {error}',
+    }
 
 
 def analytics_agent(state: ConversationState) -> ConversationState:
-    triage = state.get('triage_result', {})
-    level = str(triage.get('level', '')).lower()
-    if level == 'emergency':
-        state['analytics_flags'].append({
-            'type': 'potential-hotspot',
-            'message': 'Emergency case detected; monitor for clustering.',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-        })
+    detector = hotspot_detector()
+    context = state.get('patient_context') or {}
+    district = str(context.get('district') or '').strip()
+    # Batch uploads replay past visits, which would read as a surge happening now.
+    if detector is None or not district or state.get('batch'):
+        return state
+    triage = state.get('triage_result') or {}
+    level = str(triage.get('level') or 'self-care').lower()
+    latest_message = state['messages'][-1]['content'] if state.get('messages') else ''
+    red_flags, keywords = triage_rule_engine().scan(latest_message)
+    tehsil = str(context.get('tehsil') or '').strip() or None
+    alert = detector.observe(district, tehsil, level, red_flags + keywords)
+    if alert is not None:
+        state['analytics_flags'].append({**alert, 'timestamp': datetime.utcnow().isoformat() + 'Z'})
     return state
 
 
@@ -276,22 +559,45 @@ def finalize_agent(state: ConversationState) -> ConversationState:
     return state
 
 
-def build_graph() -> StateGraph:
+def build_graph(async_mode: bool = False) -> StateGraph:
+    # langgraph pulls in langchain-core; import it when the graph is built rather than with the module.
+    from langgraph.graph import END, StateGraph
+
     graph = StateGraph(ConversationState)
-    graph.add_node('ingest', ingest_message)
-    graph.add_node('triage_agent', triage_agent)
-    graph.add_node('facility_finder', facility_finder_agent)
-    graph.add_node('program_eligibility', program_eligibility_agent)
-    graph.add_node('follow_up', follow_up_agent)
-    graph.add_node('analytics', analytics_agent)
-    graph.add_node('finalize', finalize_agent)
+    metrics = metrics_registry()
+
+    def add(node: str, function: Any) -> None:
+        graph.add_node(node, metrics.instrument_node(node, function))
+
+    add('ingest', ingest_message)
+    add('screen', screen_message)
+    if async_mode:
+        add('triage_agent', triage_agent_async)
+        add('facility_finder', facility_finder_agent_async)
+        add('program_matcher', program_eligibility_agent_async)
+        add('follow_up', follow_up_agent_async)
+    else:
+        add('triage_agent', triage_agent)
+        add('facility_finder', facility_finder_agent)
+        add('program_matcher', program_eligibility_agent)
+        add('follow_up', follow_up_agent)
+    add('analytics', analytics_agent)
+    add('finalize', finalize_agent)
 
     graph.set_entry_point('ingest')
-    graph.add_edge('ingest', 'triage_agent')
-    graph.add_edge('triage_agent', 'facility_finder')
-    graph.add_edge('facility_finder', 'program_eligibility')
-    graph.add_edge('program_eligibility', 'follow_up')
-    graph.add_edge('follow_up', 'analytics')
+    graph.add_edge('ingest', 'screen')
+    graph.add_conditional_edges('screen', route_after_screen, ['triage_agent', 'facility_finder'])
+    agents = [node for node, _ in AGENT_NODES]
+    if async_mode:
+        # Agents with work to do fan out in one superstep and fan back in before analytics;
+        # the red-flag path reaches facility_finder directly from screen.
+        graph.add_conditional_edges('triage_agent', route_after_triage, agents + ['analytics'])
+        for node in agents:
+            graph.add_edge(node, 'analytics')
+    else:
+        graph.add_conditional_edges('triage_agent', route_next('triage_agent'), agents + ['analytics'])
+        for index, node in enumerate(agents):
+            graph.add_conditional_edges(node, route_next(node), agents[index + 1:] + ['analytics'])
     graph.add_edge('analytics', 'finalize')
     graph.add_edge('finalize', END)
 
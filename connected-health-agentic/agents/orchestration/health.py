@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class BackendUnavailable(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                # Only one trial request is let through while half-open.
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self) -> None:
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._trial_in_flight = False
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+
+
+class BackendHealth:
+    def __init__(
+        self,
+        probe: Callable[[], Dict[str, Any]],
+        breaker: CircuitBreaker,
+        ttl: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.breaker = breaker
+        self.ttl = ttl
+        self._probe = probe
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._status: Dict[str, Any] | None = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = self._status
+            stale = status is None or self._clock() - self._checked_at >= self.ttl
+        if stale:
+            self._refresh_in_background()
+        return dict(status) if status else {'degraded_mode': False, 'checked': False}
+
+    def degraded(self) -> bool:
+        if self.breaker.state != CLOSED:
+            return True
+        return bool(self.status().get('degraded_mode'))
+
+    def refresh(self) -> Dict[str, Any]:
+        try:
+            status = dict(self._probe())
+            self.breaker.record_success()
+        except Exception as error:
+            status = {'degraded_mode': True, 'error': str(error)}
+            self.breaker.trip()
+        status['checked'] = True
+        with self._lock:
+            self._status = status
+            self._checked_at = self._clock()
+            self._refreshing = False
+        return status
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='backend-health', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.ttl)
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='backend-health-refresh', daemon=True).start()
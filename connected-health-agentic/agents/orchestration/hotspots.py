@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import math
+import os
+import socket
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+ANY = '*'
+SNAPSHOT_SUFFIX = '.json'
+KEY_SEPARATOR = '|'
+
+# (window count, history count) and (window count, baseline per window, score).
+Estimate = Tuple[int, int]
+Surge = Tuple[int, float, float]
+
+
+def hotspot_key(district: str, tehsil: str, level: str, condition: str) -> str:
+    return KEY_SEPARATOR.join(part.replace(KEY_SEPARATOR, ' ') for part in (district, tehsil, level, condition))
+
+
+@lru_cache(maxsize=16384)
+def _sketch_cells(key: str, depth: int, width: int) -> Tuple[int, ...]:
+    # A keyed digest rather than hash(): every worker must put a key in the same cells for snapshots to add up.
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * depth).digest()
+    return tuple(row * width + int.from_bytes(digest[4 * row:4 * row + 4], 'little') % width for row in range(depth))
+
+
+def _zeros(size: int, typecode: str = 'q') -> array:
+    return array(typecode, [0]) * size
+
+
+def _rank(key: str, surge: Surge) -> Tuple[float, bool, bool]:
+    # Ties go to the most specific hotspot: a tehsil over its district, a named condition over any condition.
+    _, tehsil, _, condition = key.split(KEY_SEPARATOR)
+    return surge[2], tehsil != ANY, condition != ANY
+
+
+class HotspotDetector:
+    def __init__(
+        self,
+        bucket_seconds: float = 300.0,
+        window_buckets: int = 12,
+        history_buckets: int = 288,
+        max_keys: int = 4096,
+        sketch_width: int = 1024,
+        sketch_depth: int = 4,
+        ratio: float = 3.0,
+        min_count: int = 5,
+        min_z: float = 3.5,
+        max_conditions: int = 3,
+        snapshot_dir: str | None = None,
+        sync_interval: float = 30.0,
+        worker_id: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, window_buckets)
+        self.history_buckets = max(history_buckets, self.window_buckets + 1)
+        self.window_hours = round(self.window_buckets * bucket_seconds / 3600, 2)
+        self.ratio = ratio
+        self.min_count = min_count
+        self.min_z = min_z
+        self.max_conditions = max_conditions
+        self.snapshot_dir = snapshot_dir
+        self.sync_interval = sync_interval
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._epoch = self._current_epoch()
+        self._started_epoch = self._epoch
+        # Exact ring-buffered counts for up to max_keys keys, plus running window and history totals per row.
+        self._counts = [_zeros(self.history_buckets, 'i') for _ in range(max_keys)]
+        self._recent = [0] * max_keys
+        self._total = [0] * max_keys
+        self._rows: Dict[str, int] = {}
+        self._free = list(range(max_keys - 1, -1, -1))
+        # Keys that find no free row go to a count-min sketch per bucket, which over-counts but never under-counts.
+        self._sketch_depth = sketch_depth
+        self._sketch_width = sketch_width
+        self._sketch = [_zeros(sketch_depth * sketch_width, 'i') for _ in range(self.history_buckets)]
+        self._sketch_recent = _zeros(sketch_depth * sketch_width)
+        self._sketch_total = _zeros(sketch_depth * sketch_width)
+        # Window and history totals merged from the other workers' latest snapshots.
+        self._peer_recent: Dict[str, int] = {}
+        self._peer_total: Dict[str, int] = {}
+        self._peer_sketch_recent = _zeros(sketch_depth * sketch_width)
+        self._peer_sketch_total = _zeros(sketch_depth * sketch_width)
+        self._peer_history = 0
+        self._peers = 0
+        # Keys currently over threshold, with the bucket they were last seen over it in.
+        self._alerts: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {'observed': 0, 'sketched': 0, 'alerts_raised': 0, 'syncs': 0, 'sync_errors': 0}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def observe(self, district: str, tehsil: str | None, level: str, conditions: Sequence[str]) -> Dict[str, Any] | None:
+        # A case counts towards the district and, when known, the tehsil, for any condition and for each matched one.
+        # Returns the strongest hotspot the case falls in, if any.
+        scopes = [ANY, tehsil] if tehsil else [ANY]
+        keys = [hotspot_key(district, scope, level, condition) for scope in scopes for condition in [ANY, *conditions[:self.max_conditions]]]
+        strongest: Tuple[Tuple[float, bool, bool], str, Surge] | None = None
+        with self._lock:
+            self._advance()
+            self._counters['observed'] += 1
+            for key in keys:
+                surge = self._evaluate(key, self._add(key))
+                if surge is not None and (strongest is None or _rank(key, surge) > strongest[0]):
+                    strongest = (_rank(key, surge), key, surge)
+        return None if strongest is None else self._alert(strongest[1], strongest[2])
+
+    def hotspots(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._advance()
+            current = [(key, self._evaluate(key, self._estimate(key))) for key in list(self._alerts)]
+        surges = sorted(((key, surge) for key, surge in current if surge is not None), key=lambda item: _rank(*item), reverse=True)
+        return [self._alert(key, surge) for key, surge in surges[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                'tracked_keys': len(self._rows),
+                'active_alerts': len(self._alerts),
+                'peers': self._peers,
+            }
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Only this worker's own counts, as window and history totals; peers' counts are never re-exported.
+        with self._lock:
+            self._advance()
+            return {
+                'epoch': self._epoch,
+                'history': self._history(),
+                'keys': {key: [self._recent[row], self._total[row]] for key, row in self._rows.items()},
+                'sketch_recent': self._sketch_recent.tolist(),
+                'sketch_total': self._sketch_total.tolist(),
+            }
+
+    def merge(self, snapshots: Iterable[Mapping[str, Any]]) -> int:
+        peer_recent: Dict[str, int] = {}
+        peer_total: Dict[str, int] = {}
+        size = self._sketch_depth * self._sketch_width
+        sketch_recent, sketch_total = [0] * size, [0] * size
+        history, peers = 0, 0
+        with self._lock:
+            self._advance()
+            epoch = self._epoch
+        for snapshot in snapshots:
+            # A worker that stopped writing snapshots has stopped serving; its window no longer describes now.
+            if snapshot['epoch'] < epoch - 1 or len(snapshot['sketch_recent']) != size:
+                continue
+            for key, (recent, total) in snapshot['keys'].items():
+                peer_recent[key] = peer_recent.get(key, 0) + recent
+                peer_total[key] = peer_total.get(key, 0) + total
+            sketch_recent = [mine + theirs for mine, theirs in zip(sketch_recent, snapshot['sketch_recent'])]
+            sketch_total = [mine + theirs for mine, theirs in zip(sketch_total, snapshot['sketch_total'])]
+            history = max(history, snapshot['history'])
+            peers += 1
+        with self._lock:
+            self._peer_recent, self._peer_total = peer_recent, peer_total
+            self._peer_sketch_recent, self._peer_sketch_total = array('q', sketch_recent), array('q', sketch_total)
+            self._peer_history, self._peers = history, peers
+            # Surges seen only by other workers still show up in this worker's hotspot list.
+            for key in peer_recent:
+                self._evaluate(key, self._estimate(key))
+        return peers
+
+    def sync(self) -> None:
+        if not self.snapshot_dir:
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = os.path.join(self.snapshot_dir, self.worker_id + SNAPSHOT_SUFFIX)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(self.snapshot(), fp, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            snapshots = []
+            for peer_path in glob.glob(os.path.join(self.snapshot_dir, '*' + SNAPSHOT_SUFFIX)):
+                if peer_path == path:
+                    continue
+                try:
+                    with open(peer_path, 'r', encoding='utf-8') as fp:
+                        snapshots.append(json.load(fp))
+                except (OSError, ValueError) as error:
+                    print('hotspot_snapshot_read_error', peer_path, error)
+            self.merge(snapshots)
+            self._counters['syncs'] += 1
+        except OSError as error:
+            self._counters['sync_errors'] += 1
+            print('hotspot_sync_error', error)
+
+    def start(self) -> None:
+        if self._thread is not None or not self.snapshot_dir:
+            return
+        self._thread = threading.Thread(target=self._run, name='hotspot-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.snapshot_dir:
+            try:
+                os.remove(os.path.join(self.snapshot_dir, self.worker_id + SNAPSHOT_SUFFIX))
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.sync_interval)
+
+    def _current_epoch(self) -> int:
+        return int(self._clock() // self.bucket_seconds)
+
+    def _history(self) -> int:
+        # Buckets before the current window that this worker has been counting for.
+        return min(self._epoch - self._started_epoch + 1, self.history_buckets) - self.window_buckets
+
+    def _advance(self) -> None:
+        # Caller holds the lock. Rotation walks every row once per bucket, so the per-message cost stays constant.
+        epoch = self._current_epoch()
+        if epoch <= self._epoch:
+            return
+        size = self._sketch_depth * self._sketch_width
+        if epoch - self._epoch >= self.history_buckets:
+            for row in self._rows.values():
+                self._counts[row] = _zeros(self.history_buckets, 'i')
+                self._recent[row] = self._total[row] = 0
+            self._sketch = [_zeros(size, 'i') for _ in range(self.history_buckets)]
+            self._sketch_recent, self._sketch_total = _zeros(size), _zeros(size)
+        else:
+            rows = list(self._rows.values())
+            for step in range(self._epoch + 1, epoch + 1):
+                leaving = (step - self.window_buckets) % self.history_buckets
+                slot = step % self.history_buckets
+                for row in rows:
+                    counts = self._counts[row]
+                    self._recent[row] -= counts[leaving]
+                    self._total[row] -= counts[slot]
+                    counts[slot] = 0
+                if any(self._sketch[leaving]):
+                    self._sketch_recent = array('q', map(int.__sub__, self._sketch_recent, self._sketch[leaving]))
+                if any(self._sketch[slot]):
+                    self._sketch_total = array('q', map(int.__sub__, self._sketch_total, self._sketch[slot]))
+                    self._sketch[slot] = _zeros(size, 'i')
+        self._epoch = epoch
+        for key, row in list(self._rows.items()):
+            if not self._total[row]:
+                del self._rows[key]
+                self._free.append(row)
+        expired = [key for key, seen in self._alerts.items() if seen <= epoch - self.window_buckets]
+        for key in expired:
+            del self._alerts[key]
+
+    def _add(self, key: str) -> Estimate:
+        # Caller holds the lock.
+        row = self._rows.get(key)
+        if row is None and self._free:
+            row = self._free.pop()
+            self._rows[key] = row
+        if row is not None:
+            self._counts[row][self._epoch % self.history_buckets] += 1
+            self._recent[row] += 1
+            self._total[row] += 1
+        else:
+            self._counters['sketched'] += 1
+            bucket = self._sketch[self._epoch % self.history_buckets]
+            for cell in _sketch_cells(key, self._sketch_depth, self._sketch_width):
+                bucket[cell] += 1
+                self._sketch_recent[cell] += 1
+                self._sketch_total[cell] += 1
+        return self._estimate(key)
+
+    def _estimate(self, key: str) -> Estimate:
+        # Caller holds the lock. Window and history counts for the key across this worker and its peers.
+        row = self._rows.get(key)
+        if row is not None:
+            recent, total = self._recent[row], self._total[row]
+        else:
+            cells = _sketch_cells(key, self._sketch_depth, self._sketch_width)
+            recent = min(map(self._sketch_recent.__getitem__, cells))
+            total = min(map(self._sketch_total.__getitem__, cells))
+        if key in self._peer_recent:
+            recent += self._peer_recent[key]
+            total += self._peer_total[key]
+        elif self._peers:
+            cells = _sketch_cells(key, self._sketch_depth, self._sketch_width)
+            recent += min(map(self._peer_sketch_recent.__getitem__, cells))
+            total += min(map(self._peer_sketch_total.__getitem__, cells))
+        return recent, total
+
+    def _evaluate(self, key: str, estimate: Estimate) -> Surge | None:
+        # Caller holds the lock. Baseline is the average count per window over the history before the current one.
+        # Until a full window of history exists (here or on a peer) every busy key would look like a surge.
+        recent, total = estimate
+        history = max(self._history(), self._peer_history)
+        baseline = (total - recent) * self.window_buckets / max(history, 1)
+        if history < self.window_buckets or recent < self.min_count or recent < self.ratio * baseline:
+            self._alerts.pop(key, None)
+            return None
+        # Counts are roughly Poisson; on the square-root scale they have unit variance, so this is a z-score that
+        # keeps thin keys (a tehsil and one condition) from firing on chance bunching.
+        score = 2 * (math.sqrt(recent) - math.sqrt(baseline))
+        if score < self.min_z:
+            self._alerts.pop(key, None)
+            return None
+        if key not in self._alerts:
+            self._counters['alerts_raised'] += 1
+        self._alerts[key] = self._epoch
+        return recent, baseline, score
+
+    def _alert(self, key: str, surge: Surge) -> Dict[str, Any]:
+        district, tehsil, level, condition = key.split(KEY_SEPARATOR)
+        recent, baseline, score = surge
+        return {
+            'type': 'potential-hotspot',
+            'district': district,
+            'tehsil': None if tehsil == ANY else tehsil,
+            'level': level,
+            'condition': None if condition == ANY else condition,
+            'cases': recent,
+            'baseline': round(baseline, 2),
+            'windowHours': self.window_hours,
+            'score': round(score, 2),
+            'message': (
+                f"{recent} {level} cases{'' if condition == ANY else f' mentioning {condition}'} in "
+                f"{district if tehsil == ANY else f'{tehsil}, {district}'} in the last {self.window_hours:g}h "
+                f'(usual: {baseline:.1f}); check for a local outbreak.'
+            ),
+        }
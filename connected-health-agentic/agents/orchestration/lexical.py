@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Sequence
+
+from .cache import normalize_message
+from .seeding import record_document, record_metadata
+
+LEXICAL_ONLY_MAX_TERMS = int(os.getenv('RAG_LEXICAL_ONLY_MAX_TERMS', '3'))
+RRF_K = int(os.getenv('RAG_RRF_K', '60'))
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'for', 'has', 'have', 'i', 'in', 'is', 'it', 'my', 'of', 'on', 'or', 'the', 'to', 'with',
+    'aur', 'hai', 'hain', 'ho', 'ka', 'ke', 'ki', 'ko', 'main', 'mein', 'mera', 'meri', 'se', 'ta', 'tha', 'thi', 'ye',
+    'ہے', 'ہیں', 'کا', 'کی', 'کے', 'کو', 'میں', 'سے', 'اور',
+}
+_REPEATS = re.compile(r'(.)\1+')
+
+
+def tokenize(text: str) -> List[str]:
+    # Squeezing repeated letters folds common roman-Urdu spellings together (bukhaar/bukhar, saans/sans).
+    return [_REPEATS.sub(r'\1', token) for token in normalize_message(text).split() if token not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, records: Sequence[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._ids = [record['id'] for record in records]
+        self._documents = [record_document(record) for record in records]
+        self._metadatas = [record_metadata(record) for record in records]
+        self._postings: Dict[str, List[tuple]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for index, document in enumerate(self._documents):
+            terms = Counter(tokenize(document))
+            self._lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings[term].append((index, frequency))
+        count = len(self._documents)
+        self._average_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(
+        self,
+        text: str,
+        top_k: int = 4,
+        language: str | None = None,
+        tags: Sequence[str] | None = None,
+        terms: List[str] | None = None,
+    ) -> List[Dict[str, Any]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms if terms is not None else tokenize(text)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for index, frequency in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._average_length)
+                scores[index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        matches = []
+        for index, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            metadata = self._metadatas[index]
+            if language is not None and metadata.get('language') != language:
+                continue
+            if tags and not set(tags) <= set(metadata.get('tags', '').split(',')):
+                continue
+            matches.append({'id': self._ids[index], 'document': self._documents[index], 'metadata': metadata, 'score': score})
+            if len(matches) >= top_k:
+                break
+        return matches
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict[str, Any]]], top_k: int, k: int = RRF_K) -> List[Dict[str, Any]]:
+    fused: Dict[str, float] = defaultdict(float)
+    items: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, match in enumerate(results):
+            fused[match['id']] += 1.0 / (k + rank + 1)
+            items.setdefault(match['id'], match)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [{**items[doc_id], 'score': fused[doc_id]} for doc_id in ranked]
+
+
+class HybridKnowledgeBase:
+    def __init__(self, records: Sequence[Dict[str, Any]], vector_factory: Callable[[], Any]) -> None:
+        self.lexical = BM25Index(records)
+        self._vector_factory = vector_factory
+        self._vector: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def vector(self) -> Any:
+        # Built on first use so lexical-only traffic never loads the embedding model.
+        if self._vector is None:
+            with self._lock:
+                if self._vector is None:
+                    self._vector = self._vector_factory()
+        return self._vector
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 4,
+        language: str | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> List[Dict[str, Any]]:
+        if not text.strip():
+            return []
+        terms = tokenize(text)
+        lexical = self.lexical.search(text, top_k=top_k * 2, language=language, tags=tags, terms=terms)
+        if lexical and len(terms) <= LEXICAL_ONLY_MAX_TERMS:
+            return lexical[:top_k]
+        vector = self.vector.query(text, top_k=top_k * 2, language=language, tags=tags)
+        return reciprocal_rank_fusion([lexical, vector], top_k=top_k)
+
+    def query_many(
+        self,
+        texts: Sequence[str],
+        top_k: int = 4,
+        language: str | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> List[List[Dict[str, Any]]]:
+        results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        lexical_results: Dict[int, List[Dict[str, Any]]] = {}
+        needs_vector: List[int] = []
+        for index, text in enumerate(texts):
+            if not text.strip():
+                continue
+            terms = tokenize(text)
+            lexical = self.lexical.search(text, top_k=top_k * 2, language=language, tags=tags, terms=terms)
+            if lexical and len(terms) <= LEXICAL_ONLY_MAX_TERMS:
+                results[index] = lexical[:top_k]
+            else:
+                lexical_results[index] = lexical
+                needs_vector.append(index)
+        if needs_vector:
+            vectors = self.vector.query_many([texts[index] for index in needs_vector], top_k=top_k * 2, language=language, tags=tags)
+            for index, vector in zip(needs_vector, vectors):
+                results[index] = reciprocal_rank_fusion([lexical_results[index], vector], top_k=top_k)
+        return results
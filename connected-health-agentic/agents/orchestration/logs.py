@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from .health import BackendUnavailable
+
+SPILL_PREFIX = 'spill-'
+REPLAY_PREFIX = 'replay-'
+DEAD_LETTER_PREFIX = 'dead-'
+# The backend bulk routes reject larger batches.
+MAX_BULK_ITEMS = 500
+
+
+def retryable(error: Exception) -> bool:
+    # Outages and overload clear up on their own; any other rejection would fail the same way on every replay.
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, (httpx.TransportError, BackendUnavailable))
+
+
+def utc_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class LogShipper:
+    def __init__(
+        self,
+        send_batch: Callable[[str, List[Dict[str, Any]]], None],
+        spill_dir: str,
+        max_queue: int = 10000,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        replay_interval: float = 30.0,
+    ) -> None:
+        self.spill_dir = spill_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self._send_batch = send_batch
+        self._queue: queue.Queue[Tuple[str, Dict[str, Any]]] = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._thread: threading.Thread | None = None
+        self._claims = count()
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> None:
+        # Stamp the event time now; a replayed log would otherwise be dated when the backend finally stored it.
+        payload = {'createdAt': utc_timestamp(), **payload}
+        self._idle.clear()
+        try:
+            self._queue.put_nowait((kind, payload))
+            self._counters['submitted'] += 1
+        except queue.Full:
+            # Never block the request path; overflow goes straight to disk.
+            self._spill([(kind, payload)])
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._drain()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._idle.wait(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, 'queued': self._queue.qsize()}
+
+    def _run(self) -> None:
+        next_replay = time.monotonic()
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._ship(batch)
+            else:
+                self._idle.set()
+            if time.monotonic() >= next_replay:
+                self.replay()
+                next_replay = time.monotonic() + self.replay_interval
+
+    def _collect(self) -> List[Tuple[str, Dict[str, Any]]]:
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> None:
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._ship(batch)
+
+    def _ship(self, batch: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for kind, payload in batch:
+            grouped[kind].append(payload)
+        ok = True
+        for kind, payloads in grouped.items():
+            for start in range(0, len(payloads), MAX_BULK_ITEMS):
+                chunk = payloads[start:start + MAX_BULK_ITEMS]
+                try:
+                    self._send_batch(kind, chunk)
+                    self._counters['shipped'] += len(chunk)
+                except Exception as error:
+                    print('log_ship_error', kind, error)
+                    if retryable(error):
+                        self._spill([(kind, payload) for payload in chunk])
+                        ok = False
+                    else:
+                        self._dead_letter(kind, chunk, error)
+        return ok
+
+    def _spill(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        path = os.path.join(self.spill_dir, f'{SPILL_PREFIX}{os.getpid()}.jsonl')
+        with self._spill_lock, open(path, 'a', encoding='utf-8') as fp:
+            for kind, payload in items:
+                fp.write(json.dumps({'kind': kind, 'payload': payload}, default=str) + '\n')
+        self._counters['spilled'] += len(items)
+
+    def _dead_letter(self, kind: str, payloads: List[Dict[str, Any]], error: Exception) -> None:
+        # Kept for inspection but never replayed.
+        path = os.path.join(self.spill_dir, f'{DEAD_LETTER_PREFIX}{os.getpid()}.jsonl')
+        with self._spill_lock, open(path, 'a', encoding='utf-8') as fp:
+            for payload in payloads:
+                fp.write(json.dumps({'kind': kind, 'payload': payload, 'error': str(error)}, default=str) + '\n')
+        self._counters['dead_lettered'] += len(payloads)
+
+    def replay(self) -> None:
+        # Claimed files left behind by a worker that died mid-replay go first, then spill files.
+        paths = sorted(glob.glob(os.path.join(self.spill_dir, f'{REPLAY_PREFIX}*.jsonl')))
+        paths += sorted(glob.glob(os.path.join(self.spill_dir, f'{SPILL_PREFIX}*.jsonl')))
+        for path in paths:
+            if not self._claimable(path):
+                continue
+            claimed = os.path.join(self.spill_dir, f'{REPLAY_PREFIX}{os.getpid()}-{time.time_ns()}-{next(self._claims)}.jsonl')
+            try:
+                with self._spill_lock:
+                    os.rename(path, claimed)
+            except OSError:
+                continue
+            with open(claimed, 'r', encoding='utf-8') as fp:
+                items = [(entry['kind'], entry['payload']) for entry in map(json.loads, filter(None, fp.read().splitlines()))]
+            for start in range(0, len(items), self.batch_size):
+                shipped = self._counters['shipped']
+                ok = self._ship(items[start:start + self.batch_size])
+                self._counters['replayed'] += self._counters['shipped'] - shipped
+                if not ok:
+                    # Still unreachable: put the rest back and wait for the next replay window.
+                    self._spill(items[start + self.batch_size:])
+                    os.remove(claimed)
+                    return
+            # Removed only once every item is shipped or back in a spill file, so a crash replays rather than loses logs.
+            os.remove(claimed)
+
+    @staticmethod
+    def _claimable(path: str) -> bool:
+        # Another live worker may still be appending to its spill file or replaying its claimed file.
+        name = os.path.basename(path)
+        prefix = REPLAY_PREFIX if name.startswith(REPLAY_PREFIX) else SPILL_PREFIX
+        try:
+            pid = int(name[len(prefix):-len('.jsonl')].split('-')[0])
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            # Only the shipper thread replays, so a claimed file with our pid is left over from an earlier process.
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
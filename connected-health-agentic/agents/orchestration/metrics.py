@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to model calls that run into the triage deadline.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+# (language, user_role) of the request being served; nodes set it from the state so worker threads see it too.
+_request_labels: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar('request_labels', default=('unknown', 'unknown'))
+_trace: contextvars.ContextVar[Dict[str, Any] | None] = contextvars.ContextVar('trace', default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _le(bound: Any) -> str:
+    return f'le="{bound}"'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(
+        self,
+        enabled: bool = True,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        trace_sample_rate: float = 0.0,
+        max_traces: int = 100,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.trace_sample_rate = trace_sample_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        # name -> labels -> [per-bucket counts..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Collector] = []
+        self._traces: deque[Dict[str, Any]] = deque(maxlen=max_traces)
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def observe(self, name: str, seconds: float, labels: Labels) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms[name].get(labels)
+            if series is None:
+                series = self._histograms[name][labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def increment(self, name: str, labels: Labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name][labels] += amount
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def instrument_node(self, node: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        if not self.enabled:
+            return function
+
+        def before(state: Dict[str, Any]) -> Tuple[Labels, bool, float]:
+            request = (str(state.get('language') or 'unknown'), str(state.get('user_role') or 'unknown'))
+            _request_labels.set(request)
+            labels = (('node', node), ('language', request[0]), ('role', request[1]))
+            return labels, bool(state.get('degraded_mode')), self._clock()
+
+        def after(labels: Labels, degraded: bool, started: float, result: Any, failed: bool) -> None:
+            elapsed = self._clock() - started
+            self.observe('agents_node_duration_seconds', elapsed, labels)
+            if failed:
+                self.increment('agents_node_errors_total', labels)
+            # Sync nodes mutate the state they were given, so compare against the flag read before the call.
+            elif not degraded and isinstance(result, dict) and result.get('degraded_mode'):
+                self.increment('agents_node_fallbacks_total', labels)
+            self._span(f'node:{node}', started, elapsed, failed)
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def run_async(state: Dict[str, Any]) -> Any:
+                labels, degraded, started = before(state)
+                result, failed = None, True
+                try:
+                    result = await function(state)
+                    failed = False
+                    return result
+                finally:
+                    after(labels, degraded, started, result, failed)
+            return run_async
+
+        @functools.wraps(function)
+        def run(state: Dict[str, Any]) -> Any:
+            labels, degraded, started = before(state)
+            result, failed = None, True
+            try:
+                result = function(state)
+                failed = False
+                return result
+            finally:
+                after(labels, degraded, started, result, failed)
+        return run
+
+    @contextmanager
+    def track(self, client: str, target: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        language, role = _request_labels.get()
+        labels = (('client', client), ('target', target), ('language', language), ('role', role))
+        started = self._clock()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            elapsed = self._clock() - started
+            self.observe('agents_client_duration_seconds', elapsed, labels)
+            if failed:
+                self.increment('agents_client_errors_total', labels)
+            self._span(f'{client}:{target}', started, elapsed, failed)
+
+    @contextmanager
+    def request(self, language: str, role: str) -> Iterator[Dict[str, Any]]:
+        # The caller sets outcome['degraded'] once the graph has finished, or outcome['error'] for errors it handles itself.
+        outcome: Dict[str, Any] = {'degraded': False, 'error': False}
+        if not self.enabled:
+            yield outcome
+            return
+        _request_labels.set((language, role))
+        trace = None
+        if self.trace_sample_rate > 0 and random.random() < self.trace_sample_rate:
+            trace = {'id': uuid.uuid4().hex, 'language': language, 'role': role, 'spans': []}
+            _trace.set(trace)
+        labels = (('language', language), ('role', role))
+        started = self._clock()
+        failed = True
+        try:
+            yield outcome
+            failed = False
+        finally:
+            elapsed = self._clock() - started
+            self.observe('agents_request_duration_seconds', elapsed, labels)
+            status = 'error' if failed or outcome['error'] else 'degraded' if outcome['degraded'] else 'ok'
+            self.increment('agents_requests_total', labels + (('outcome', status),))
+            if trace is not None:
+                _trace.set(None)
+                trace.update({'started_at': time.time() - elapsed, 'duration_ms': round(elapsed * 1000, 3), 'outcome': status})
+                for span in trace['spans']:
+                    span['start_ms'] = round((span.pop('started') - started) * 1000, 3)
+                with self._lock:
+                    self._traces.append(trace)
+
+    def traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._traces)[-limit:][::-1]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = {name: {labels: list(series) for labels, series in values.items()} for name, values in self._histograms.items()}
+            counters = {name: dict(values) for name, values in self._counters.items()}
+        for name in sorted(histograms):
+            self._header(lines, name, 'histogram')
+            for labels, series in sorted(histograms[name].items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, _le(bound))} {_format_value(cumulative)}')
+                cumulative += series[len(self.buckets)]
+                lines.append(f'{name}_bucket{_format_labels(labels, _le("+Inf"))} {_format_value(cumulative)}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(series[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {_format_value(cumulative)}')
+        for name in sorted(counters):
+            self._header(lines, name, 'counter')
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        gauges: Dict[str, List[str]] = defaultdict(list)
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges[name].append(f'{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}')
+            except Exception as error:
+                print('metrics_collector_error', error)
+        for name in sorted(gauges):
+            self._header(lines, name, 'gauge')
+            lines.extend(gauges[name])
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f'# HELP {name} {self._help[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    def _span(self, name: str, started: float, elapsed: float, failed: bool) -> None:
+        trace = _trace.get()
+        if trace is not None:
+            span: Dict[str, Any] = {'name': name, 'started': started, 'duration_ms': round(elapsed * 1000, 3)}
+            if failed:
+                span['error'] = True
+            trace['spans'].append(span)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from .seeding import MANIFEST_NAME, batched, load_records, plan_seed, record_document, record_metadata, write_manifest
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+SCALES_FILE = 'scales.npy'
+RECORDS_FILE = 'records.json'
+
+EmbeddingFunction = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+class VectorKnowledgeBase:
+    def __init__(
+        self,
+        index_path: str,
+        data_path: str,
+        embedding_function: EmbeddingFunction,
+        quantize: str = 'float32',
+    ) -> None:
+        if quantize not in {'float32', 'int8'}:
+            raise ValueError(f'Unsupported vector quantization: {quantize}')
+        self.index_path = index_path
+        self.data_path = data_path
+        self.quantize = quantize
+        self.model_id = getattr(embedding_function, 'model_id', 'unknown')
+        self._embed = embedding_function
+        os.makedirs(index_path, exist_ok=True)
+        self._build_if_stale()
+        self._load()
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 4,
+        language: str | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> List[Dict[str, Any]]:
+        return self.query_many([text], top_k=top_k, language=language, tags=tags)[0]
+
+    def query_many(
+        self,
+        texts: Sequence[str],
+        top_k: int = 4,
+        language: str | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> List[List[Dict[str, Any]]]:
+        results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        positions = [index for index, text in enumerate(texts) if text.strip()]
+        if not positions or not self._ids:
+            return results
+        candidates = self._candidates(language, tags)
+        if candidates is not None and not len(candidates):
+            return results
+        # One embedding call and one matrix product for the whole batch.
+        vectors = self._normalize(np.asarray(self._embed([texts[index] for index in positions]), dtype=np.float32))
+        all_scores = self.score(vectors.T)
+        if candidates is not None:
+            all_scores = all_scores[candidates]
+        k = min(top_k, len(all_scores))
+        for column, index in enumerate(positions):
+            scores = all_scores[:, column]
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = candidates[top] if candidates is not None else top
+            results[index] = [
+                {
+                    'id': self._ids[row],
+                    'document': self._documents[row],
+                    'metadata': self._metadatas[row],
+                    'score': float(score),
+                }
+                for row, score in zip(rows.tolist(), scores[top].tolist())
+            ]
+        return results
+
+    def score(self, vector: np.ndarray) -> np.ndarray:
+        # Accepts one vector or a (dim, n) block of them; int8 rows are rescaled per document.
+        if self._scales is not None:
+            scores = self._matrix @ vector
+            return scores * (self._scales[:, None] if scores.ndim == 2 else self._scales)
+        return self._matrix @ vector
+
+    def _candidates(self, language: str | None, tags: Sequence[str] | None) -> np.ndarray | None:
+        if language is None and not tags:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        if language is not None:
+            mask &= self._languages == language
+        for tag in tags or []:
+            mask &= np.fromiter((tag in row_tags for row_tags in self._tags), dtype=bool, count=len(self._ids))
+        return np.flatnonzero(mask)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_path, name)
+
+    def _build_if_stale(self) -> None:
+        # Workers starting together serialize here; the first one builds, the rest take the fast path.
+        with open(self._path('build.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stored = self._read_records()
+                stored_count = len(stored['ids']) if stored and os.path.exists(self._path(EMBEDDINGS_FILE)) else 0
+                manifest_path = self._path(MANIFEST_NAME)
+                plan = plan_seed(self.data_path, manifest_path, stored_count=stored_count)
+                # Vectors from another model or quantization are not comparable; re-embed everything.
+                compatible = stored.get('quantize') == self.quantize and stored.get('embedding_model') == self.model_id
+                if plan.unchanged and stored_count and compatible:
+                    return
+                self._rebuild(stored, plan.upserts if compatible else None)
+                write_manifest(manifest_path, plan.fingerprint, plan.hashes)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _rebuild(self, stored: Dict[str, Any], upserts: List[Dict[str, Any]] | None) -> None:
+        records = load_records(self.data_path)
+        reusable: Dict[str, int] = {}
+        previous: np.ndarray | None = None
+        if upserts is not None and stored.get('ids') and os.path.exists(self._path(EMBEDDINGS_FILE)):
+            changed = {record['id'] for record in upserts}
+            reusable = {doc_id: row for row, doc_id in enumerate(stored['ids']) if doc_id not in changed}
+            previous = self._dequantize(np.load(self._path(EMBEDDINGS_FILE)), stored)
+
+        to_embed = [record for record in records if record['id'] not in reusable]
+        fresh: Dict[str, np.ndarray] = {}
+        for batch in batched(to_embed):
+            vectors = self._normalize(np.asarray(self._embed([record_document(record) for record in batch]), dtype=np.float32))
+            fresh.update({record['id']: vector for record, vector in zip(batch, vectors)})
+
+        matrix = np.stack([
+            previous[reusable[record['id']]] if record['id'] in reusable else fresh[record['id']]
+            for record in records
+        ]) if records else np.zeros((0, 0), dtype=np.float32)
+        scales = None
+        if self.quantize == 'int8' and len(matrix):
+            scales = np.maximum(np.abs(matrix).max(axis=1), 1e-12).astype(np.float32) / 127.0
+            matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+
+        self._atomic_save(EMBEDDINGS_FILE, matrix)
+        if scales is not None:
+            self._atomic_save(SCALES_FILE, scales)
+        tmp_path = self._path(f'{RECORDS_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            json.dump({
+                'quantize': self.quantize,
+                'embedding_model': self.model_id,
+                'ids': [record['id'] for record in records],
+                'documents': [record_document(record) for record in records],
+                'metadatas': [record_metadata(record) for record in records],
+            }, fp, ensure_ascii=False)
+        os.replace(tmp_path, self._path(RECORDS_FILE))
+
+    def _atomic_save(self, name: str, array: np.ndarray) -> None:
+        tmp_path = self._path(f'{name}.{os.getpid()}.tmp.npy')
+        np.save(tmp_path, array)
+        # Readers that already mapped the old file keep its inode until they reload.
+        os.replace(tmp_path, self._path(name))
+
+    def _load(self) -> None:
+        stored = self._read_records()
+        self._ids: List[str] = stored['ids']
+        self._documents: List[str] = stored['documents']
+        self._metadatas: List[Dict[str, Any]] = stored['metadatas']
+        self._languages = np.array([metadata.get('language', 'en') for metadata in self._metadatas])
+        self._tags = [set(filter(None, metadata.get('tags', '').split(','))) for metadata in self._metadatas]
+        self._matrix = np.load(self._path(EMBEDDINGS_FILE), mmap_mode='r')
+        self._scales = np.load(self._path(SCALES_FILE)) if stored.get('quantize') == 'int8' else None
+
+    def _read_records(self) -> Dict[str, Any]:
+        try:
+            with open(self._path(RECORDS_FILE), 'r', encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def _dequantize(self, matrix: np.ndarray, stored: Dict[str, Any]) -> np.ndarray:
+        if stored.get('quantize') == 'int8':
+            return matrix.astype(np.float32) * np.load(self._path(SCALES_FILE))[:, None]
+        return matrix
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+TRIAGE_RULES_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'triage_rules.json')
+RULES_RELOAD_INTERVAL = float(os.getenv('TRIAGE_RULES_RELOAD_INTERVAL', '1.0'))
+SAFETY_DISCLAIMER = (
+    "This is a decision-support tool, not a doctor. In case of severe symptoms or doubt, go to the nearest emergency facility immediately."
+)
+
+RED_FLAGS: Dict[str, List[str]] = {
+    'difficulty breathing': ['saans nahi aa rahi', 'saans ruk rahi', 'سانس نہیں آ رہی'],
+    'unconscious': ['behosh', 'bay hosh', 'بے ہوش', 'بیہوش'],
+    'pregnancy bleeding': ['hamal mein khoon', 'حمل میں خون'],
+    'convulsion': ['jhatkay', 'jhatke', 'mirgi', 'جھٹکے', 'مرگی'],
+}
+
+RED_FLAG = 0
+KEYWORD = 1
+
+
+class PatternAutomaton:
+    def __init__(self, patterns: List[Tuple[str, Tuple[int, int, str]]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int, str]]] = [[]]
+        for pattern, payload in patterns:
+            self._insert(pattern.casefold(), payload)
+        self._link()
+
+    def _insert(self, pattern: str, payload: Tuple[int, int, str]) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(payload)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def search(self, text: str) -> List[Tuple[int, int, str]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found: List[Tuple[int, int, str]] = []
+        for char in text.casefold():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.extend(out[node])
+        return found
+
+
+class CompiledRules:
+    def __init__(self, rules: Dict[str, Any], red_flags: Dict[str, List[str]] | None = None) -> None:
+        red_flags = RED_FLAGS if red_flags is None else red_flags
+        patterns: List[Tuple[str, Tuple[int, int, str]]] = []
+        for rank, (flag, variants) in enumerate(red_flags.items()):
+            for pattern in [flag, *variants]:
+                patterns.append((pattern, (RED_FLAG, rank, flag)))
+        self.results: Dict[str, Dict[str, Any]] = {}
+        rank = 0
+        for keyword, result in rules.items():
+            if keyword == 'default' or not isinstance(result, dict):
+                continue
+            self.results[keyword] = _rule_result(result)
+            for pattern in [keyword, *result.get('keywords', [])]:
+                patterns.append((pattern, (KEYWORD, rank, keyword)))
+            rank += 1
+        self.default = _rule_result(rules.get('default', {}))
+        self.automaton = PatternAutomaton(patterns)
+
+    def scan(self, text: str) -> Tuple[List[str], List[str]]:
+        red_flags: Dict[str, int] = {}
+        keywords: Dict[str, int] = {}
+        for kind, rank, name in self.automaton.search(text):
+            bucket = red_flags if kind == RED_FLAG else keywords
+            bucket.setdefault(name, rank)
+        return sorted(red_flags, key=red_flags.get), sorted(keywords, key=keywords.get)
+
+    def triage(self, text: str) -> Dict[str, Any]:
+        red_flags, keywords = self.scan(text)
+        if red_flags:
+            return {
+                'level': 'emergency',
+                'reason': f'Red flag detected: {red_flags[0]}',
+                'recommendedUrgency': 'Immediate emergency evaluation',
+                'disclaimer': SAFETY_DISCLAIMER,
+            }
+        if keywords:
+            return dict(self.results[keywords[0]])
+        return dict(self.default)
+
+
+class TriageRuleEngine:
+    def __init__(self, path: str = TRIAGE_RULES_PATH, reload_interval: float = RULES_RELOAD_INTERVAL) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._checked_at = time.monotonic()
+        self._compiled = CompiledRules(_load_rules(path))
+
+    @property
+    def compiled(self) -> CompiledRules:
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            self._maybe_reload(now)
+        return self._compiled
+
+    def scan(self, text: str) -> Tuple[List[str], List[str]]:
+        return self.compiled.scan(text)
+
+    def triage(self, text: str) -> Dict[str, Any]:
+        return self.compiled.triage(text)
+
+    def _maybe_reload(self, now: float) -> None:
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                compiled = CompiledRules(_load_rules(self.path))
+            except (OSError, ValueError) as error:
+                # Keep serving the last good rule set if the file is mid-write or malformed.
+                print('triage_rules_reload_error', error)
+                return
+            self._compiled = compiled
+            self._mtime = mtime
+        finally:
+            self._lock.release()
+
+
+def _load_rules(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def _rule_result(rule: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'level': rule.get('level', 'self-care'),
+        'reason': rule.get('reason', 'Monitor at home'),
+        'recommendedUrgency': rule.get('recommendedUrgency', 'Monitor'),
+        'disclaimer': rule.get('disclaimer', SAFETY_DISCLAIMER),
+    }
+
+
+@lru_cache(maxsize=1)
+def triage_rule_engine() -> TriageRuleEngine:
+    return TriageRuleEngine()
+
+
+def triage_many(messages: List[str]) -> List[Dict[str, Any]]:
+    # Module-level so process pools can pickle it; each worker process compiles the rules once.
+    engine = triage_rule_engine()
+    return [engine.triage(message) for message in messages]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+SEED_BATCH_SIZE = int(os.getenv('KNOWLEDGE_SEED_BATCH_SIZE', '64'))
+MANIFEST_NAME = 'seed_manifest.json'
+
+
+@dataclass
+class SeedPlan:
+    fingerprint: Dict[str, Any]
+    hashes: Dict[str, str] = field(default_factory=dict)
+    upserts: List[Dict[str, Any]] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    unchanged: bool = False
+    has_manifest: bool = False
+
+
+def record_document(record: Dict[str, Any]) -> str:
+    return record['title'] + '\n' + record['content']
+
+
+def record_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Chroma metadata values must be scalars, so tags are stored comma-joined.
+    return {'language': record.get('language', 'en'), 'tags': ','.join(record.get('tags', []))}
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def load_records(data_path: str) -> List[Dict[str, Any]]:
+    with open(data_path, 'r', encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any] | None:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(manifest_path: str, fingerprint: Dict[str, Any], hashes: Dict[str, str]) -> None:
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fp:
+        json.dump({'source': fingerprint, 'records': hashes}, fp)
+    os.replace(tmp_path, manifest_path)
+
+
+def plan_seed(data_path: str, manifest_path: str, stored_count: int | None = None) -> SeedPlan:
+    stat = os.stat(data_path)
+    fingerprint: Dict[str, Any] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    manifest = load_manifest(manifest_path)
+    previous = manifest.get('source', {}) if manifest else {}
+    previous_hashes: Dict[str, str] = manifest.get('records', {}) if manifest else {}
+    # A store that lost records (e.g. wiped by hand) must not take the fast path.
+    store_intact = stored_count is None or stored_count == len(previous_hashes)
+
+    if manifest and store_intact and previous.get('mtime_ns') == fingerprint['mtime_ns'] and previous.get('size') == fingerprint['size']:
+        return SeedPlan(fingerprint=previous, hashes=previous_hashes, unchanged=True, has_manifest=True)
+
+    with open(data_path, 'rb') as fp:
+        raw = fp.read()
+    fingerprint['sha256'] = hashlib.sha256(raw).hexdigest()
+    if manifest and store_intact and previous.get('sha256') == fingerprint['sha256']:
+        # Touched but not edited; remember the new mtime so the next start is stat-only.
+        write_manifest(manifest_path, fingerprint, previous_hashes)
+        return SeedPlan(fingerprint=fingerprint, hashes=previous_hashes, unchanged=True, has_manifest=True)
+
+    records = json.loads(raw.decode('utf-8'))
+    plan = SeedPlan(fingerprint=fingerprint, has_manifest=manifest is not None and store_intact)
+    for record in records:
+        digest = record_hash(record)
+        plan.hashes[record['id']] = digest
+        if not store_intact or previous_hashes.get(record['id']) != digest:
+            plan.upserts.append(record)
+    plan.deletes = [record_id for record_id in previous_hashes if record_id not in plan.hashes]
+    return plan
+
+
+def batched(items: List[Any], size: int = SEED_BATCH_SIZE) -> List[List[Any]]:
+    return [items[index:index + size] for index in range(0, len(items), size)]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+try:  # pragma: no cover - optional dependency import guard
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore
+try:  # pragma: no cover - optional dependency import guard
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+# First byte of every stored blob records how it was written, so workers with different optional packages can share a store.
+MSGPACK = 0x01
+ZSTD = 0x02
+
+
+def encode_session(session: Dict[str, Any]) -> bytes:
+    flags = 0
+    if msgpack is not None:
+        payload = msgpack.packb(session, use_bin_type=True, default=str)
+        flags |= MSGPACK
+    else:
+        payload = json.dumps(session, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    if zstandard is not None:
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+        flags |= ZSTD
+    else:
+        payload = zlib.compress(payload, 6)
+    return bytes([flags]) + payload
+
+
+def decode_session(blob: bytes) -> Dict[str, Any] | None:
+    flags, payload = blob[0], blob[1:]
+    if (flags & MSGPACK and msgpack is None) or (flags & ZSTD and zstandard is None):
+        return None
+    payload = zstandard.ZstdDecompressor().decompress(payload) if flags & ZSTD else zlib.decompress(payload)
+    if flags & MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def summarize_turn(message: Dict[str, Any], max_chars: int = 160) -> str:
+    # Assistant replies open with "Triage level: ...", which is the part later turns need.
+    content = str(message.get('content', '')).strip()
+    if message.get('sender') == 'assistant':
+        content = content.split('\n', 1)[0]
+    return f"{message.get('sender', 'user')}: {content[:max_chars]}"
+
+
+def compact_session(
+    state: Dict[str, Any],
+    window: int = 8,
+    summary_chars: int = 800,
+) -> Dict[str, Any]:
+    messages: List[Dict[str, Any]] = list(state.get('messages') or [])
+    summary = state.get('conversation_summary') or ''
+    if len(messages) > window:
+        dropped, messages = messages[:-window], messages[-window:]
+        summary = '\n'.join(filter(None, [summary, *(summarize_turn(message) for message in dropped)]))
+        if len(summary) > summary_chars:
+            # Keep whole lines from the recent end; the oldest turns matter least.
+            summary = summary[-summary_chars:].split('\n', 1)[-1]
+    return {
+        'messages': messages,
+        'conversation_summary': summary,
+        'patient_context': dict(state.get('patient_context') or {}),
+        'turns': int(state.get('turns', 0) or 0) + 1,
+    }
+
+
+class SessionStore:
+    def __init__(
+        self,
+        path: str | None = None,
+        max_sessions: int = 1024,
+        window: int = 8,
+        summary_chars: int = 800,
+        ttl: float = 7 * 86400.0,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.window = window
+        self.summary_chars = summary_chars
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._counters: Dict[str, int] = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'saves': 0, 'bytes_written': 0}
+        self._db: sqlite3.Connection | None = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)')
+
+    def load(self, session_id: str) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            updated_at = entry[0] if entry else None
+            if self._db is not None:
+                # Another worker may have served the last turn; a primary-key lookup of the timestamp settles it.
+                row = self._db.execute('SELECT updated_at FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+                updated_at = row[0] if row else None
+            if entry is not None and entry[0] == updated_at and now - entry[0] < self.ttl:
+                self._entries.move_to_end(session_id)
+                self._counters['hits'] += 1
+                return entry[1]
+            if self._db is not None and updated_at is not None and now - updated_at < self.ttl:
+                row = self._db.execute('SELECT data FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+                session = decode_session(row[0]) if row else None
+                if session is not None:
+                    self._remember(session_id, updated_at, session)
+                    self._counters['disk_hits'] += 1
+                    return session
+            self._entries.pop(session_id, None)
+            self._counters['misses'] += 1
+            return {}
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        session = compact_session(state, window=self.window, summary_chars=self.summary_chars)
+        now = self._clock()
+        with self._lock:
+            self._remember(session_id, now, session)
+            if self._db is not None:
+                blob = encode_session(session)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)',
+                    (session_id, blob, now),
+                )
+                self._counters['bytes_written'] += len(blob)
+            self._counters['saves'] += 1
+            # Abandoned sessions are never loaded again, so they are swept every so many saves rather than on read.
+            if self.purge_every > 0 and self._counters['saves'] % self.purge_every == 0:
+                self._purge(now - self.ttl)
+        return session
+
+    def purge_expired(self) -> None:
+        cutoff = self._clock() - self.ttl
+        with self._lock:
+            self._purge(cutoff)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, 'size': len(self._entries)}
+
+    def _purge(self, cutoff: float) -> None:
+        for session_id in [key for key, (updated_at, _) in self._entries.items() if updated_at <= cutoff]:
+            del self._entries[session_id]
+        if self._db is not None:
+            self._db.execute('DELETE FROM sessions WHERE updated_at <= ?', (cutoff,))
+
+    def _remember(self, session_id: str, updated_at: float, session: Dict[str, Any]) -> None:
+        self._entries[session_id] = (updated_at, session)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
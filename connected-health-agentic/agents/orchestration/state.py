@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Literal, TypedDict, List, Dict, Any
+import operator
+from typing import Annotated, Literal, TypedDict, List, Dict, Any
 
 
 class ConversationState(TypedDict, total=False):
@@ -8,14 +9,21 @@ class ConversationState(TypedDict, total=False):
     user_role: Literal["citizen", "lhw", "doctor", "admin"]
     language: Literal["en", "ur", "roman-ur"]
     messages: List[Dict[str, Any]]
+    conversation_summary: str
+    turns: int
     patient_context: Dict[str, Any]
     triage_result: Dict[str, Any] | None
+    red_flags: List[str]
+    rag_matches: List[Dict[str, Any]] | None
+    batch: bool
     program_eligibility: List[Dict[str, Any]]
     facility_recommendations: List[Dict[str, Any]]
     reminders: List[Dict[str, Any]]
     analytics_flags: List[Dict[str, Any]]
-    degraded_mode: bool
+    degraded_mode: Annotated[bool, operator.or_]
     done: bool
+    reply: str
+    incoming_message: Dict[str, Any] | None
     needs_facility: bool
     needs_programs: bool
     needs_follow_up: bool
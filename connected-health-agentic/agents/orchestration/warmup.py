@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+class WarmUp:
+    def __init__(
+        self,
+        stages: Sequence[Tuple[str, Callable[[], Any]]],
+        clock: Callable[[], float] = time.monotonic,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ) -> None:
+        self._stages: List[Tuple[str, Callable[[], Any]]] = list(stages)
+        self._clock = clock
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self._status: Dict[str, Dict[str, Any]] = {name: {'status': 'pending'} for name, _ in self._stages}
+        self._finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at: float | None = None
+        self._elapsed_ms: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self._finished.is_set() and all(stage['status'] == 'done' for stage in self._status.values())
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = self._clock()
+            self._thread = threading.Thread(target=self._run, name='warm-up', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        # Requests that arrive first start the warm-up themselves instead of loading the same models in parallel.
+        self.start()
+        return self._finished.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self._status.items()}
+        return {'ready': self.ready, 'elapsed_ms': self._elapsed_ms, 'stages': stages}
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        failed = [(name, stage) for name, stage in self._stages if not self._attempt(name, stage, 1)]
+        self._elapsed_ms = round((self._clock() - (self._started_at or 0.0)) * 1000, 1)
+        self._finished.set()
+        # Waiting requests are released after the first pass; failed stages keep retrying so /readyz can still turn 200.
+        attempt, delay = 1, self.retry_delay
+        while failed and not self._stop.wait(delay):
+            attempt += 1
+            failed = [(name, stage) for name, stage in failed if not self._attempt(name, stage, attempt)]
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _attempt(self, name: str, stage: Callable[[], Any], attempt: int) -> bool:
+        started = self._clock()
+        with self._lock:
+            self._status[name] = {'status': 'running', 'attempts': attempt}
+        try:
+            stage()
+            outcome: Dict[str, Any] = {'status': 'done', 'attempts': attempt}
+        except Exception as error:
+            # Later stages still run; the request path retries the failed component lazily as well.
+            print('warmup_stage_error', name, error)
+            outcome = {'status': 'failed', 'attempts': attempt, 'error': str(error)}
+        outcome['ms'] = round((self._clock() - started) * 1000, 1)
+        with self._lock:
+            self._status[name] = outcome
+        return outcome['status'] == 'done'
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Iterator, Tuple
+
+import httpx
+
+LANGGRAPH_URL = os.getenv('LANGGRAPH_URL', 'http://localhost:8000/run')
+BATCH_URL = os.getenv('LANGGRAPH_BATCH_URL', LANGGRAPH_URL.rstrip('/') + '/batch')
+
+
+def upload_chunks(path: str, chunk_size: int) -> Iterator[Tuple[str, str]]:
+    # Large uploads are split into several requests; CSV chunks repeat the header row.
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        if path.lower().endswith('.csv'):
+            header, *rows = list(csv.reader(handle))
+            for start in range(0, len(rows), chunk_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([header, *rows[start:start + chunk_size]])
+                yield 'text/csv', buffer.getvalue()
+            return
+        lines = [line for line in handle.read().splitlines() if line.strip()]
+    for start in range(0, len(lines), chunk_size):
+        yield 'application/x-ndjson', '\n'.join(lines[start:start + chunk_size]) + '\n'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Triage a JSONL or CSV file of cases through /run/batch.')
+    parser.add_argument('path', help='JSONL with one /run payload per line, or CSV with message, user_role, language and patient context columns')
+    parser.add_argument('--output', help='write NDJSON results here instead of stdout')
+    parser.add_argument('--fields', help='comma-separated state fields to return, or "all"')
+    parser.add_argument('--chunk-size', type=int, default=500, help='cases per request')
+    args = parser.parse_args()
+
+    params = {'fields': args.fields} if args.fields else {}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    done, failed = 0, 0
+    try:
+        with httpx.Client(timeout=httpx.Timeout(30.0, read=None)) as client:
+            for content_type, body in upload_chunks(args.path, args.chunk_size):
+                chunk_done = 0
+                with client.stream('POST', BATCH_URL, params=params, content=body.encode('utf-8'), headers={'content-type': content_type}) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        result = json.loads(line)
+                        result['index'] += done
+                        failed += 'error' in result
+                        chunk_done += 1
+                        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                        elapsed = time.perf_counter() - started
+                        print(f'\r{done + chunk_done} cases, {failed} errors, {(done + chunk_done) / elapsed:.1f}/s', end='', file=sys.stderr)
+                done += chunk_done
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
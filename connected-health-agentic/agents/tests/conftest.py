@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import os
+import sys
+
+# Tests import the service modules the same way main.py does, from the agents directory.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
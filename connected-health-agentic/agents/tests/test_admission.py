@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import List
+
+import pytest
+
+from orchestration.admission import BATCH, EMERGENCY, PRIORITY_ROLE, ROUTINE, AdmissionController, AdmissionShed
+from orchestration.graph import triage_priority
+
+
+def wait_for_queue(controller: AdmissionController, depth: int, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while controller.stats()['queue_depth'] != depth:
+        assert time.monotonic() < deadline, controller.stats()
+        time.sleep(0.001)
+
+
+def queue_call(controller: AdmissionController, priority: int, served: List[int], errors: List[AdmissionShed]) -> threading.Thread:
+    def call() -> None:
+        try:
+            with controller.slot(priority):
+                served.append(priority)
+        except AdmissionShed as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    return thread
+
+
+def test_queued_calls_are_served_most_urgent_first():
+    controller = AdmissionController(max_concurrent=1, max_queue=8, max_wait=5.0)
+    served: List[int] = []
+    errors: List[AdmissionShed] = []
+    threads = []
+    with controller.slot(ROUTINE):
+        for depth, priority in enumerate([BATCH, ROUTINE, PRIORITY_ROLE, EMERGENCY, ROUTINE], start=1):
+            threads.append(queue_call(controller, priority, served, errors))
+            wait_for_queue(controller, depth)
+    for thread in threads:
+        thread.join(5.0)
+    assert served == [EMERGENCY, PRIORITY_ROLE, ROUTINE, ROUTINE, BATCH]
+    assert not errors
+    assert controller.stats()['admitted'] == 6
+
+
+def test_full_queue_preempts_a_less_urgent_call():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=5.0)
+    served: List[int] = []
+    errors: List[AdmissionShed] = []
+    with controller.slot(ROUTINE):
+        batch = queue_call(controller, BATCH, served, errors)
+        wait_for_queue(controller, 1)
+        emergency = queue_call(controller, EMERGENCY, served, errors)
+        batch.join(5.0)
+        assert [error.priority for error in errors] == [BATCH]
+        assert 'preempted' in str(errors[0])
+        wait_for_queue(controller, 1)
+    emergency.join(5.0)
+    assert served == [EMERGENCY]
+    assert controller.stats()['preempted'] == 1
+
+
+def test_full_queue_sheds_a_call_that_ranks_no_higher():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=5.0)
+    served: List[int] = []
+    errors: List[AdmissionShed] = []
+    with controller.slot(ROUTINE):
+        queued = queue_call(controller, ROUTINE, served, errors)
+        wait_for_queue(controller, 1)
+        with pytest.raises(AdmissionShed, match='queue full'):
+            with controller.slot(ROUTINE):
+                pass
+    queued.join(5.0)
+    assert served == [ROUTINE]
+    assert controller.stats()['shed_queue_full'] == 1
+
+
+def test_call_is_shed_when_the_wait_budget_runs_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=8, max_wait=0.05)
+    with controller.slot(ROUTINE):
+        started = time.monotonic()
+        with pytest.raises(AdmissionShed, match='budget'):
+            with controller.slot(ROUTINE):
+                pass
+        assert time.monotonic() - started < 1.0
+    stats = controller.stats()
+    assert stats['shed_wait'] == 1 and stats['queue_depth'] == 0 and stats['in_flight'] == 0
+
+
+def test_call_past_its_deadline_is_shed_without_queueing():
+    controller = AdmissionController(max_concurrent=1)
+    with pytest.raises(AdmissionShed, match='deadline'):
+        with controller.slot(ROUTINE, deadline=time.monotonic() - 1):
+            pass
+    assert controller.stats()['queued'] == 0
+
+
+def test_rate_limits_halve_the_pool_and_successes_grow_it_back():
+    controller = AdmissionController(max_concurrent=8, min_concurrent=2)
+    controller.record_rate_limited()
+    assert controller.stats()['limit'] == 4
+    controller.record_rate_limited()
+    controller.record_rate_limited()
+    assert controller.stats()['limit'] == 2
+    controller.record_success()
+    assert controller.stats()['limit'] == 3
+
+
+def test_triage_priority_ranks_emergencies_roles_and_batches():
+    emergency, clinic = {'level': 'emergency'}, {'level': 'clinic'}
+    assert triage_priority(emergency, 'citizen', batch=True) == EMERGENCY
+    assert triage_priority(clinic, 'lhw', batch=True) == BATCH
+    assert triage_priority(clinic, 'doctor') == PRIORITY_ROLE
+    assert triage_priority(clinic, 'citizen') == ROUTINE
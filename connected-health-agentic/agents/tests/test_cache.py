@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+
+import pytest
+
+from benchmarks.stubs import StubGeminiClient
+from orchestration.cache import ResponseCache, normalize_message, response_cache_key
+from orchestration.graph import TRIAGE_PROMPT_VERSION, llm_triage
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def disk_rows(path: str) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+
+def test_key_ignores_case_punctuation_and_spacing():
+    assert normalize_message('  Bachay ko BUKHAR hai!!  ') == 'bachay ko bukhar hai'
+    key = response_cache_key('Bachay ko bukhar hai?', 'context', 'model', 'v1')
+    assert key == response_cache_key('bachay  ko bukhar hai', 'context', 'model', 'v1')
+    assert key != response_cache_key('bachay ko bukhar hai', 'other context', 'model', 'v1')
+    assert key != response_cache_key('bachay ko bukhar hai', 'context', 'other model', 'v1')
+    assert key != response_cache_key('bachay ko bukhar hai', 'context', 'model', 'v2')
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, clock=FakeClock())
+    cache.set('a', '1')
+    cache.set('b', '2')
+    assert cache.get('a') == '1'
+    cache.set('c', '3')
+    assert cache.get('b') is None
+    assert cache.get('a') == '1' and cache.get('c') == '3'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60.0, clock=clock)
+    cache.set('a', '1')
+    clock.now += 59.0
+    assert cache.get('a') == '1'
+    clock.now += 1.0
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_disk_tier_survives_a_new_instance_until_expiry(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'responses.sqlite')
+    ResponseCache(ttl=60.0, path=path, clock=clock).set('a', '1')
+
+    restarted = ResponseCache(ttl=60.0, path=path, clock=clock)
+    assert restarted.get('a') == '1'
+    assert restarted.stats()['disk_hits'] == 1
+
+    clock.now += 60.0
+    assert ResponseCache(ttl=60.0, path=path, clock=clock).get('a') is None
+
+
+def test_expired_rows_are_purged_as_the_cache_is_written(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'responses.sqlite')
+    cache = ResponseCache(ttl=60.0, path=path, purge_every=3, clock=clock)
+    cache.set('old-1', '1')
+    cache.set('old-2', '2')
+    clock.now += 120.0
+    assert disk_rows(path) == 2
+    cache.set('new', '3')
+    assert disk_rows(path) == 1
+    assert cache.get('new') == '3'
+
+
+def test_purge_expired_clears_both_tiers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'responses.sqlite')
+    cache = ResponseCache(ttl=60.0, path=path, purge_every=0, clock=clock)
+    cache.set('a', '1')
+    clock.now += 60.0
+    cache.purge_expired()
+    assert cache.stats()['size'] == 0
+    assert disk_rows(path) == 0
+
+
+@pytest.mark.parametrize('response', [['clinic'], '"clinic"', {'level': 'urgent', 'reason': 'x'}, {'level': 'clinic', 'reason': None}])
+def test_unusable_model_answers_are_neither_cached_nor_returned(response):
+    cache = ResponseCache(clock=FakeClock())
+    stub = StubGeminiClient(responses={'smart': response}, cache=cache)
+    for _ in range(2):
+        assert llm_triage(stub, 'prompt', 'fever', 'context') is None
+    assert stub.calls['smart'] == 2
+    assert cache.stats()['size'] == 0
+
+
+def test_usable_answers_are_replayed_from_the_cache():
+    cache = ResponseCache(clock=FakeClock())
+    stub = StubGeminiClient(cache=cache)
+    first = llm_triage(stub, 'prompt', 'fever', 'context')
+    assert llm_triage(stub, 'prompt', 'Fever!', 'context') == first
+    assert stub.calls['smart'] == 1
+
+
+def test_unusable_cached_entry_is_ignored():
+    cache = ResponseCache(clock=FakeClock())
+    stub = StubGeminiClient(cache=cache)
+    key = response_cache_key('fever', 'context', stub.model_name('smart'), TRIAGE_PROMPT_VERSION)
+    cache.set(key, json.dumps(['clinic']))
+    assert llm_triage(stub, 'prompt', 'fever', 'context')['level'] == 'clinic'
+    assert stub.calls['smart'] == 1
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+from orchestration import graph
+
+
+class BrokenDirectory:
+    def search(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise TypeError('index failure')
+
+
+def needs_facility(patient_context: Dict[str, Any]) -> Dict[str, Any]:
+    return {'needs_facility': True, 'patient_context': patient_context, 'triage_result': {'level': 'clinic'}}
+
+
+def test_string_coordinates_are_parsed_and_junk_is_dropped():
+    payload = graph.facility_search_payload(needs_facility({'lat': '33.6', 'lng': 73}))
+    assert (payload['lat'], payload['lng']) == (33.6, 73.0)
+    for lat, lng in [('north', '73.0'), (True, 73.0), (None, 73.0), ('nan', 73.0), (33.6, 'inf'), (95.0, 73.0), (33.6, 200.0)]:
+        payload = graph.facility_search_payload(needs_facility({'lat': lat, 'lng': lng, 'district': 'Lahore'}))
+        assert not ('lat' in payload and 'lng' in payload), (lat, lng)
+        assert payload['district'] == 'Lahore'
+
+
+def test_local_index_failure_falls_back_like_a_backend_error(monkeypatch):
+    monkeypatch.setattr(graph, 'facility_directory', lambda: BrokenDirectory())
+    state = graph.facility_finder_agent({**needs_facility({'lat': '33.6', 'lng': '73.0'}), 'degraded_mode': False})
+    assert state['degraded_mode'] is True
+    assert state['facility_recommendations'][0]['error'] == 'index failure'
+
+    update = asyncio.run(graph.facility_finder_agent_async(needs_facility({'lat': '33.6', 'lng': '73.0'})))
+    assert update['degraded_mode'] is True
+    assert update['facility_recommendations'][0]['error'] == 'index failure'
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from orchestration.health import CLOSED, HALF_OPEN, OPEN, BackendHealth, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 29.0
+    assert breaker.state == OPEN
+    clock.now = 30.0
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_for_a_full_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 30.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 59.0
+    assert not breaker.allow_request()
+    clock.now = 60.0
+    assert breaker.allow_request()
+
+
+def test_trip_opens_immediately():
+    breaker = CircuitBreaker(failure_threshold=5, clock=FakeClock())
+    breaker.trip()
+    assert breaker.state == OPEN
+
+
+def test_failed_health_probe_trips_the_breaker_and_reports_degraded():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0, clock=clock)
+
+    def probe() -> Dict[str, Any]:
+        raise ConnectionError('backend down')
+
+    health = BackendHealth(probe, breaker, ttl=15.0, clock=clock)
+    status = health.refresh()
+    assert status['degraded_mode'] and status['checked']
+    assert breaker.state == OPEN
+    assert health.degraded()
+
+
+def test_healthy_probe_closes_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, clock=clock)
+    breaker.record_failure()
+    health = BackendHealth(lambda: {'degraded_mode': False}, breaker, ttl=15.0, clock=clock)
+    health.refresh()
+    assert breaker.state == CLOSED
+    assert not health.degraded()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+from orchestration.hotspots import ANY, HotspotDetector, _sketch_cells, hotspot_key
+
+BUCKET = 60.0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def detector(clock: FakeClock, **overrides) -> HotspotDetector:
+    settings = dict(bucket_seconds=BUCKET, window_buckets=2, history_buckets=10, ratio=3.0, min_count=5, min_z=3.5)
+    settings.update(overrides)
+    return HotspotDetector(clock=clock, **settings)
+
+
+def steady_baseline(hotspots: HotspotDetector, clock: FakeClock, buckets: int = 6, per_bucket: int = 1) -> None:
+    # One clinic case per bucket: a usual window holds two.
+    for epoch in range(buckets):
+        clock.now = epoch * BUCKET
+        for _ in range(per_bucket):
+            assert hotspots.observe('Lahore', None, 'clinic', []) is None
+    clock.now = buckets * BUCKET
+
+
+def test_sketch_cells_are_stable_and_one_per_row():
+    cells = _sketch_cells('Lahore|*|clinic|*', 4, 1024)
+    assert cells == _sketch_cells('Lahore|*|clinic|*', 4, 1024)
+    assert [cell // 1024 for cell in cells] == [0, 1, 2, 3]
+
+
+def test_sketch_never_undercounts():
+    clock = FakeClock()
+    hotspots = HotspotDetector(max_keys=0, sketch_width=64, sketch_depth=4, clock=clock)
+    rng = random.Random(5)
+    truth = Counter()
+    for _ in range(2000):
+        district = f'district-{rng.randint(0, 199)}'
+        hotspots.observe(district, None, 'clinic', [])
+        truth[hotspot_key(district, ANY, 'clinic', ANY)] += 1
+    assert hotspots.stats()['tracked_keys'] == 0
+    for key, count in truth.items():
+        recent, total = hotspots._estimate(key)
+        assert recent >= count and total >= count
+
+
+def test_exact_counters_are_used_while_rows_are_free():
+    clock = FakeClock()
+    hotspots = HotspotDetector(max_keys=2, clock=clock)
+    hotspots.observe('Lahore', 'Model Town', 'clinic', [])
+    assert hotspots.stats()['tracked_keys'] == 2
+    assert hotspots._estimate(hotspot_key('Lahore', 'Model Town', 'clinic', ANY)) == (1, 1)
+    hotspots.observe('Karachi', None, 'clinic', [])
+    assert hotspots.stats()['sketched'] == 1
+
+
+def test_surge_over_a_steady_baseline_raises_an_alert():
+    clock = FakeClock()
+    hotspots = detector(clock)
+    steady_baseline(hotspots, clock)
+    alerts = [hotspots.observe('Lahore', None, 'clinic', []) for _ in range(10)]
+    first = next(index for index, alert in enumerate(alerts) if alert is not None)
+    # The window needs min_count, ratio x the usual 2 cases, and a z-score of 3.5: 11 cases, counting the one before.
+    assert first == 9
+    alert = alerts[-1]
+    assert alert['type'] == 'potential-hotspot'
+    assert (alert['district'], alert['tehsil'], alert['level'], alert['condition']) == ('Lahore', None, 'clinic', None)
+    assert alert['cases'] == 11 and alert['baseline'] == 2.0
+    assert hotspots.hotspots()[0]['cases'] == 11
+    assert hotspots.stats()['alerts_raised'] == 1
+
+
+def test_condition_without_history_alerts_on_min_count():
+    clock = FakeClock()
+    hotspots = detector(clock)
+    steady_baseline(hotspots, clock)
+    alerts = [hotspots.observe('Lahore', None, 'clinic', ['fever']) for _ in range(5)]
+    assert alerts[:4] == [None] * 4
+    assert (alerts[4]['condition'], alerts[4]['cases'], alerts[4]['baseline']) == ('fever', 5, 0.0)
+
+
+def test_most_specific_hotspot_wins_a_tie():
+    clock = FakeClock()
+    hotspots = detector(clock)
+    for epoch in range(6):
+        clock.now = epoch * BUCKET
+        hotspots.observe('Lahore', 'Model Town', 'clinic', ['fever'])
+    clock.now = 6 * BUCKET
+    alert = None
+    for _ in range(10):
+        alert = hotspots.observe('Lahore', 'Model Town', 'clinic', ['fever'])
+    assert (alert['tehsil'], alert['condition']) == ('Model Town', 'fever')
+
+
+def test_no_alerts_before_a_full_window_of_history():
+    clock = FakeClock()
+    hotspots = detector(clock)
+    assert all(hotspots.observe('Lahore', None, 'clinic', []) is None for _ in range(50))
+    assert hotspots.hotspots() == []
+
+
+def test_small_or_proportionate_counts_do_not_alert():
+    clock = FakeClock()
+    hotspots = detector(clock, min_count=20)
+    steady_baseline(hotspots, clock)
+    assert all(hotspots.observe('Lahore', None, 'clinic', []) is None for _ in range(15))
+
+    busy_clock = FakeClock()
+    busy = detector(busy_clock)
+    steady_baseline(busy, busy_clock, per_bucket=10)
+    assert all(busy.observe('Lahore', None, 'clinic', []) is None for _ in range(30))
+
+
+def test_alert_expires_once_the_surge_leaves_the_window():
+    clock = FakeClock()
+    hotspots = detector(clock)
+    steady_baseline(hotspots, clock)
+    for _ in range(10):
+        hotspots.observe('Lahore', None, 'clinic', [])
+    assert hotspots.hotspots()
+    clock.now += 2 * BUCKET
+    assert hotspots.hotspots() == []
+
+
+def test_surge_split_across_workers_is_detected_after_merging():
+    clock = FakeClock()
+    first, second = detector(clock, worker_id='a'), detector(clock, worker_id='b')
+    for hotspots in (first, second):
+        steady_baseline(hotspots, clock)
+        clock.now = 6 * BUCKET
+        assert all(hotspots.observe('Lahore', None, 'clinic', []) is None for _ in range(7))
+    assert first.merge([second.snapshot()]) == 1
+    [alert] = first.hotspots()
+    assert alert['cases'] == 16 and alert['baseline'] == 4.0
+
+
+def test_stale_peer_snapshots_are_ignored():
+    clock = FakeClock()
+    first, second = detector(clock), detector(clock)
+    second.observe('Lahore', None, 'clinic', [])
+    snapshot = second.snapshot()
+    clock.now = 5 * BUCKET
+    assert first.merge([snapshot]) == 0
+
+
+def test_sync_exchanges_snapshots_through_the_directory(tmp_path):
+    clock = FakeClock()
+    first = detector(clock, snapshot_dir=str(tmp_path), worker_id='a')
+    second = detector(clock, snapshot_dir=str(tmp_path), worker_id='b')
+    second.observe('Lahore', None, 'clinic', [])
+    second.sync()
+    first.sync()
+    assert first.stats()['peers'] == 1
+    assert first._estimate(hotspot_key('Lahore', ANY, 'clinic', ANY)) == (1, 1)
+    second.stop()
+    assert not (tmp_path / 'b.json').exists()
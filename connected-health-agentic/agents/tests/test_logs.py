@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from orchestration.health import BackendUnavailable
+from orchestration.logs import LogShipper, retryable
+
+REQUEST = httpx.Request('POST', 'http://backend/api/interactions/bulk')
+
+
+def status_error(code: int) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(str(code), request=REQUEST, response=httpx.Response(code, request=REQUEST))
+
+
+class FakeBackend:
+    def __init__(self) -> None:
+        self.error: Exception | None = None
+        self.received: List[Tuple[str, List[Dict[str, Any]]]] = []
+
+    def __call__(self, kind: str, payloads: List[Dict[str, Any]]) -> None:
+        if self.error is not None:
+            raise self.error
+        self.received.append((kind, payloads))
+
+
+def spool(tmp_path, prefix: str) -> List[str]:
+    return sorted(path.name for path in tmp_path.iterdir() if path.name.startswith(prefix))
+
+
+def test_outages_and_server_errors_are_retryable():
+    assert retryable(httpx.ConnectError('refused', request=REQUEST))
+    assert retryable(BackendUnavailable('circuit open'))
+    assert retryable(status_error(503))
+    assert retryable(status_error(429))
+    assert not retryable(status_error(400))
+    assert not retryable(ValueError('bad payload'))
+
+
+def test_logs_are_stamped_when_submitted(tmp_path):
+    backend = FakeBackend()
+    shipper = LogShipper(backend, str(tmp_path))
+    shipper.submit('interactions', {'agentName': 'triage'})
+    shipper.submit('interactions', {'agentName': 'triage', 'createdAt': '2026-01-01T00:00:00.000Z'})
+    shipper.stop()
+    stamped, kept = backend.received[0][1]
+    assert stamped['createdAt'].endswith('Z')
+    assert kept['createdAt'] == '2026-01-01T00:00:00.000Z'
+
+
+def test_outage_spills_and_replay_ships_later(tmp_path):
+    backend = FakeBackend()
+    backend.error = httpx.ConnectError('refused', request=REQUEST)
+    shipper = LogShipper(backend, str(tmp_path))
+    shipper.submit('interactions', {'agentName': 'triage'})
+    shipper.stop()
+    assert len(spool(tmp_path, 'spill-')) == 1
+
+    backend.error = None
+    shipper.replay()
+    assert [payload['agentName'] for _, payloads in backend.received for payload in payloads] == ['triage']
+    assert spool(tmp_path, 'spill-') == [] and spool(tmp_path, 'replay-') == []
+    assert shipper.stats()['replayed'] == 1
+
+
+def test_rejected_batches_are_dead_lettered_not_retried(tmp_path):
+    backend = FakeBackend()
+    backend.error = status_error(400)
+    shipper = LogShipper(backend, str(tmp_path))
+    shipper.submit('mcp', {'toolName': 'search'})
+    shipper.stop()
+    assert spool(tmp_path, 'spill-') == []
+    [dead] = spool(tmp_path, 'dead-')
+    entry = json.loads((tmp_path / dead).read_text(encoding='utf-8'))
+    assert entry['kind'] == 'mcp' and entry['payload']['toolName'] == 'search' and entry['error'] == '400'
+    assert shipper.stats()['dead_lettered'] == 1
+
+
+def test_batches_are_split_to_the_bulk_limit(tmp_path):
+    backend = FakeBackend()
+    shipper = LogShipper(backend, str(tmp_path))
+    shipper._ship([('interactions', {'n': index}) for index in range(1201)])
+    assert [len(payloads) for _, payloads in backend.received] == [500, 500, 201]
+
+
+def test_claimed_file_left_by_a_dead_worker_is_replayed(tmp_path):
+    # A worker that crashed mid-replay leaves its claimed file behind instead of losing it.
+    orphan = tmp_path / 'replay-999999999-1-0.jsonl'
+    orphan.write_text(json.dumps({'kind': 'interactions', 'payload': {'agentName': 'triage'}}) + '\n', encoding='utf-8')
+    backend = FakeBackend()
+    shipper = LogShipper(backend, str(tmp_path))
+    shipper.replay()
+    assert backend.received == [('interactions', [{'agentName': 'triage'}])]
+    assert not orphan.exists()
+
+
+def test_failed_replay_keeps_every_item(tmp_path):
+    backend = FakeBackend()
+    backend.error = BackendUnavailable('circuit open')
+    shipper = LogShipper(backend, str(tmp_path), batch_size=2)
+    for index in range(5):
+        shipper.submit('interactions', {'n': index})
+    shipper.stop()
+    shipper.replay()
+    [spill] = spool(tmp_path, 'spill-')
+    lines = (tmp_path / spill).read_text(encoding='utf-8').splitlines()
+    assert sorted(json.loads(line)['payload']['n'] for line in lines) == [0, 1, 2, 3, 4]
+    assert spool(tmp_path, 'replay-') == []
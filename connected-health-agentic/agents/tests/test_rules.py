@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+from benchmarks.corpus import TEMPLATES
+from orchestration.rules import RED_FLAGS, SAFETY_DISCLAIMER, TRIAGE_RULES_PATH, CompiledRules, PatternAutomaton, TriageRuleEngine
+
+
+def load_rules() -> Dict[str, Any]:
+    with open(TRIAGE_RULES_PATH, 'r', encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def substring_triage(message: str, rules: Dict[str, Any], red_flags: List[str]) -> Dict[str, Any]:
+    # The matcher the compiled rules replaced: first red flag in list order, then the first rule in file order.
+    text = message.lower()
+    for flag in red_flags:
+        if flag in text:
+            return {
+                'level': 'emergency',
+                'reason': f'Red flag detected: {flag}',
+                'recommendedUrgency': 'Immediate emergency evaluation',
+                'disclaimer': SAFETY_DISCLAIMER,
+            }
+    for keyword, result in rules.items():
+        if keyword in text and isinstance(result, dict):
+            return {
+                'level': result.get('level', 'self-care'),
+                'reason': result.get('reason', 'Monitor at home'),
+                'recommendedUrgency': result.get('recommendedUrgency', 'Monitor'),
+                'disclaimer': result.get('disclaimer', SAFETY_DISCLAIMER),
+            }
+    default_rule = rules.get('default', {})
+    return {
+        'level': default_rule.get('level', 'self-care'),
+        'reason': default_rule.get('reason', 'Monitor at home'),
+        'recommendedUrgency': default_rule.get('recommendedUrgency', 'Monitor'),
+        'disclaimer': default_rule.get('disclaimer', SAFETY_DISCLAIMER),
+    }
+
+
+def test_matches_substring_rules_without_variants():
+    # With no keyword lists or red-flag variants, the automaton must give exactly the old answers.
+    rules = {keyword: {k: v for k, v in rule.items() if k != 'keywords'} for keyword, rule in load_rules().items()}
+    red_flags = {flag: [] for flag in RED_FLAGS}
+    compiled = CompiledRules(rules, red_flags)
+    words = [keyword for keyword in rules if keyword != 'default'] + list(red_flags) + ['mild cough', 'Fever', 'BREATHING', 'pregnancy']
+    messages = [template for kinds in TEMPLATES.values() for templates in kinds.values() for template in templates]
+    rng = random.Random(3)
+    for _ in range(500):
+        messages.append(' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))))
+    for message in messages:
+        assert compiled.triage(message) == substring_triage(message, rules, list(red_flags)), message
+
+
+def test_red_flag_variants_report_the_canonical_flag():
+    compiled = CompiledRules(load_rules())
+    assert compiled.triage('Mera bacha behosh ho gaya hai')['reason'] == 'Red flag detected: unconscious'
+    assert compiled.triage('بچے کو جھٹکے لگ رہے ہیں')['reason'] == 'Red flag detected: convulsion'
+    # A red flag wins over a keyword that appears earlier in the message.
+    assert compiled.triage('bukhar hai aur saans nahi aa rahi')['level'] == 'emergency'
+
+
+def test_keyword_variants_map_to_their_rule():
+    rules = load_rules()
+    compiled = CompiledRules(rules)
+    assert compiled.triage('Teen din se bukhaar nahi utar raha')['reason'] == rules['fever']['reason']
+    assert compiled.triage('بخار اور جسم میں درد ہے')['reason'] == rules['fever']['reason']
+    assert compiled.triage('Thora sar dard hai')['reason'] == rules['default']['reason']
+    assert compiled.scan('fever with saans mein takleef') == ([], ['fever', 'breathing difficulty'])
+
+
+def test_automaton_reports_overlapping_matches():
+    automaton = PatternAutomaton([(word, (1, rank, word)) for rank, word in enumerate(['he', 'she', 'his', 'hers'])])
+    assert sorted(name for _, _, name in automaton.search('USHERS')) == ['he', 'hers', 'she']
+
+
+def test_engine_reloads_changed_rules_and_keeps_the_last_good_set(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'fever': {'level': 'clinic', 'reason': 'first'}}), encoding='utf-8')
+    engine = TriageRuleEngine(str(path), reload_interval=0)
+    assert engine.triage('fever')['reason'] == 'first'
+
+    path.write_text(json.dumps({'fever': {'level': 'clinic', 'reason': 'second'}}), encoding='utf-8')
+    os.utime(path, ns=(1, 10 ** 18))
+    assert engine.triage('fever')['reason'] == 'second'
+
+    path.write_text('{"fever": ', encoding='utf-8')
+    os.utime(path, ns=(1, 2 * 10 ** 18))
+    assert engine.triage('fever')['reason'] == 'second'
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from orchestration import sessions
+from orchestration.sessions import SessionStore, compact_session, decode_session, encode_session, summarize_turn
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def conversation(turns: int) -> List[Dict[str, Any]]:
+    messages = []
+    for turn in range(turns):
+        messages.append({'sender': 'user', 'content': f'question {turn}'})
+        messages.append({'sender': 'assistant', 'content': f'Triage level: clinic ({turn})\nVisit a clinic within 24 hours.'})
+    return messages
+
+
+def test_assistant_turns_are_summarized_by_their_first_line():
+    assert summarize_turn({'sender': 'assistant', 'content': 'Triage level: clinic\nlong advice'}) == 'assistant: Triage level: clinic'
+    assert summarize_turn({'sender': 'user', 'content': 'x' * 500}, max_chars=10) == 'user: ' + 'x' * 10
+
+
+def test_keeps_the_window_and_folds_older_turns_into_the_summary():
+    session = compact_session({'messages': conversation(6), 'patient_context': {'age': 4}}, window=4)
+    assert [message['content'] for message in session['messages']][0] == 'question 4'
+    assert len(session['messages']) == 4
+    assert session['conversation_summary'].splitlines() == [
+        summarize_turn(message) for message in conversation(6)[:8]
+    ]
+    assert session['patient_context'] == {'age': 4}
+    assert session['turns'] == 1
+
+
+def test_summary_accumulates_across_turns_and_keeps_the_newest_lines():
+    first = compact_session({'messages': conversation(4)}, window=4, summary_chars=10000)
+    messages = first['messages'] + conversation(6)[8:]
+    second = compact_session({**first, 'messages': messages}, window=4, summary_chars=10000)
+    assert second['conversation_summary'].splitlines() == [summarize_turn(message) for message in conversation(6)[:8]]
+    assert second['turns'] == 2
+
+    capped = compact_session({**first, 'messages': messages}, window=4, summary_chars=60)
+    assert len(capped['conversation_summary']) <= 60
+    assert capped['conversation_summary'].splitlines()[-1] == summarize_turn(conversation(6)[7])
+    assert all(line.startswith(('user: ', 'assistant: ')) for line in capped['conversation_summary'].splitlines())
+
+
+def test_short_conversations_are_not_summarized():
+    session = compact_session({'messages': conversation(2)}, window=8)
+    assert session['conversation_summary'] == ''
+    assert len(session['messages']) == 4
+
+
+def test_encoding_round_trips():
+    session = compact_session({'messages': conversation(3), 'patient_context': {'district': 'Lahore'}}, window=2)
+    assert decode_session(encode_session(session)) == session
+
+
+def test_blob_needing_a_missing_package_reads_as_no_session(monkeypatch):
+    if sessions.msgpack is None:
+        pytest.skip('msgpack is not installed')
+    blob = encode_session({'messages': []})
+    monkeypatch.setattr(sessions, 'msgpack', None)
+    assert decode_session(blob) is None
+
+
+def test_store_reloads_sessions_from_disk_until_they_expire(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'sessions.sqlite')
+    SessionStore(path, window=4, ttl=60.0, clock=clock).save('s1', {'messages': conversation(3)})
+
+    restarted = SessionStore(path, window=4, ttl=60.0, clock=clock)
+    assert len(restarted.load('s1')['messages']) == 4
+    assert restarted.stats()['disk_hits'] == 1
+
+    clock.now += 60.0
+    assert restarted.load('s1') == {}
+
+
+def test_store_sees_a_turn_saved_by_another_worker(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'sessions.sqlite')
+    mine, theirs = SessionStore(path, clock=clock), SessionStore(path, clock=clock)
+    mine.save('s1', {'messages': conversation(1)})
+    assert mine.load('s1')['turns'] == 1
+    clock.now += 1.0
+    theirs.save('s1', {**mine.load('s1'), 'messages': conversation(2)})
+    assert mine.load('s1')['turns'] == 2
+
+
+def test_expired_sessions_are_purged_as_sessions_are_saved(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'sessions.sqlite')
+    store = SessionStore(path, ttl=60.0, purge_every=3, clock=clock)
+    store.save('old-1', {'messages': []})
+    store.save('old-2', {'messages': []})
+    clock.now += 120.0
+    store.save('new', {'messages': []})
+    with sqlite3.connect(path) as db:
+        assert [row[0] for row in db.execute('SELECT session_id FROM sessions')] == ['new']
+    assert store.stats()['size'] == 1
+
+
+async def warm() -> None:
+    return None
+
+
+class SlowWorkflow:
+    def invoke(self, state: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(0.05)
+        reply = {'sender': 'assistant', 'content': 'noted', 'timestamp': ''}
+        return {**state, 'messages': state['messages'] + [state['incoming_message'], reply], 'reply': 'noted'}
+
+
+def test_concurrent_turns_of_one_session_keep_both_messages(tmp_path, monkeypatch):
+    import main
+
+    store = SessionStore(str(tmp_path / 'sessions.sqlite'))
+    monkeypatch.setattr(main, 'ASYNC_GRAPH', False)
+    monkeypatch.setattr(main, 'compiled_workflow', lambda: SlowWorkflow())
+    monkeypatch.setattr(main, 'session_store', lambda: store)
+    monkeypatch.setattr(main, 'wait_until_warm', warm)
+
+    async def turns() -> None:
+        await asyncio.gather(*(
+            main.run_workflow(main.RunRequest(session_id='s1', user_role='citizen', message=message))
+            for message in ('first', 'second')
+        ))
+
+    asyncio.run(turns())
+    contents = [message['content'] for message in store.load('s1')['messages']]
+    assert sorted(contents[0::2]) == ['first', 'second']
+    assert store.load('s1')['turns'] == 2
+    assert main._session_locks == {}
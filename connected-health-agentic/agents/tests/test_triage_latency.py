@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.stubs import NullBackendClient, StubGeminiClient, StubKnowledgeBase
+from orchestration import graph
+
+MESSAGE = 'My child has had a fever for three days'
+LOW_CONFIDENCE = {'level': 'clinic', 'reason': 'Stub fast-model assessment.', 'recommendedUrgency': 'Soon', 'confidence': 0.3}
+
+
+@pytest.fixture
+def stub_triage(monkeypatch):
+    def install(deadline_ms: int = 200, fast_first: bool = False, **stub_options: Any) -> StubGeminiClient:
+        stub = StubGeminiClient(**stub_options)
+        monkeypatch.setattr(graph, 'gemini_client', lambda: stub)
+        monkeypatch.setattr(graph, 'knowledge_base', lambda: StubKnowledgeBase(['Stub guidance document.']))
+        monkeypatch.setattr(graph, 'backend_client', lambda: NullBackendClient())
+        monkeypatch.setattr(graph, 'TRIAGE_DEADLINE_MS', deadline_ms)
+        monkeypatch.setattr(graph, 'TRIAGE_FAST_FIRST', fast_first)
+        return stub
+
+    return install
+
+
+def conversation() -> Dict[str, Any]:
+    return {'messages': [{'sender': 'user', 'content': MESSAGE}], 'degraded_mode': False}
+
+
+def timed_triage() -> tuple:
+    started = time.perf_counter()
+    result = graph.triage_agent(conversation())
+    return result, time.perf_counter() - started
+
+
+def test_model_answer_within_the_deadline_is_used(stub_triage):
+    stub_triage(delays={'smart': 0.01})
+    result, _ = timed_triage()
+    assert result['triage_result']['reason'] == 'Stub smart-model assessment.'
+    assert not result['degraded_mode']
+    assert result['needs_facility'] and result['needs_follow_up']
+
+
+def test_slow_model_falls_back_to_the_rules_at_the_deadline(stub_triage):
+    stub_triage(deadline_ms=100, delays={'smart': 1.0})
+    result, elapsed = timed_triage()
+    assert elapsed < 0.5
+    assert result['triage_result']['reason'] == graph.rule_based_triage(MESSAGE)['reason']
+    assert result['degraded_mode'] is True
+
+
+def test_model_failure_falls_back_to_the_rules(stub_triage):
+    stub_triage(failure_rate=1.0)
+    result, _ = timed_triage()
+    assert result['triage_result']['level'] == 'clinic'
+    assert result['degraded_mode'] is True
+
+
+def test_without_a_deadline_the_wait_is_still_capped(stub_triage, monkeypatch):
+    stub_triage(deadline_ms=0, delays={'smart': 1.0})
+    monkeypatch.setattr(graph, 'TRIAGE_MAX_WAIT_MS', 100)
+    result, elapsed = timed_triage()
+    assert elapsed < 0.5
+    assert result['degraded_mode'] is True
+
+
+def test_async_node_awaits_the_model_and_falls_back_at_the_deadline(stub_triage):
+    stub_triage(deadline_ms=100, delays={'smart': 1.0})
+    update = asyncio.run(graph.triage_agent_async(conversation()))
+    assert update['degraded_mode'] is True
+    assert update['triage_result']['reason'] == graph.rule_based_triage(MESSAGE)['reason']
+
+    stub_triage(delays={'smart': 0.01})
+    update = asyncio.run(graph.triage_agent_async(conversation()))
+    assert update['triage_result']['reason'] == 'Stub smart-model assessment.'
+    assert 'degraded_mode' not in update
+
+
+def test_confident_fast_answer_skips_the_smart_model(stub_triage):
+    stub = stub_triage(fast_first=True)
+    result, _ = timed_triage()
+    assert result['triage_result']['reason'] == 'Stub fast-model assessment.'
+    assert stub.calls == {'fast': 1}
+
+
+def test_low_confidence_fast_answer_escalates_to_the_smart_model(stub_triage):
+    stub = stub_triage(fast_first=True, responses={'fast': LOW_CONFIDENCE})
+    result, _ = timed_triage()
+    assert result['triage_result']['reason'] == 'Stub smart-model assessment.'
+    assert stub.calls == {'fast': 1, 'smart': 1}
+
+
+def test_unparseable_fast_answer_escalates_to_the_smart_model(stub_triage):
+    stub = stub_triage(fast_first=True, responses={'fast': 'not json'})
+    result, _ = timed_triage()
+    assert result['triage_result']['reason'] == 'Stub smart-model assessment.'
+    assert stub.calls == {'fast': 1, 'smart': 1}
+
+
+def test_is_confident_requires_a_known_level_and_enough_confidence():
+    assert graph.is_confident({'level': 'Clinic', 'confidence': 0.9})
+    assert graph.is_confident({'level': 'self-care'})
+    assert not graph.is_confident({'level': 'clinic', 'confidence': 0.5})
+    assert not graph.is_confident({'level': 'urgent', 'confidence': 0.99})
+    assert not graph.is_confident({'level': 'clinic', 'confidence': 'high'})
+    assert not graph.is_confident(['clinic'])
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+
+from orchestration.warmup import WarmUp
+
+
+def flaky(failures: int):
+    calls = {'count': 0}
+
+    def stage() -> None:
+        calls['count'] += 1
+        if calls['count'] <= failures:
+            raise RuntimeError('not yet')
+
+    return stage, calls
+
+
+def wait_until_ready(warm_up: WarmUp, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not warm_up.ready:
+        assert time.monotonic() < deadline, warm_up.status()
+        time.sleep(0.001)
+
+
+def test_failed_stage_is_retried_until_ready():
+    stage, calls = flaky(failures=2)
+    warm_up = WarmUp([('graph', lambda: None), ('gemini', stage)], retry_delay=0.001, max_retry_delay=0.01)
+    assert warm_up.wait(2.0)
+    wait_until_ready(warm_up)
+    status = warm_up.status()
+    assert status['ready'] is True
+    assert status['stages']['gemini']['status'] == 'done'
+    assert status['stages']['gemini']['attempts'] == 3
+    assert status['stages']['graph']['attempts'] == 1
+    assert calls['count'] == 3
+
+
+def test_waiters_are_released_after_the_first_pass():
+    stage, calls = flaky(failures=10**6)
+    warm_up = WarmUp([('gemini', stage)], retry_delay=60.0)
+    try:
+        assert warm_up.wait(2.0)
+        status = warm_up.status()
+        assert status['ready'] is False
+        assert status['stages']['gemini']['status'] == 'failed'
+        assert status['stages']['gemini']['error'] == 'not yet'
+    finally:
+        warm_up.stop()
+    assert calls['count'] == 1
+
+
+def test_stop_ends_the_retry_loop():
+    stage, calls = flaky(failures=10**6)
+    warm_up = WarmUp([('gemini', stage)], retry_delay=0.001, max_retry_delay=0.001)
+    warm_up.wait(2.0)
+    warm_up.stop()
+    warm_up._thread.join(2.0)
+    assert not warm_up._thread.is_alive()
+    assert warm_up.ready is False
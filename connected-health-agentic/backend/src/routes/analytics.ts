@@ -1,10 +1,11 @@
 import { Router } from 'express';
 import { prisma } from '../prisma.js';
+import { fetchHotspots } from '../services/langGraphClient.js';
 
 const analyticsRouter = Router();
 
 analyticsRouter.get('/summary', async (_req, res) => {
-  const [totalInteractions, triageCounts, recentEvents] = await Promise.all([
+  const [totalInteractions, triageCounts, recentEvents, liveHotspots] = await Promise.all([
     prisma.interaction.count(),
     prisma.interaction.groupBy({
       by: ['triageLevel'],
@@ -14,6 +15,7 @@ analyticsRouter.get('/summary', async (_req, res) => {
       orderBy: { createdAt: 'desc' },
       take: 20,
     }),
+    fetchHotspots(),
   ]);
 
   const triageDistribution = triageCounts.reduce<Record<string, number>>((acc, row) => {
@@ -22,13 +24,23 @@ analyticsRouter.get('/summary', async (_req, res) => {
     return acc;
   }, {});
 
-  const hotspotFlags = recentEvents
-    .filter((event) => event.eventType === 'hotspot-alert')
-    .map((event) => ({
-      id: event.id,
-      ...event.payload,
-      createdAt: event.createdAt,
-    }));
+  const now = new Date();
+  const hotspotFlags = [
+    ...liveHotspots.map((hotspot) => ({
+      id: `live:${hotspot.district}:${hotspot.tehsil ?? ''}:${hotspot.level}:${hotspot.condition ?? ''}`,
+      ...hotspot,
+      tehsil: hotspot.tehsil ?? undefined,
+      condition: hotspot.condition ? `${hotspot.condition} (${hotspot.level})` : `any ${hotspot.level}`,
+      createdAt: now,
+    })),
+    ...recentEvents
+      .filter((event) => event.eventType === 'hotspot-alert')
+      .map((event) => ({
+        id: event.id,
+        ...event.payload,
+        createdAt: event.createdAt,
+      })),
+  ];
 
   return res.json({
     totalInteractions,
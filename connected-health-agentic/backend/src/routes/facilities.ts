@@ -60,4 +60,54 @@ facilitiesRouter.post('/search', async (req, res) => {
   return res.json(results.slice(0, 3));
 });
 
+const syncSchema = z.object({
+  since: z.string().datetime().optional(),
+  afterId: z.coerce.number().int().nonnegative().optional(),
+});
+
+// Snapshot/delta feed for the orchestrator's in-process facility index.
+// Without `since` the full directory is returned; with it, only facilities added after `afterId`
+// or whose inventory changed since `since`. `ids` always lists every current facility so
+// clients can drop removed rows.
+facilitiesRouter.get('/sync', async (req, res) => {
+  const parsed = syncSchema.safeParse(req.query);
+  if (!parsed.success) {
+    return res.status(400).json({ error: 'Invalid facility sync query', details: parsed.error.flatten() });
+  }
+  const { since, afterId } = parsed.data;
+  const syncedAt = new Date().toISOString();
+  const full = !since;
+  const facilities = await prisma.facility.findMany({
+    where: full ? undefined : {
+      OR: [
+        { id: { gt: afterId ?? 0 } },
+        { inventory: { some: { lastUpdated: { gt: new Date(since as string) } } } },
+      ],
+    },
+    include: { inventory: true },
+    orderBy: { id: 'asc' },
+  });
+  const ids = full
+    ? facilities.map((facility) => facility.id)
+    : (await prisma.facility.findMany({ select: { id: true }, orderBy: { id: 'asc' } })).map((facility) => facility.id);
+
+  return res.json({
+    syncedAt,
+    full,
+    ids,
+    facilities: facilities.map((facility) => ({
+      id: facility.id,
+      name: facility.name,
+      type: facility.type,
+      district: facility.district,
+      tehsil: facility.tehsil,
+      lat: facility.lat,
+      lng: facility.lng,
+      services: Array.isArray(facility.services) ? facility.services : [],
+      openingHours: facility.openingHours,
+      stockAlerts: facility.inventory.filter((item) => item.stockLevel.toLowerCase() === 'low').map((item) => item.itemName),
+    })),
+  });
+});
+
 export default facilitiesRouter;
@@ -11,6 +11,8 @@ const createSchema = z.object({
   inputSummary: z.string(),
   outputSummary: z.string(),
   triageLevel: z.string().optional(),
+  // Set by the agents when the event happened, so batches replayed after an outage keep their original time.
+  createdAt: z.string().datetime().optional(),
 });
 
 interactionsRouter.post('/', async (req, res) => {
@@ -22,4 +24,17 @@ interactionsRouter.post('/', async (req, res) => {
   return res.status(201).json(interaction);
 });
 
+const bulkSchema = z.object({
+  items: z.array(createSchema).max(500),
+});
+
+interactionsRouter.post('/bulk', async (req, res) => {
+  const parsed = bulkSchema.safeParse(req.body);
+  if (!parsed.success) {
+    return res.status(400).json({ error: 'Invalid interaction batch', details: parsed.error.flatten() });
+  }
+  const result = await prisma.interaction.createMany({ data: parsed.data.items });
+  return res.status(201).json({ count: result.count });
+});
+
 export default interactionsRouter;
@@ -9,6 +9,7 @@ const createSchema = z.object({
   input: z.any(),
   output: z.any().optional(),
   error: z.string().optional(),
+  createdAt: z.string().datetime().optional(),
 });
 
 mcpLogsRouter.post('/', async (req, res) => {
@@ -27,4 +28,25 @@ mcpLogsRouter.post('/', async (req, res) => {
   return res.status(201).json(log);
 });
 
+const bulkSchema = z.object({
+  items: z.array(createSchema).max(500),
+});
+
+mcpLogsRouter.post('/bulk', async (req, res) => {
+  const parsed = bulkSchema.safeParse(req.body);
+  if (!parsed.success) {
+    return res.status(400).json({ error: 'Invalid MCP log batch', details: parsed.error.flatten() });
+  }
+  const result = await prisma.mcpLog.createMany({
+    data: parsed.data.items.map((item) => ({
+      toolName: item.toolName,
+      input: item.input,
+      output: item.output,
+      error: item.error,
+      createdAt: item.createdAt,
+    })),
+  });
+  return res.status(201).json({ count: result.count });
+});
+
 export default mcpLogsRouter;
@@ -1,3 +1,4 @@
+import { createHash } from 'crypto';
 import { Router } from 'express';
 import { z } from 'zod';
 import { prisma } from '../prisma.js';
@@ -68,4 +69,13 @@ programsRouter.post('/eligibility', async (req, res) => {
   return res.json(evaluations);
 });
 
+// Lets the orchestrator cache eligibility answers: `version` changes whenever any program or its rules change.
+programsRouter.get('/catalog', async (_req, res) => {
+  const programs = await prisma.program.findMany({ orderBy: { id: 'asc' } });
+  const districts = await prisma.facility.findMany({ distinct: ['district'], select: { district: true }, orderBy: { district: 'asc' } });
+  const catalog = programs.map((program) => ({ id: program.id, name: program.name, eligibilityRules: program.eligibilityRules }));
+  const version = createHash('sha256').update(JSON.stringify(catalog)).digest('hex').slice(0, 16);
+  return res.json({ version, programs: catalog, districts: districts.map((row) => row.district) });
+});
+
 export default programsRouter;
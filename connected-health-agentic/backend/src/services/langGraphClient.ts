@@ -10,9 +10,19 @@ interface RunPayload {
   patientContext: Record<string, unknown>;
 }
 
+// Only the state fields the triage route forwards; the orchestrator leaves the rest out of the response.
+const STATE_FIELDS = [
+  'triage_result',
+  'facility_recommendations',
+  'program_eligibility',
+  'reminders',
+  'analytics_flags',
+  'degraded_mode',
+] as const;
+
 export interface LangGraphResponse {
   reply: string;
-  state: ConversationState;
+  state: Pick<ConversationState, (typeof STATE_FIELDS)[number]>;
 }
 
 export const runLangGraph = async (payload: RunPayload): Promise<LangGraphResponse> => {
@@ -22,6 +32,31 @@ export const runLangGraph = async (payload: RunPayload): Promise<LangGraphRespon
     language: payload.language,
     message: payload.message,
     patient_context: payload.patientContext,
+  }, {
+    params: { fields: STATE_FIELDS.join(',') },
   });
   return response.data;
 };
+
+export interface LiveHotspot {
+  district: string;
+  tehsil: string | null;
+  level: string;
+  condition: string | null;
+  cases: number;
+  baseline: number;
+  windowHours: number;
+  score: number;
+  message: string;
+}
+
+// Live surges from the orchestrator's in-process counters; an unreachable orchestrator means none, not an error.
+export const fetchHotspots = async (): Promise<LiveHotspot[]> => {
+  try {
+    const response = await axios.get(new URL('/analytics/hotspots', env.langGraphUrl).toString(), { timeout: 2000 });
+    return response.data.hotspots ?? [];
+  } catch (error) {
+    console.error('hotspot_fetch_error', error instanceof Error ? error.message : error);
+    return [];
+  }
+};
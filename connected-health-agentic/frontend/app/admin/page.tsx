@@ -9,7 +9,7 @@ const fetcher = (url: string) => fetch(url).then((res) => res.json());
 interface AnalyticsSummary {
   totalInteractions: number;
   triageDistribution: Record<string, number>;
-  hotspotFlags: Array<{ id: number; district?: string; tehsil?: string; cases?: number; condition?: string; windowHours?: number; createdAt?: string }>;
+  hotspotFlags: Array<{ id: number | string; district?: string; tehsil?: string; cases?: number; condition?: string; windowHours?: number; createdAt?: string }>;
 }
 
 export default function AdminPage() {
@@ -51,7 +51,7 @@ export default function AdminPage() {
                 <th className="py-2">District</th>
                 <th className="py-2">Tehsil</th>
                 <th className="py-2">Condition</th>
-                <th className="py-2">Cases (24h)</th>
+                <th className="py-2">Cases</th>
                 <th className="py-2">Created</th>
               </tr>
             </thead>
@@ -61,7 +61,7 @@ export default function AdminPage() {
                   <td className="py-2">{flag.district || '—'}</td>
                   <td className="py-2">{flag.tehsil || '—'}</td>
                   <td className="py-2">{flag.condition || '—'}</td>
-                  <td className="py-2">{flag.cases ?? '—'}</td>
+                  <td className="py-2">{flag.cases ?? '—'}{flag.windowHours ? ` in ${flag.windowHours}h` : ''}</td>
                   <td className="py-2">{flag.createdAt ? new Date(flag.createdAt).toLocaleString() : '—'}</td>
                 </tr>
               ))}